@@ -0,0 +1,278 @@
+"""
+Streaming Anomaly Detector Module for Aircraft Predictive Maintenance System
+
+This module flags abnormal sensor readings as telemetry arrives, without
+running the LightGBM models and SHAP on every tick:
+1. For every aircraft and monitored sensor, an exponentially weighted mean
+   and an exponentially weighted mean absolute deviation (a robust spread
+   estimate) are kept in fleet-wide float arrays, so memory per aircraft is
+   fixed
+2. A reading is scored as its deviation from the mean in units of the robust
+   spread; readings beyond ``threshold`` after a warm-up period raise alerts
+3. Residuals are clipped before the state update, so a single spike neither
+   drags the mean nor inflates the spread
+4. Batches are evaluated with array operations: repeated readings of the same
+   aircraft within a batch are processed in arrival order, one vectorized
+   round per repetition
+5. Alerts are published to subscribers (the /api/v1/anomalies/subscribe
+   server-sent events endpoint) through bounded per-subscriber queues
+
+Sensors are named as the client sends them (oilPressure, engineVibration,
+...); the snake_case names in SENSOR_ALIASES are accepted for the same
+sensors.
+"""
+
+import os
+import queue
+import threading
+import time
+
+import numpy as np
+
+from schemas import encode_payload
+
+MONITORED_SENSORS = tuple(name.strip() for name in os.environ.get(
+    'ANOMALY_SENSORS',
+    'oilPressure,oilTemperature,cylinderHeadTemperature,engineVibration,fuelFlowRate,engineRPM,hydraulicPressure'
+).split(',') if name.strip())
+# Alternative reading keys -> monitored sensor name
+SENSOR_ALIASES = {
+    'oil_pressure': 'oilPressure',
+    'oil_temperature': 'oilTemperature',
+    'cylinder_head_temperature': 'cylinderHeadTemperature',
+    'cht': 'cylinderHeadTemperature',
+    'engine_vibration': 'engineVibration',
+    'fuel_flow_rate': 'fuelFlowRate',
+    'engine_rpm': 'engineRPM',
+    'hydraulic_pressure': 'hydraulicPressure',
+}
+ANOMALY_ALPHA = float(os.environ.get('ANOMALY_ALPHA', 0.05))
+ANOMALY_THRESHOLD = float(os.environ.get('ANOMALY_THRESHOLD', 6.0))
+ANOMALY_WARMUP = int(os.environ.get('ANOMALY_WARMUP', 20))
+# Mean absolute deviation -> standard deviation for normally distributed data
+MAD_TO_STD = 1.2533
+SUBSCRIBER_QUEUE_SIZE = 1000
+SSE_MIMETYPE = 'text/event-stream'
+# Seconds between keep-alive comments on idle subscriptions
+SSE_HEARTBEAT = float(os.environ.get('ANOMALY_SSE_HEARTBEAT', 15))
+
+
+class AlertBroker:
+    """Fan alerts out to subscribers; slow subscribers lose their oldest alerts."""
+    def __init__(self, queue_size=SUBSCRIBER_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._subscribers = set()
+        self._lock = threading.Lock()
+
+    def subscribe(self):
+        subscriber = queue.Queue(maxsize=self.queue_size)
+        with self._lock:
+            self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def publish(self, alerts):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            for alert in alerts:
+                while True:
+                    try:
+                        subscriber.put_nowait(alert)
+                        break
+                    except queue.Full:
+                        try:
+                            subscriber.get_nowait()
+                        except queue.Empty:
+                            pass
+
+
+class StreamingAnomalyDetector:
+    """EWMA and robust-deviation state for every aircraft and monitored sensor.
+
+    Parameters
+    ----------
+    sensors : sequence of str, default=MONITORED_SENSORS
+        Sensors to monitor; other readings are ignored
+    aliases : dict, default=SENSOR_ALIASES
+        Alternative reading keys of monitored sensors
+    alpha : float, default=ANOMALY_ALPHA
+        EWMA smoothing factor (weight of the newest reading)
+    threshold : float, default=ANOMALY_THRESHOLD
+        Alert when |value - mean| exceeds this many robust standard deviations
+    warmup : int, default=ANOMALY_WARMUP
+        Readings of a sensor needed before it can raise alerts
+    broker : AlertBroker, optional
+        Where alerts are published
+    capacity : int, default=64
+        Initial number of aircraft rows; the state arrays double when full
+    """
+    def __init__(self, sensors=MONITORED_SENSORS, alpha=ANOMALY_ALPHA, threshold=ANOMALY_THRESHOLD,
+                 warmup=ANOMALY_WARMUP, broker=None, capacity=64, aliases=SENSOR_ALIASES):
+        self.sensors = tuple(sensors)
+        self._sensor_index = {name: j for j, name in enumerate(self.sensors)}
+        for alias, name in aliases.items():
+            if name in self._sensor_index and alias not in self._sensor_index:
+                self._sensor_index[alias] = self._sensor_index[name]
+        self.alpha = alpha
+        self.threshold = threshold
+        self.warmup = warmup
+        self.broker = broker or AlertBroker()
+        self._aircraft_index = {}
+        self.tail_numbers = []
+        n_sensors = len(self.sensors)
+        self._mean = np.zeros((capacity, n_sensors))
+        self._mad = np.zeros((capacity, n_sensors))
+        self._count = np.zeros((capacity, n_sensors), dtype=np.int64)
+        self._lock = threading.Lock()
+
+    def _rows(self, tail_numbers):
+        """State row of each tail number, registering new aircraft."""
+        rows = np.empty(len(tail_numbers), dtype=np.int64)
+        for i, tail_number in enumerate(tail_numbers):
+            row = self._aircraft_index.get(tail_number)
+            if row is None:
+                row = self._aircraft_index[tail_number] = len(self.tail_numbers)
+                self.tail_numbers.append(tail_number)
+            rows[i] = row
+        capacity = self._mean.shape[0]
+        if len(self.tail_numbers) > capacity:
+            new_capacity = max(2 * capacity, len(self.tail_numbers))
+            for attr in ('_mean', '_mad', '_count'):
+                state = getattr(self, attr)
+                grown = np.zeros((new_capacity, state.shape[1]), dtype=state.dtype)
+                grown[:capacity] = state
+                setattr(self, attr, grown)
+        return rows
+
+    def readings_matrix(self, readings):
+        """Convert reading dicts to an (n_readings, n_sensors) matrix (NaN where absent).
+
+        Keys are sensor names or their aliases; other keys are ignored.
+        """
+        values = np.full((len(readings), len(self.sensors)), np.nan)
+        for i, reading in enumerate(readings):
+            for name, value in (reading or {}).items():
+                j = self._sensor_index.get(name)
+                if j is not None and isinstance(value, (int, float)) and not isinstance(value, bool):
+                    values[i, j] = value
+        return values
+
+    def _update_round(self, rows, values):
+        """Score and update one set of readings whose aircraft are all distinct."""
+        mean, mad, count = self._mean[rows], self._mad[rows], self._count[rows]
+        present = np.isfinite(values)
+        first = present & (count == 0)
+        residual = np.where(present, values - mean, 0.0)
+        scale = MAD_TO_STD * mad
+        with np.errstate(invalid='ignore', divide='ignore'):
+            score = np.where(scale > 0, np.abs(residual) / scale, np.where(residual != 0, np.inf, 0.0))
+        ready = present & (count >= self.warmup)
+        alerts = ready & (score > self.threshold)
+        # Huberised update: clip residuals at the threshold once warmed up
+        limit = np.where(ready & (scale > 0), self.threshold * scale, np.inf)
+        clipped = np.clip(residual, -limit, limit)
+        new_mean = np.where(first, values, mean + self.alpha * clipped)
+        new_mad = np.where(first, 0.0, mad + self.alpha * (np.abs(clipped) - mad))
+        self._mean[rows] = np.where(present, new_mean, mean)
+        self._mad[rows] = np.where(present, new_mad, mad)
+        self._count[rows] = count + present
+        return score, alerts, mean
+
+    def update(self, tail_numbers, readings, timestamps=None):
+        """Evaluate a batch of readings and return (and publish) its alerts.
+
+        Parameters
+        ----------
+        tail_numbers : sequence of str
+            Aircraft of each reading
+        readings : sequence of dict or ndarray of shape (n, n_sensors)
+            Sensor readings, as dicts or as a matrix in ``sensors`` order
+        timestamps : sequence, optional
+            Reading timestamps echoed in the alerts (None entries default to
+            the current time)
+
+        Returns
+        -------
+        list of dict
+            One alert per anomalous (reading, sensor) in input order, with
+            the value, the expected value (EWMA before the reading) and the
+            robust z-score
+        """
+        values = readings if isinstance(readings, np.ndarray) else self.readings_matrix(readings)
+        values = np.asarray(values, dtype=np.float64)
+        n = len(tail_numbers)
+        if n == 0:
+            return []
+        scores = np.zeros(values.shape)
+        flags = np.zeros(values.shape, dtype=bool)
+        expected = np.zeros(values.shape)
+        with self._lock:
+            rows = self._rows(tail_numbers)
+            # Occurrence number of each reading within its aircraft, in arrival order
+            order = np.argsort(rows, kind='stable')
+            sorted_rows = rows[order]
+            starts = np.r_[0, np.flatnonzero(sorted_rows[1:] != sorted_rows[:-1]) + 1]
+            run_start = np.repeat(starts, np.diff(np.r_[starts, n]))
+            occurrence = np.empty(n, dtype=np.int64)
+            occurrence[order] = np.arange(n) - run_start
+            for k in range(int(occurrence.max()) + 1):
+                batch = np.flatnonzero(occurrence == k)
+                scores[batch], flags[batch], expected[batch] = self._update_round(rows[batch], values[batch])
+
+        if not flags.any():
+            return []
+        now = time.time()
+        alerts = []
+        for i, j in zip(*np.nonzero(flags)):
+            alerts.append({
+                'tail_number': tail_numbers[i],
+                'sensor': self.sensors[j],
+                'value': float(values[i, j]),
+                'expected': float(expected[i, j]),
+                'score': float(scores[i, j]),
+                'timestamp': now if timestamps is None or timestamps[i] is None else timestamps[i]
+            })
+        self.broker.publish(alerts)
+        return alerts
+
+    def state(self, tail_number):
+        """Current per-sensor mean, robust std and reading count of one aircraft."""
+        with self._lock:
+            row = self._aircraft_index.get(tail_number)
+            if row is None:
+                return None
+            return {
+                name: {'mean': float(self._mean[row, j]), 'std': float(MAD_TO_STD * self._mad[row, j]),
+                       'readings': int(self._count[row, j])}
+                for j, name in enumerate(self.sensors) if self._count[row, j]
+            }
+
+
+def sse_events(broker, tail_numbers=None, heartbeat=SSE_HEARTBEAT):
+    """Generate server-sent events for published alerts until the client disconnects.
+
+    ``tail_numbers`` restricts the stream to those aircraft; idle streams get
+    a keep-alive comment every ``heartbeat`` seconds.
+    """
+    subscriber = broker.subscribe()
+    try:
+        yield b': subscribed\n\n'
+        while True:
+            try:
+                alert = subscriber.get(timeout=heartbeat)
+            except queue.Empty:
+                yield b': keep-alive\n\n'
+                continue
+            if tail_numbers and alert['tail_number'] not in tail_numbers:
+                continue
+            yield b'event: anomaly\ndata: ' + encode_payload(alert)[0] + b'\n\n'
+    finally:
+        broker.unsubscribe(subscriber)
+
+
+# Process-wide detector fed by the readings ingestion endpoint
+anomaly_detector = StreamingAnomalyDetector()
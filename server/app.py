@@ -3,154 +3,419 @@ Flask API for Aircraft Predictive Maintenance System
 
 This module provides three endpoints:
 1. /predict-failure - Predict probability of part failure
-2. /predict-rul - Predict Remaining Useful Life
-3. /predict-fuel - Predict fuel consumption and anomalies
+2. /predict-rul - Predict Remaining Useful Life (and, under /trajectory, a
+   dated engine health forecast)
+3. /predict-fuel - Predict fuel consumption and anomalies (and, under
+   /sensitivity, a what-if grid over payload and weather)
+
+plus bulk scoring via /api/v1/batch/<model> (Arrow IPC streams) and
+/api/v1/stream/<model> (newline-delimited JSON, streamed back in chunks),
+and per-aircraft sensor ingestion via /api/v1/aircraft/readings, after which
+failure and RUL requests may name just a tail number (see the feature_store
+module). Ingested readings are also screened for anomalies, which clients
+receive as server-sent events from /api/v1/anomalies/subscribe (see the
+anomaly_detector module). The fleet risk view under /api/v1/fleet/risk is
+served from a periodically refreshed snapshot (see the fleet_risk module).
+
+Request bodies may be JSON or MessagePack (see the schemas module), and any
+request can be profiled on demand (see the profiling module).
 """
 
-from flask import Flask, request, jsonify
-from predictor import predictor
-from weather_api import get_weather
+from flask import Flask, Response, request, stream_with_context
+import numpy as np
+import pyarrow as pa
 import os
 import logging
 from dotenv import load_dotenv
-
-# Configure logging
-logging.basicConfig(level=logging.INFO, 
-                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-                    handlers=[
-                        logging.FileHandler("app.log"),
-                        logging.StreamHandler()
-                    ])
-logger = logging.getLogger(__name__)
+from logging_config import configure_logging, should_log_payload
 
 # Load environment variables
 load_dotenv()
 
+# Configure logging before the predictor is loaded so model loading is logged
+configure_logging()
+logger = logging.getLogger(__name__)
+
+from predictor import (predictor, RUL_TRAJECTORY_DAYS, DAILY_FLIGHT_HOURS, DAILY_FLIGHT_CYCLES,
+                       FUEL_SENSITIVITY_AXES)
+from weather_api import get_weather, get_route_weather
+from profiling import init_profiling
+from arrow_batch import ARROW_STREAM_MIMETYPE, BATCH_MODELS, read_ipc_stream, score_table, write_ipc_stream
+from ndjson_stream import NDJSON_MIMETYPE, STREAM_CHUNK_SIZE, STREAM_MAX_CHUNK_SIZE, STREAM_SCHEMAS, stream_scores
+from schemas import (FAILURE_LOOKUP_REQUEST, RUL_LOOKUP_REQUEST, FUEL_REQUEST, READINGS_REQUEST,
+                     RequestDecodeError, UnsupportedMediaType, decode_body, parse_request, respond)
+from feature_store import FeatureStoreFullError, IncompleteRequestError, UnknownAircraftError, feature_store
+from anomaly_detector import SSE_MIMETYPE, anomaly_detector, sse_events
+from fleet_risk import FLEET_RISK_TOP_K, FleetRiskService, FleetRiskUnavailableError
+
+MAX_TRAJECTORY_POINTS = 1000
+MAX_SENSITIVITY_POINTS = 100000
+
 app = Flask(__name__)
+init_profiling(app)
+
+# Background re-scoring of the whole fleet for the dashboard
+fleet_risk = FleetRiskService(predictor)
+fleet_risk.start()
 
 @app.route('/health', methods=['GET'])
 def health_check():
     """Simple health check endpoint."""
-    return jsonify({"status": "healthy"}), 200
+    return respond({"status": "healthy"}, 200)
+
+@app.route('/api/v1/models/reload', methods=['POST'])
+def reload_models():
+    """Endpoint to reload the models (e.g. after a new version is published)."""
+    try:
+        models_dir = predictor.reload()
+        return respond({"models_dir": str(models_dir), "fuel_baseline": predictor.fuel_baseline.stats()}, 200)
+    except Exception as e:
+        logger.error("Error in reload_models endpoint: %s", e, exc_info=True)
+        return respond({
+            "error": str(e),
+            "type": str(type(e).__name__)
+        }, 500)
 
 @app.route('/api/v1/predict/failure', methods=['POST'])
 def predict_failure():
     """Endpoint to predict probability of part failure."""
     try:
-        logger.info("Received request to /api/v1/predict/failure")
-        
-        # Get input data
-        data = request.json
-        logger.info(f"Request data: {data}")
+        logger.debug("Received request to /api/v1/predict/failure")
         
-        # Validate required fields
-        required_fields = ['aircraft_model', 'flight_cycles', 'airport_code']
-        for field in required_fields:
-            if field not in data:
-                logger.error(f"Missing required field: {field}")
-                return jsonify({
-                    "error": f"Missing required field: {field}"
-                }), 400
+        # Decode and validate input data
+        data, error_response = parse_request(FAILURE_LOOKUP_REQUEST)
+        if error_response is not None:
+            logger.error("Invalid request to /api/v1/predict/failure")
+            return error_response
+        log_payload = should_log_payload()
+        if log_payload:
+            logger.info("Request data", extra={'fields': {'endpoint': 'failure', 'request': data}})
         
         # Get weather data if airport code is provided
         weather_data = None
         if data.get('airport_code'):
-            logger.info(f"Getting weather data for airport: {data['airport_code']}")
+            logger.debug("Getting weather data for airport: %s", data['airport_code'])
             try:
                 # Get flat dictionary of weather features
                 weather_data = get_weather(data['airport_code'])
-                logger.info(f"Weather data received: {weather_data}")
+                logger.debug("Weather data received: %s", weather_data)
             except Exception as e:
-                logger.warning(f"Error fetching weather data: {str(e)}. Continuing without weather data.")
+                logger.warning("Error fetching weather data: %s. Continuing without weather data.", e)
             
         # Make prediction
-        logger.info("Calling predictor.predict_failure...")
+        logger.debug("Calling predictor.predict_failure...")
         try:
             prediction = predictor.predict_failure(data, weather_data)
-            logger.info(f"Prediction successful: {prediction}")
-            return jsonify(prediction), 200
+            if log_payload:
+                logger.info("Prediction successful", extra={'fields': {'endpoint': 'failure', 'response': prediction}})
+            return respond(prediction, 200)
+        except IncompleteRequestError as e:
+            return respond({"error": str(e)}, 400)
         except Exception as e:
-            logger.error(f"Error in predictor.predict_failure: {str(e)}", exc_info=True)
+            logger.error("Error in predictor.predict_failure: %s", e, exc_info=True)
             raise
         
     except Exception as e:
-        logger.error(f"Error in predict_failure endpoint: {str(e)}", exc_info=True)
-        return jsonify({
+        logger.error("Error in predict_failure endpoint: %s", e, exc_info=True)
+        return respond({
             "error": str(e),
             "type": str(type(e).__name__)
-        }), 500
+        }, 500)
 
 @app.route('/api/v1/predict/rul', methods=['POST'])
 def predict_rul():
     """Endpoint to predict Remaining Useful Life."""
     try:
-        # Get input data
-        data = request.json
-        
-        # Validate required fields
-        required_fields = ['aircraft_model', 'flight_hours']
-        for field in required_fields:
-            if field not in data:
-                return jsonify({
-                    "error": f"Missing required field: {field}"
-                }), 400
+        # Decode and validate input data
+        data, error_response = parse_request(RUL_LOOKUP_REQUEST)
+        if error_response is not None:
+            return error_response
         
         # Make prediction
         prediction = predictor.predict_rul(data)
-        return jsonify(prediction), 200
+        return respond(prediction, 200)
         
+    except IncompleteRequestError as e:
+        return respond({"error": str(e)}, 400)
     except Exception as e:
-        return jsonify({
+        return respond({
             "error": str(e),
             "type": str(type(e).__name__)
-        }), 500
+        }, 500)
+
+@app.route('/api/v1/predict/rul/trajectory', methods=['POST'])
+def predict_rul_trajectory():
+    """Endpoint to forecast dated engine health (RulForecastVM[]) with one model call.
+
+    Besides the /api/v1/predict/rul fields, the body may set horizon_days,
+    step_days, hours_per_day, cycles_per_day and start_date (YYYY-MM-DD).
+    """
+    try:
+        data, error_response = parse_request(RUL_LOOKUP_REQUEST)
+        if error_response is not None:
+            return error_response
+        
+        try:
+            options = {
+                'horizon_days': int(data.get('horizon_days', RUL_TRAJECTORY_DAYS)),
+                'step_days': int(data.get('step_days', 1)),
+                'hours_per_day': float(data.get('hours_per_day', DAILY_FLIGHT_HOURS)),
+                'cycles_per_day': float(data.get('cycles_per_day', DAILY_FLIGHT_CYCLES)),
+                'start_date': data.get('start_date')
+            }
+        except (TypeError, ValueError) as e:
+            return respond({"error": f"Invalid trajectory option: {e}"}, 400)
+        if options['horizon_days'] < 0 or options['step_days'] < 1:
+            return respond({"error": "horizon_days must be >= 0 and step_days >= 1"}, 400)
+        if options['horizon_days'] // options['step_days'] + 1 > MAX_TRAJECTORY_POINTS:
+            return respond({"error": f"Trajectory is limited to {MAX_TRAJECTORY_POINTS} points"}, 400)
+        
+        try:
+            trajectory = predictor.predict_rul_trajectory(data, **options)
+        except IncompleteRequestError as e:
+            return respond({"error": str(e)}, 400)
+        except ValueError as e:  # Malformed start_date
+            return respond({"error": str(e)}, 400)
+        return respond(trajectory, 200)
+        
+    except Exception as e:
+        logger.error("Error in predict_rul_trajectory endpoint: %s", e, exc_info=True)
+        return respond({
+            "error": str(e),
+            "type": str(type(e).__name__)
+        }, 500)
 
 @app.route('/api/v1/predict/fuel', methods=['POST'])
 def predict_fuel():
     """Endpoint to predict fuel consumption."""
     try:
-        # Get input data
-        data = request.json
-        
-        # Validate required fields
-        required_fields = ['aircraft_model', 'origin', 'destination']
-        for field in required_fields:
-            if field not in data:
-                return jsonify({
-                    "error": f"Missing required field: {field}"
-                }), 400
-        
-        # Get weather data for both origin and destination
-        origin_weather = get_weather(data['origin'])
-        dest_weather = get_weather(data['destination'])
-        
-        # Average the weather conditions (simple approach)
-        if origin_weather and dest_weather:
-            # Create a combined weather data dictionary with averaged values
-            weather_data = {}
-            
-            # Combine numerical values (average them)
-            for key in ['temperature', 'humidity', 'pressure', 'wind_speed', 'wind_direction']:
-                if key in origin_weather and key in dest_weather:
-                    weather_data[key] = (origin_weather[key] + dest_weather[key]) / 2
-            
-            # For categorical features, take the origin values
-            for key in ['weather_code', 'weather_main', 'weather_description', 
-                       'is_clear', 'is_cloudy', 'is_rainy', 'is_snowy', 'is_stormy']:
-                if key in origin_weather:
-                    weather_data[key] = origin_weather[key]
-        else:
-            weather_data = None
+        # Decode and validate input data
+        data, error_response = parse_request(FUEL_REQUEST)
+        if error_response is not None:
+            return error_response
+        
+        # Get averaged weather data for origin and destination
+        weather_data = get_route_weather(data['origin'], data['destination'])
         
         # Make prediction
         prediction = predictor.predict_fuel(data, weather_data)
-        return jsonify(prediction), 200
+        return respond(prediction, 200)
+        
+    except Exception as e:
+        return respond({
+            "error": str(e),
+            "type": str(type(e).__name__)
+        }, 500)
+
+def _sweep_values(spec):
+    """Values of a sensitivity axis: a list, or {"start", "stop", "num"} for an even range."""
+    if isinstance(spec, dict):
+        return np.linspace(float(spec['start']), float(spec['stop']), int(spec.get('num', 10)))
+    if isinstance(spec, list) and spec:
+        return np.asarray(spec, dtype=np.float64)
+    raise ValueError("expected a non-empty list or {start, stop, num}")
+
+@app.route('/api/v1/predict/fuel/sensitivity', methods=['POST'])
+def predict_fuel_sensitivity():
+    """Endpoint to sweep fuel predictions over payload and weather what-ifs.
+
+    Besides the /api/v1/predict/fuel fields, the body may sweep any of
+    payload_weight, temperature, wind_speed and wind_direction under
+    "sweep", each as a list or {"start", "stop", "num"}; other axes keep the
+    request's value (current route weather for weather axes).
+    """
+    try:
+        data, error_response = parse_request(FUEL_REQUEST)
+        if error_response is not None:
+            return error_response
+        
+        sweep = data.get('sweep') or {}
+        if not isinstance(sweep, dict):
+            return respond({"error": "sweep must be an object"}, 400)
+        unknown = [name for name in sweep if name not in FUEL_SENSITIVITY_AXES]
+        if unknown:
+            return respond({"error": f"Unknown sweep axes: {', '.join(unknown)}"}, 400)
+        try:
+            axes = {name: _sweep_values(spec) for name, spec in sweep.items()}
+        except (KeyError, TypeError, ValueError) as e:
+            return respond({"error": f"Invalid sweep: {e}"}, 400)
+        n_points = int(np.prod([len(values) for values in axes.values()]))
+        if n_points > MAX_SENSITIVITY_POINTS:
+            return respond({"error": f"Sweep is limited to {MAX_SENSITIVITY_POINTS} points"}, 400)
+        
+        weather_data = get_route_weather(data['origin'], data['destination'])
+        return respond(predictor.predict_fuel_sensitivity(data, weather_data, axes), 200)
+        
+    except Exception as e:
+        logger.error("Error in predict_fuel_sensitivity endpoint: %s", e, exc_info=True)
+        return respond({
+            "error": str(e),
+            "type": str(type(e).__name__)
+        }, 500)
+
+@app.route('/api/v1/aircraft/readings', methods=['POST'])
+def ingest_readings():
+    """Endpoint to store sensor readings (and attributes) in the per-aircraft feature store.
+
+    The body is one record ({"tail_number", "cycle", "timestamp",
+    "sensor_readings", "aircraft_model", "flight_hours", "flight_cycles"})
+    or {"records": [...]} with many of them. The response lists the anomaly
+    alerts raised by the readings. Sensors outside the store's whitelist or
+    beyond its per-aircraft sensor limit are ignored; records for aircraft
+    beyond its capacity are rejected with 507 and nothing is stored.
+    """
+    try:
+        try:
+            data = decode_body(request.get_data(cache=False), request.mimetype)
+        except UnsupportedMediaType as e:
+            return respond({"error": str(e)}, 415)
+        except RequestDecodeError as e:
+            return respond({"error": str(e)}, 400)
+        records = data.get('records') if isinstance(data, dict) and 'records' in data else [data]
+        if not isinstance(records, list):
+            return respond({"error": "records must be a list"}, 400)
+        for i, record in enumerate(records):
+            error = READINGS_REQUEST.validate(record)
+            if error is not None:
+                return respond({"error": f"Record {i}: {error}"}, 400)
+        try:
+            feature_store.ingest_records(records)
+        except FeatureStoreFullError as e:
+            return respond({"error": str(e)}, 507)
+        # Screen the whole request for anomalies in one vectorized pass
+        alerts = anomaly_detector.update([record['tail_number'] for record in records],
+                                         [record.get('sensor_readings') for record in records],
+                                         [record.get('timestamp') for record in records])
+        return respond({"ingested": len(records), "aircraft": len(feature_store), "alerts": alerts}, 200)
         
     except Exception as e:
-        return jsonify({
+        logger.error("Error in ingest_readings endpoint: %s", e, exc_info=True)
+        return respond({
             "error": str(e),
             "type": str(type(e).__name__)
-        }), 500
+        }, 500)
+
+@app.route('/api/v1/aircraft/<tail_number>/features', methods=['GET'])
+def aircraft_features(tail_number):
+    """Endpoint to inspect the stored attributes and rolling features of an aircraft."""
+    try:
+        return respond(feature_store.describe(tail_number), 200)
+    except UnknownAircraftError:
+        return respond({"error": f"Unknown aircraft: {tail_number}"}, 404)
+
+@app.route('/api/v1/anomalies/subscribe', methods=['GET'])
+def subscribe_anomalies():
+    """Endpoint streaming anomaly alerts as server-sent events.
+
+    Query parameter: tail_number (comma-separated aircraft to follow, default all).
+    """
+    tail_numbers = {name for name in request.args.get('tail_number', '').split(',') if name}
+    events = sse_events(anomaly_detector.broker, tail_numbers)
+    return Response(stream_with_context(events), status=200, mimetype=SSE_MIMETYPE,
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route('/api/v1/anomalies/<tail_number>', methods=['GET'])
+def anomaly_state(tail_number):
+    """Endpoint returning the anomaly detector's per-sensor baseline for an aircraft."""
+    state = anomaly_detector.state(tail_number)
+    if state is None:
+        return respond({"error": f"Unknown aircraft: {tail_number}"}, 404)
+    return respond({"tail_number": tail_number, "sensors": state}, 200)
+
+@app.route('/api/v1/fleet/risk', methods=['GET'])
+def fleet_risk_view():
+    """Endpoint for the riskiest aircraft from the fleet risk snapshot.
+
+    Query parameters: top_k (default 10), or any of min_probability,
+    max_probability, min_rul, max_rul (inclusive ranges) with an optional
+    limit. top_k and limit must be non-negative integers.
+    """
+    counts = {name: request.args.get(name, type=int) for name in ('top_k', 'limit') if name in request.args}
+    invalid = [name for name, value in counts.items() if value is None or value < 0]
+    if invalid:
+        return respond({"error": f"{invalid[0]} must be a non-negative integer"}, 400)
+    try:
+        snapshot = fleet_risk.current()
+    except FleetRiskUnavailableError as e:
+        return respond({"error": str(e)}, 503)
+    ranges = {name: request.args.get(name, type=float)
+              for name in ('min_probability', 'max_probability', 'min_rul', 'max_rul')}
+    if any(value is not None for value in ranges.values()):
+        aircraft = snapshot.query(limit=counts.get('limit'), **ranges)
+    else:
+        aircraft = snapshot.top_k(counts.get('top_k', FLEET_RISK_TOP_K))
+    return respond(dict(snapshot.metadata(), aircraft=aircraft), 200)
+
+@app.route('/api/v1/fleet/risk/<tail_number>', methods=['GET'])
+def fleet_risk_aircraft(tail_number):
+    """Endpoint for one aircraft's entry in the fleet risk snapshot."""
+    try:
+        snapshot = fleet_risk.current()
+    except FleetRiskUnavailableError as e:
+        return respond({"error": str(e)}, 503)
+    entry = snapshot.lookup(tail_number)
+    if entry is None:
+        return respond(dict(snapshot.metadata(), error=f"Aircraft not in fleet snapshot: {tail_number}"), 404)
+    return respond(dict(snapshot.metadata(), aircraft=entry), 200)
+
+@app.route('/api/v1/fleet/risk/refresh', methods=['POST'])
+def fleet_risk_refresh():
+    """Endpoint to re-score the fleet immediately."""
+    try:
+        return respond(fleet_risk.refresh().metadata(), 200)
+    except Exception as e:
+        logger.error("Error in fleet_risk_refresh endpoint: %s", e, exc_info=True)
+        return respond({
+            "error": str(e),
+            "type": str(type(e).__name__)
+        }, 500)
+
+@app.route('/api/v1/batch/<model_name>', methods=['POST'])
+def predict_batch(model_name):
+    """Endpoint to score an Arrow IPC stream of fleet rows with one model.
+
+    Query parameters: top_k (SHAP contributions per row, default 3, 0 to skip)
+    and passthrough (comma-separated input columns to echo, e.g. tail_number).
+    """
+    try:
+        if model_name not in BATCH_MODELS:
+            return respond({"error": f"Unknown model: {model_name}"}, 404)
+        if request.mimetype != ARROW_STREAM_MIMETYPE:
+            return respond({"error": f"Content-Type must be {ARROW_STREAM_MIMETYPE}"}, 415)
+        
+        top_k = request.args.get('top_k', 3, type=int)
+        passthrough = [name for name in request.args.get('passthrough', '').split(',') if name]
+        try:
+            table = read_ipc_stream(request.get_data(cache=False))
+        except pa.ArrowInvalid as e:
+            return respond({"error": f"Invalid Arrow IPC stream: {e}"}, 400)
+        
+        try:
+            result = score_table(predictor, model_name, table, top_k=top_k, passthrough=passthrough)
+        except ValueError as e:
+            return respond({"error": str(e)}, 400)
+        return Response(write_ipc_stream(result), status=200, mimetype=ARROW_STREAM_MIMETYPE)
+        
+    except Exception as e:
+        logger.error("Error in predict_batch endpoint: %s", e, exc_info=True)
+        return respond({
+            "error": str(e),
+            "type": str(type(e).__name__)
+        }, 500)
+
+@app.route('/api/v1/stream/<model_name>', methods=['POST'])
+def predict_stream(model_name):
+    """Endpoint to score newline-delimited JSON records with chunked streaming output.
+
+    Query parameters: chunk_size (records scored per model call, at most
+    STREAM_MAX_CHUNK_SIZE) and top_k (SHAP contributions per record, default 0).
+    """
+    if model_name not in STREAM_SCHEMAS:
+        return respond({"error": f"Unknown model: {model_name}"}, 404)
+    chunk_size = min(max(1, request.args.get('chunk_size', STREAM_CHUNK_SIZE, type=int)), STREAM_MAX_CHUNK_SIZE)
+    top_k = request.args.get('top_k', 0, type=int)
+    generator = stream_scores(predictor, model_name, request.stream, chunk_size=chunk_size, top_k=top_k)
+    return Response(stream_with_context(generator), status=200, mimetype=NDJSON_MIMETYPE)
 
 if __name__ == '__main__':
     # Use port 5200 as default to avoid conflicts with AirPlay on macOS (port 5000)
@@ -0,0 +1,137 @@
+"""
+Arrow IPC Batch Scoring Module for Aircraft Predictive Maintenance System
+
+This module scores whole fleet tables sent as Apache Arrow IPC streams and
+returns the predictions as an Arrow IPC stream, with no per-row JSON dicts
+on either side. Feature columns are read straight from the Arrow buffers
+(zero-copy for null-free float64 columns) and written once into the model
+input matrix in the order the model was trained with.
+
+Output columns per model:
+1. failure - failure_probability
+2. rul     - rul_cycles
+3. fuel    - predicted_fuel, baseline_fuel, fuel_difference, high_fuel_flag
+
+plus, when top_k > 0, explanation_<i>_feature / explanation_<i>_value
+columns holding the top-k SHAP contributions of each row. Model features
+the input table lacks are scored as missing and listed, comma-separated,
+under the ``missing_features`` key of the output schema metadata.
+"""
+
+import numpy as np
+import pyarrow as pa
+
+from predictor import top_k_contributions
+
+ARROW_STREAM_MIMETYPE = 'application/vnd.apache.arrow.stream'
+BATCH_MODELS = ('failure', 'rul', 'fuel')
+MISSING_FEATURES_KEY = b'missing_features'
+
+
+def read_ipc_stream(body):
+    """Read an Arrow IPC stream from raw bytes into a Table."""
+    with pa.ipc.open_stream(pa.py_buffer(body)) as reader:
+        return reader.read_all()
+
+
+def write_ipc_stream(table):
+    """Serialize a Table as an Arrow IPC stream."""
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def column_to_numpy(column):
+    """Return a float64 view of an Arrow column, copying only when required.
+
+    Null-free float64 columns with a single chunk are returned without a
+    copy; other numeric columns are cast, with nulls becoming NaN.
+    """
+    if column.type != pa.float64():
+        column = column.cast(pa.float64())
+    if column.num_chunks == 1 and column.null_count == 0:
+        return column.chunk(0).to_numpy(zero_copy_only=True)
+    return column.to_numpy()
+
+
+def table_to_matrix(table, pipeline):
+    """Build the model input matrix from the table's feature columns.
+
+    Numeric columns are read without copying where possible and categorical
+    columns are encoded by the model's fitted ``pipeline``. Columns missing
+    from the table are filled with NaN, which LightGBM treats as missing
+    values, matching the single-request path.
+    """
+    columns = {}
+    available = set(table.column_names)
+    for name in pipeline.feature_names:
+        if name in available:
+            column = table.column(name)
+            if name in pipeline.label_encoders:
+                columns[name] = column.to_numpy(zero_copy_only=False)
+            else:
+                columns[name] = column_to_numpy(column)
+    return pipeline.transform_columns(columns, table.num_rows)
+
+
+def explanation_columns(shap_values, feature_names, top_k):
+    """Return top-k explanation columns as a dict of Arrow arrays."""
+    names, values = top_k_contributions(shap_values, feature_names, top_k)
+    columns = {}
+    for i in range(names.shape[1]):
+        columns[f'explanation_{i + 1}_feature'] = pa.array(names[:, i], type=pa.string())
+        columns[f'explanation_{i + 1}_value'] = pa.array(values[:, i], type=pa.float64())
+    return columns
+
+
+def score_table(predictor, model_name, table, top_k=3, passthrough=()):
+    """Score every row of ``table`` with one of the predictor's models.
+
+    Parameters
+    ----------
+    predictor : PredictiveMaintenancePredictor
+        Loaded predictor
+    model_name : str
+        One of 'failure', 'rul' or 'fuel'
+    table : pyarrow.Table
+        Input rows with one column per model feature
+    top_k : int, default=3
+        Number of SHAP contributions to return per row; 0 skips SHAP entirely
+    passthrough : sequence of str, default=()
+        Input columns copied unchanged to the output (e.g. tail numbers)
+
+    Returns
+    -------
+    pyarrow.Table
+        One output row per input row; the schema metadata lists the model
+        features absent from ``table`` under MISSING_FEATURES_KEY
+    """
+    if model_name not in BATCH_MODELS:
+        raise ValueError(f"Unknown model '{model_name}'. Expected one of {', '.join(BATCH_MODELS)}")
+    missing = [name for name in passthrough if name not in table.column_names]
+    if missing:
+        raise ValueError(f"Passthrough columns not found: {', '.join(missing)}")
+
+    explain = top_k > 0
+    columns = {name: table.column(name) for name in passthrough}
+    pipeline = getattr(predictor, f'{model_name}_pipeline')
+    if model_name == 'failure':
+        feature_names = predictor.failure_feature_names
+        probabilities, shap_values = predictor.predict_failure_batch(table_to_matrix(table, pipeline), explain)
+        columns['failure_probability'] = pa.array(probabilities, type=pa.float64())
+    elif model_name == 'rul':
+        feature_names = predictor.rul_feature_names
+        rul, shap_values = predictor.predict_rul_batch(table_to_matrix(table, pipeline), explain)
+        columns['rul_cycles'] = pa.array(rul.astype(np.int64))
+    else:
+        feature_names = predictor.fuel_feature_names
+        result = predictor.predict_fuel_batch(table_to_matrix(table, pipeline), explain)
+        shap_values = result.pop('shap_values')
+        for name, values in result.items():
+            columns[name] = pa.array(values)
+
+    if explain:
+        columns.update(explanation_columns(shap_values, feature_names, top_k))
+    missing = pipeline.missing_columns(table.column_names)
+    return pa.table(columns, metadata={MISSING_FEATURES_KEY: ','.join(missing).encode()})
@@ -0,0 +1,314 @@
+"""
+Microbenchmark Suite for Aircraft Predictive Maintenance System
+
+This module times the serving hot paths offline:
+1. PredictiveMaintenancePredictor.predict_failure/predict_rul/predict_fuel,
+   with and without SHAP explanations
+2. prepare_*_features from data_preprocessing
+3. extract_weather_features, find_closest_forecast and the get_weather cache hit path
+4. custom_utils StandardScaler and LabelEncoder at several data sizes
+
+Small synthetic models are trained into a temporary MODELS_DIR and the
+OpenWeatherMap API is stubbed, so no datasets or network access are needed.
+Results are written as JSON and can be compared against a saved baseline.
+
+Usage:
+    python benchmark.py --output results.json
+    python benchmark.py --save-baseline benchmark_baseline.json
+    python benchmark.py --baseline benchmark_baseline.json --tolerance 0.2
+"""
+
+import argparse
+import datetime
+import json
+import logging
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import warnings
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+SENSOR_NAMES = ['oil_pressure', 'engine_vibration', 'cht', 'egt', 'oil_temperature']
+FAILURE_FEATURES = ['flight_cycles', 'temperature', 'humidity', 'wind_speed', 'wind_direction'] + SENSOR_NAMES
+RUL_FEATURES = ['flight_hours'] + SENSOR_NAMES
+FUEL_FEATURES = ['route_distance', 'payload_weight', 'temperature', 'wind_speed', 'wind_direction']
+DATA_SIZES = [1_000, 10_000, 100_000]
+
+
+def build_synthetic_models(models_dir, n_rows=2000, n_estimators=50, random_state=42):
+    """Train small LightGBM models with the artifact layout predictor.py expects."""
+    import lightgbm as lgb
+    import shap
+
+    rng = np.random.default_rng(random_state)
+    models_dir = Path(models_dir)
+    models_dir.mkdir(parents=True, exist_ok=True)
+    params = dict(n_estimators=n_estimators, learning_rate=0.1, num_leaves=31,
+                  random_state=random_state, verbose=-1)
+
+    X = pd.DataFrame(rng.normal(size=(n_rows, len(FAILURE_FEATURES))), columns=FAILURE_FEATURES)
+    y = (X['oil_pressure'] + rng.normal(scale=0.5, size=n_rows) > 1).astype(int)
+    model = lgb.LGBMClassifier(**params).fit(X, y)
+    joblib.dump(model, models_dir / 'failure_model.joblib')
+    joblib.dump(FAILURE_FEATURES, models_dir / 'failure_feature_names.joblib')
+    joblib.dump(shap.TreeExplainer(model), models_dir / 'failure_explainer.joblib')
+
+    X = pd.DataFrame(rng.normal(size=(n_rows, len(RUL_FEATURES))), columns=RUL_FEATURES)
+    y = 200 - 50 * X['flight_hours'] + rng.normal(scale=5, size=n_rows)
+    model = lgb.LGBMRegressor(**params).fit(X, y)
+    joblib.dump(model, models_dir / 'rul_model.joblib')
+    joblib.dump(RUL_FEATURES, models_dir / 'rul_feature_names.joblib')
+    joblib.dump(shap.TreeExplainer(model), models_dir / 'rul_explainer.joblib')
+
+    X = pd.DataFrame(rng.normal(size=(n_rows, len(FUEL_FEATURES))), columns=FUEL_FEATURES)
+    y = 5000 + 1000 * X['route_distance'] + 200 * X['payload_weight'] + rng.normal(scale=50, size=n_rows)
+    model = lgb.LGBMRegressor(**params).fit(X, y)
+    joblib.dump(model, models_dir / 'fuel_model.joblib')
+    joblib.dump(FUEL_FEATURES, models_dir / 'fuel_feature_names.joblib')
+    joblib.dump(shap.TreeExplainer(model), models_dir / 'fuel_explainer.joblib')
+    joblib.dump(250.0, models_dir / 'fuel_threshold.joblib')
+
+
+def current_weather_response():
+    """Canned OpenWeatherMap /weather response."""
+    return {
+        "coord": {"lon": -73.7781, "lat": 40.6413},
+        "weather": [{"id": 803, "main": "Clouds", "description": "broken clouds", "icon": "04d"}],
+        "main": {"temp": 12.3, "feels_like": 11.1, "pressure": 1017, "humidity": 71},
+        "wind": {"speed": 6.2, "deg": 250},
+        "dt": int(time.time()),
+        "name": "JFK"
+    }
+
+
+def forecast_weather_response(n_entries=40):
+    """Canned OpenWeatherMap /forecast response with 3-hourly entries."""
+    start = int(time.time())
+    return {
+        "cnt": n_entries,
+        "list": [
+            {
+                "dt": start + i * 3 * 3600,
+                "main": {"temp": 10 + i % 7, "pressure": 1010 + i % 5, "humidity": 60 + i % 20},
+                "weather": [{"id": 500 + i % 3, "main": "Rain", "description": "light rain"}],
+                "wind": {"speed": 3.0 + i % 4, "deg": (i * 37) % 360}
+            }
+            for i in range(n_entries)
+        ]
+    }
+
+
+class _StubResponse:
+    status_code = 200
+    text = ''
+
+    def __init__(self, payload):
+        self._payload = payload
+
+    def json(self):
+        return self._payload
+
+
+def stub_weather_api(weather_api):
+    """Replace the HTTP client used by weather_api with canned responses."""
+    current, forecast = current_weather_response(), forecast_weather_response()
+
+    def fake_get(url, params=None, **kwargs):
+        return _StubResponse(forecast if url.endswith('/forecast') else current)
+
+    weather_api.requests.get = fake_get
+
+
+def time_case(func, repeat=5, min_time=0.05):
+    """Time func, returning per-call statistics in microseconds."""
+    # Calibrate the loop count so that each repeat runs for at least min_time
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            func()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time or loops >= 1_000_000:
+            break
+        loops *= 2 if elapsed == 0 else max(2, min(10, int(min_time / elapsed) + 1))
+
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(loops):
+            func()
+        timings.append((time.perf_counter() - start) / loops * 1e6)
+    return {
+        "median_us": statistics.median(timings),
+        "min_us": min(timings),
+        "max_us": max(timings),
+        "loops": loops,
+        "repeat": repeat
+    }
+
+
+def build_cases(predictor, weather_api):
+    """Return an ordered mapping of benchmark name -> zero-argument callable."""
+    from data_preprocessing import prepare_failure_features, prepare_rul_features, prepare_fuel_features
+    from custom_utils import StandardScaler, LabelEncoder
+
+    sensors = {name: 1.0 + i for i, name in enumerate(SENSOR_NAMES)}
+    weather = weather_api.get_default_weather()
+    failure_request = {'aircraft_model': 'A320', 'flight_cycles': 1200, 'airport_code': 'JFK',
+                       'recent_sensor_data': sensors}
+    rul_request = {'aircraft_model': 'A320', 'flight_hours': 5400, 'sensor_readings': sensors}
+    fuel_request = {'aircraft_model': 'A320', 'origin': 'JFK', 'destination': 'LAX', 'payload_weight': 15000}
+    forecast = forecast_weather_response()
+    current = current_weather_response()
+    target_time = datetime.datetime.now() + datetime.timedelta(hours=50)
+
+    cases = {
+        'predictor.predict_failure[shap]': lambda: predictor.predict_failure(failure_request, weather),
+        'predictor.predict_failure[no_shap]': lambda: predictor.predict_failure(failure_request, weather, explain=False),
+        'predictor.predict_rul[shap]': lambda: predictor.predict_rul(rul_request),
+        'predictor.predict_rul[no_shap]': lambda: predictor.predict_rul(rul_request, explain=False),
+        'predictor.predict_fuel[shap]': lambda: predictor.predict_fuel(fuel_request, weather),
+        'predictor.predict_fuel[no_shap]': lambda: predictor.predict_fuel(fuel_request, weather, explain=False),
+        'prepare_failure_features': lambda: prepare_failure_features(failure_request, weather),
+        'prepare_rul_features': lambda: prepare_rul_features(rul_request),
+        'prepare_fuel_features': lambda: prepare_fuel_features(fuel_request, weather),
+        'weather.extract_weather_features[current]': lambda: weather_api.extract_weather_features(current, 'current'),
+        'weather.extract_weather_features[forecast]': lambda: weather_api.extract_weather_features(forecast['list'][0], 'forecast'),
+        'weather.find_closest_forecast[40]': lambda: weather_api.find_closest_forecast(forecast, target_time),
+    }
+
+    # Prime the cache so the timed calls only exercise the hit path
+    weather_api._weather_cache.clear()
+    weather_api.get_weather('JFK')
+    cases['weather.get_weather[cache_hit]'] = lambda: weather_api.get_weather('JFK')
+
+    rng = np.random.default_rng(0)
+    for size in DATA_SIZES:
+        X = rng.normal(size=(size, 10))
+        X_df = pd.DataFrame(X, columns=[f'f{i}' for i in range(10)])
+        scaler = StandardScaler().fit(X)
+        labels = rng.choice(np.array(['A320', 'B737', 'B787', 'A350', 'E190']), size=size)
+        encoder = LabelEncoder().fit(labels)
+        cases[f'StandardScaler.fit[{size}]'] = lambda X=X: StandardScaler().fit(X)
+        cases[f'StandardScaler.transform[ndarray,{size}]'] = lambda s=scaler, X=X: s.transform(X)
+        cases[f'StandardScaler.transform[DataFrame,{size}]'] = lambda s=scaler, X=X_df: s.transform(X)
+        cases[f'LabelEncoder.fit[{size}]'] = lambda y=labels: LabelEncoder().fit(y)
+        cases[f'LabelEncoder.transform[{size}]'] = lambda e=encoder, y=labels: e.transform(y)
+    return cases
+
+
+def run_benchmarks(repeat=5, min_time=0.05, name_filter=None):
+    """Build synthetic models, stub the weather API and time every case."""
+    models_dir = tempfile.mkdtemp(prefix='aircare-bench-models-')
+    try:
+        build_synthetic_models(models_dir)
+        os.environ['MODELS_DIR'] = models_dir
+        # Stub responses must not be kept as real observations in the weather store
+        os.environ['WEATHER_STORE_DIR'] = ''
+
+        # Imported here so the predictor singleton loads from the temporary MODELS_DIR
+        import weather_api
+        import predictor as predictor_module
+
+        stub_weather_api(weather_api)
+        cases = build_cases(predictor_module.predictor, weather_api)
+        results = {}
+        for name, func in cases.items():
+            if name_filter and name_filter not in name:
+                continue
+            try:
+                results[name] = time_case(func, repeat=repeat, min_time=min_time)
+                print(f"{name:<50} {results[name]['median_us']:>14.1f} us")
+            except Exception as e:
+                results[name] = {"error": f"{type(e).__name__}: {e}"}
+                print(f"{name:<50} {'ERROR':>14}  {results[name]['error']}")
+    finally:
+        shutil.rmtree(models_dir, ignore_errors=True)
+
+    return {
+        "meta": {
+            "timestamp": datetime.datetime.now().isoformat(timespec='seconds'),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "cpu_count": os.cpu_count()
+        },
+        "results": results
+    }
+
+
+def compare_to_baseline(results, baseline, tolerance=0.2):
+    """Compare median timings against a baseline.
+
+    Returns a list of comparison rows; rows whose median grew by more than
+    ``tolerance`` (as a fraction) are flagged as regressions.
+    """
+    rows = []
+    for name, current in results['results'].items():
+        previous = baseline.get('results', {}).get(name)
+        if not previous or 'median_us' not in previous or 'median_us' not in current:
+            continue
+        ratio = current['median_us'] / previous['median_us'] if previous['median_us'] else float('inf')
+        rows.append({
+            "name": name,
+            "baseline_us": previous['median_us'],
+            "current_us": current['median_us'],
+            "ratio": ratio,
+            "regression": ratio > 1 + tolerance
+        })
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the AirCare hot-path microbenchmarks.")
+    parser.add_argument('--output', help="Write results as JSON to this path")
+    parser.add_argument('--baseline', help="Compare against a previously saved results file")
+    parser.add_argument('--save-baseline', help="Save results to this path for future comparisons")
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help="Allowed slowdown before a case counts as a regression (default 0.2 = 20%%)")
+    parser.add_argument('--repeat', type=int, default=5, help="Timed repeats per case")
+    parser.add_argument('--min-time', type=float, default=0.05, help="Minimum seconds per repeat")
+    parser.add_argument('--filter', help="Only run cases whose name contains this string")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING)
+    logging.getLogger().setLevel(logging.ERROR)
+    # SHAP warns about its LightGBM output format on every call
+    warnings.filterwarnings('ignore', category=UserWarning)
+
+    results = run_benchmarks(repeat=args.repeat, min_time=args.min_time, name_filter=args.filter)
+
+    exit_code = 0
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        comparison = compare_to_baseline(results, baseline, args.tolerance)
+        results['comparison'] = {"baseline": args.baseline, "tolerance": args.tolerance, "cases": comparison}
+        print("\nComparison against baseline:")
+        for row in comparison:
+            flag = "REGRESSION" if row['regression'] else ""
+            print(f"{row['name']:<50} {row['ratio']:>7.2f}x {flag}")
+        if any(row['regression'] for row in comparison):
+            exit_code = 1
+
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, 'w') as f:
+                json.dump(results, f, indent=2)
+            print(f"Results written to {path}")
+    return exit_code
+
+
+if __name__ == '__main__':
+    sys.exit(main())
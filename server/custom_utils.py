@@ -5,7 +5,130 @@ Custom utilities for model training when standard libraries are not available.
 import numpy as np
 import pandas as pd
 
-def train_test_split(X, y, test_size=0.2, random_state=None):
+def _test_count(n, test_size):
+    """Number of test items for a split of n items, keeping both sides non-empty when n > 1."""
+    count = int(n * test_size)
+    if n > 1:
+        count = min(max(count, 1), n - 1)
+    return count
+
+def train_test_split_indices(n_samples, test_size=0.2, random_state=None, groups=None, stratify=None):
+    """
+    Split row positions into random train and test index arrays.
+    
+    Uses a local ``numpy.random.Generator``, so the global NumPy random
+    state is left untouched.
+    
+    Parameters
+    ----------
+    n_samples : int
+        Number of rows
+    test_size : float, default=0.2
+        Proportion of rows (or of groups, when ``groups`` is given) in the test split
+    random_state : int or numpy.random.Generator, default=None
+        Seed or generator controlling the shuffle
+    groups : array-like of shape (n_samples,), default=None
+        Group label of each row (e.g. engine unit); all rows of a group land
+        on the same side of the split
+    stratify : array-like of shape (n_samples,), default=None
+        Class label of each row; each class is split in the same proportion.
+        Ignored when ``groups`` is given
+    
+    Returns
+    -------
+    train_idx, test_idx : ndarrays of int64
+        Sorted row positions of each split
+    """
+    rng = np.random.default_rng(random_state)
+    if groups is not None:
+        _, group_codes = np.unique(np.asarray(groups), return_inverse=True)
+        n_groups = group_codes.max() + 1 if len(group_codes) else 0
+        test_groups = np.zeros(n_groups, dtype=bool)
+        test_groups[rng.permutation(n_groups)[:_test_count(n_groups, test_size)]] = True
+        is_test = test_groups[group_codes]
+    elif stratify is not None:
+        _, class_codes = np.unique(np.asarray(stratify), return_inverse=True)
+        is_test = np.zeros(n_samples, dtype=bool)
+        # Shuffle once, then take the first test_size share of every class
+        order = rng.permutation(n_samples)
+        shuffled_codes = class_codes[order]
+        for code in range(class_codes.max() + 1 if n_samples else 0):
+            members = order[shuffled_codes == code]
+            is_test[members[:int(round(len(members) * test_size))]] = True
+    else:
+        is_test = np.zeros(n_samples, dtype=bool)
+        is_test[rng.permutation(n_samples)[:int(n_samples * test_size)]] = True
+    return np.flatnonzero(~is_test), np.flatnonzero(is_test)
+
+def _as_row_indexer(indices):
+    """Return a slice when the indices are one contiguous ascending run, else the indices."""
+    indices = np.asarray(indices)
+    if len(indices) and indices[-1] - indices[0] + 1 == len(indices) and np.all(np.diff(indices) == 1):
+        return slice(int(indices[0]), int(indices[-1]) + 1)
+    return indices
+
+class RowView:
+    """
+    Lazy row subset of an array or DataFrame.
+    
+    Holds only the parent object and the row positions; rows are gathered
+    when the view is materialized. Contiguous subsets (e.g. unshuffled
+    folds) materialize as zero-copy slices. The ``indices`` can also be
+    passed straight to ``lightgbm.Dataset.subset`` to train on a split of
+    an already binned dataset without copying features.
+    
+    Parameters
+    ----------
+    data : {ndarray, DataFrame, Series}
+        Parent data
+    indices : array-like of int
+        Row positions in ``data``
+    """
+    def __init__(self, data, indices):
+        self.data = data
+        self.indices = np.asarray(indices, dtype=np.int64)
+    
+    def __len__(self):
+        return len(self.indices)
+    
+    def _take(self, indices):
+        indexer = _as_row_indexer(indices)
+        if isinstance(self.data, (pd.DataFrame, pd.Series)):
+            return self.data.iloc[indexer]
+        return self.data[indexer]
+    
+    def materialize(self):
+        """
+        Gather the rows of the view.
+        
+        Returns
+        -------
+        subset : same type as ``data``
+            A slice (no copy) for contiguous rows, else a copy of the rows
+        """
+        return self._take(self.indices)
+    
+    def iter_batches(self, batch_size=65536):
+        """
+        Yield the rows in materialized chunks of at most ``batch_size`` rows.
+        
+        Parameters
+        ----------
+        batch_size : int, default=65536
+            Maximum rows per chunk
+        
+        Yields
+        ------
+        chunk : same type as ``data``
+        """
+        for start in range(0, len(self.indices), batch_size):
+            yield self._take(self.indices[start:start + batch_size])
+    
+    def __array__(self, dtype=None, copy=None):
+        rows = self.materialize()
+        return np.asarray(rows, dtype=dtype)
+
+def train_test_split(X, y, test_size=0.2, random_state=None, groups=None, stratify=None):
     """
     Split arrays or matrices into random train and test subsets.
     
@@ -19,52 +142,165 @@ def train_test_split(X, y, test_size=0.2, random_state=None):
         Proportion of the dataset to include in the test split
     random_state : int, default=None
         Controls the shuffling applied to the data before applying the split
+    groups : array-like, default=None
+        Group labels; see ``train_test_split_indices``
+    stratify : array-like, default=None
+        Class labels; see ``train_test_split_indices``
         
     Returns
     -------
     X_train, X_test, y_train, y_test : DataFrames or arrays
         The train and test splits of the input data
     """
-    if random_state is not None:
-        np.random.seed(random_state)
-    
     # Convert to pandas DataFrames if they're not already
     if not isinstance(X, pd.DataFrame):
         X = pd.DataFrame(X)
     if not isinstance(y, pd.DataFrame) and not isinstance(y, pd.Series):
         y = pd.Series(y)
     
-    # Get indices for all samples
-    indices = np.arange(X.shape[0])
+    train_indices, test_indices = train_test_split_indices(X.shape[0], test_size, random_state, groups, stratify)
+    return (X.iloc[train_indices], X.iloc[test_indices],
+            y.iloc[train_indices], y.iloc[test_indices])
+
+def split_views(data, train_idx, test_idx):
+    """
+    Wrap a train/test index split of ``data`` as lazy RowViews.
+    
+    Parameters
+    ----------
+    data : {ndarray, DataFrame, Series}
+        Data to split
+    train_idx, test_idx : array-like of int
+        Row positions of each split
+    
+    Returns
+    -------
+    train, test : RowView
+    """
+    return RowView(data, train_idx), RowView(data, test_idx)
+
+class KFold:
+    """
+    K-fold cross-validation index generator.
     
-    # Shuffle indices
-    np.random.shuffle(indices)
+    Yields index arrays only, so iterating the folds never duplicates the
+    feature matrix; wrap them with ``split_views`` or pass them to
+    ``lightgbm.Dataset.subset``.
     
-    # Calculate split point
-    test_count = int(X.shape[0] * test_size)
+    Parameters
+    ----------
+    n_splits : int, default=5
+        Number of folds
+    shuffle : bool, default=False
+        Shuffle rows (or groups) before assigning folds
+    random_state : int, default=None
+        Seed of the local generator used when ``shuffle`` is True
+    """
+    def __init__(self, n_splits=5, shuffle=False, random_state=None):
+        if n_splits < 2:
+            raise ValueError("n_splits must be at least 2")
+        self.n_splits = n_splits
+        self.shuffle = shuffle
+        self.random_state = random_state
     
-    # Split indices
-    test_indices = indices[:test_count]
-    train_indices = indices[test_count:]
+    def get_n_splits(self, X=None, y=None, groups=None):
+        return self.n_splits
     
-    # Split data
-    X_train = X.iloc[train_indices]
-    X_test = X.iloc[test_indices]
+    def _fold_ids(self, n_samples, y, groups, rng):
+        """Assign every row to a fold."""
+        order = rng.permutation(n_samples) if self.shuffle else np.arange(n_samples)
+        fold_ids = np.empty(n_samples, dtype=np.int64)
+        fold_ids[order] = np.arange(n_samples) * self.n_splits // max(n_samples, 1)
+        return fold_ids
     
-    # Handle Series vs DataFrame for y
-    if isinstance(y, pd.Series):
-        y_train = y.iloc[train_indices]
-        y_test = y.iloc[test_indices]
-    else:
-        y_train = y.iloc[train_indices]
-        y_test = y.iloc[test_indices]
+    def split(self, X, y=None, groups=None):
+        """
+        Generate train/test row positions for each fold.
+        
+        Parameters
+        ----------
+        X : array-like of shape (n_samples, n_features)
+            Data to split (only its length is used)
+        y : array-like of shape (n_samples,), default=None
+            Class labels (used by StratifiedKFold)
+        groups : array-like of shape (n_samples,), default=None
+            Group labels (used by GroupKFold)
+        
+        Yields
+        ------
+        train_idx, test_idx : ndarrays of int64
+        """
+        n_samples = len(X)
+        rng = np.random.default_rng(self.random_state)
+        fold_ids = self._fold_ids(n_samples, y, groups, rng)
+        for fold in range(self.n_splits):
+            is_test = fold_ids == fold
+            yield np.flatnonzero(~is_test), np.flatnonzero(is_test)
+
+class StratifiedKFold(KFold):
+    """
+    K-fold generator keeping each class's proportion in every fold.
+    
+    Parameters
+    ----------
+    n_splits : int, default=5
+        Number of folds
+    shuffle : bool, default=False
+        Shuffle rows within each class before assigning folds
+    random_state : int, default=None
+        Seed of the local generator used when ``shuffle`` is True
+    """
+    def _fold_ids(self, n_samples, y, groups, rng):
+        if y is None:
+            raise ValueError("StratifiedKFold.split requires y")
+        _, class_codes = np.unique(np.asarray(y), return_inverse=True)
+        order = rng.permutation(n_samples) if self.shuffle else np.arange(n_samples)
+        # Deal the rows of each class round-robin over the folds
+        order = order[np.argsort(class_codes[order], kind='stable')]
+        fold_ids = np.empty(n_samples, dtype=np.int64)
+        fold_ids[order] = np.arange(n_samples) % self.n_splits
+        return fold_ids
+
+class GroupKFold(KFold):
+    """
+    K-fold generator that never splits a group (e.g. an engine unit) across folds.
     
-    return X_train, X_test, y_train, y_test
+    Groups are assigned largest first to the currently smallest fold, so
+    folds have similar row counts.
+    
+    Parameters
+    ----------
+    n_splits : int, default=5
+        Number of folds
+    shuffle : bool, default=False
+        Shuffle groups before assigning them (ties in size are broken randomly)
+    random_state : int, default=None
+        Seed of the local generator used when ``shuffle`` is True
+    """
+    def _fold_ids(self, n_samples, y, groups, rng):
+        if groups is None:
+            raise ValueError("GroupKFold.split requires groups")
+        _, group_codes = np.unique(np.asarray(groups), return_inverse=True)
+        sizes = np.bincount(group_codes)
+        if len(sizes) < self.n_splits:
+            raise ValueError(f"Cannot have n_splits={self.n_splits} greater than the number of groups ({len(sizes)})")
+        candidates = rng.permutation(len(sizes)) if self.shuffle else np.arange(len(sizes))
+        fold_sizes = np.zeros(self.n_splits, dtype=np.int64)
+        group_folds = np.empty(len(sizes), dtype=np.int64)
+        for group in candidates[np.argsort(-sizes[candidates], kind='stable')]:
+            fold = int(np.argmin(fold_sizes))
+            group_folds[group] = fold
+            fold_sizes[fold] += sizes[group]
+        return group_folds[group_codes]
 
 class StandardScaler:
     """
     Standardize features by removing the mean and scaling to unit variance.
     
+    Moments are accumulated in float64 with Chan et al.'s parallel update,
+    so the scaler can be fitted over streamed batches (``partial_fit``) and
+    scalers fitted on separate shards can be combined (``merge``).
+    
     Parameters
     ----------
     with_mean : bool, default=True
@@ -77,6 +313,20 @@ class StandardScaler:
         self.with_std = with_std
         self.mean_ = None
         self.scale_ = None
+        self.var_ = None
+        self.n_samples_seen_ = 0
+        # Running moments; mean_ is zeros when with_mean=False, _mean is the true mean
+        self._mean = None
+        self._m2 = None
+    
+    def _reset(self):
+        self.mean_ = None
+        self.scale_ = None
+        self.var_ = None
+        self.n_samples_seen_ = 0
+        # Running moments; mean_ is zeros when with_mean=False, _mean is the true mean
+        self._mean = None
+        self._m2 = None
     
     def fit(self, X):
         """
@@ -92,33 +342,90 @@ class StandardScaler:
         self : object
             Fitted scaler
         """
-        if isinstance(X, pd.DataFrame):
-            X_array = X.values
-        else:
-            X_array = np.asarray(X)
+        self._reset()
+        return self.partial_fit(X)
+    
+    def partial_fit(self, X):
+        """
+        Update the running mean and variance with a batch of samples.
         
-        if self.with_mean:
-            self.mean_ = np.mean(X_array, axis=0)
+        Parameters
+        ----------
+        X : {array-like, DataFrame} of shape (n_samples, n_features)
+            A batch of data; float32 batches are not upcast as a whole
+        
+        Returns
+        -------
+        self : object
+            Fitted scaler
+        """
+        X_array = X.values if isinstance(X, pd.DataFrame) else np.asarray(X)
+        if X_array.ndim == 1:
+            X_array = X_array.reshape(-1, 1)
+        n = X_array.shape[0]
+        if n == 0:
+            return self
+        batch_mean = np.mean(X_array, axis=0, dtype=np.float64)
+        batch_m2 = np.var(X_array, axis=0, dtype=np.float64) * n
+        return self._combine(n, batch_mean, batch_m2)
+    
+    def merge(self, other):
+        """
+        Combine the statistics of another scaler fitted on a disjoint set of samples.
+        
+        Parameters
+        ----------
+        other : StandardScaler
+            Scaler fitted (or partially fitted) on other samples
+        
+        Returns
+        -------
+        self : object
+            Scaler fitted on the union of both sample sets
+        """
+        if other.n_samples_seen_ == 0:
+            return self
+        return self._combine(other.n_samples_seen_, other._mean, other._m2)
+    
+    def _combine(self, n_b, mean_b, m2_b):
+        """Chan et al. pairwise update of (count, mean, M2)."""
+        n_a = self.n_samples_seen_
+        if n_a == 0:
+            n, mean, m2 = n_b, np.array(mean_b, dtype=np.float64), np.array(m2_b, dtype=np.float64)
         else:
-            self.mean_ = np.zeros(X_array.shape[1])
+            n = n_a + n_b
+            delta = mean_b - self._mean
+            mean = self._mean + delta * (n_b / n)
+            m2 = self._m2 + m2_b + delta ** 2 * (n_a * n_b / n)
+        self.n_samples_seen_ = n
+        self._mean = mean
+        self._m2 = m2
+        self.var_ = m2 / n
         
+        self.mean_ = mean if self.with_mean else np.zeros_like(mean)
         if self.with_std:
-            self.scale_ = np.std(X_array, axis=0)
+            scale = np.sqrt(self.var_)
             # Avoid division by zero
-            self.scale_ = np.where(self.scale_ == 0, 1.0, self.scale_)
+            self.scale_ = np.where(scale == 0, 1.0, scale)
         else:
-            self.scale_ = np.ones(X_array.shape[1])
-        
+            self.scale_ = np.ones_like(mean)
         return self
     
-    def transform(self, X):
+    def transform(self, X, copy=True):
         """
         Perform standardization by centering and scaling.
         
+        Floating-point input keeps its dtype (float32 stays float32); other
+        input is scaled to float64.
+        
         Parameters
         ----------
         X : {array-like, DataFrame} of shape (n_samples, n_features)
             The data to scale
+        copy : bool, default=True
+            If False and X is a writeable floating-point ndarray, scale it in
+            place and return it. DataFrames are always returned as a new
+            frame, built from a single output buffer
         
         Returns
         -------
@@ -136,20 +443,60 @@ class StandardScaler:
         else:
             X_array = np.asarray(X)
         
-        # Standardize
-        X_scaled = (X_array - self.mean_) / self.scale_
+        dtype = X_array.dtype if np.issubdtype(X_array.dtype, np.floating) else np.float64
+        in_place = (not copy and not is_dataframe and isinstance(X, np.ndarray)
+                    and X.dtype == dtype and X.flags.writeable)
+        out = X_array if in_place else np.empty(X_array.shape, dtype=dtype)
+        
+        # Standardize without temporaries, in the output dtype
+        np.subtract(X_array, self.mean_.astype(dtype, copy=False), out=out, casting='unsafe')
+        np.divide(out, self.scale_.astype(dtype, copy=False), out=out)
         
         if is_dataframe:
-            return pd.DataFrame(X_scaled, index=index, columns=columns)
-        return X_scaled
+            return pd.DataFrame(out, index=index, columns=columns, copy=False)
+        return out
+
+def _as_factorizable(y):
+    """Return y in a form pandas.factorize accepts without copying Series/arrays."""
+    if isinstance(y, (pd.Series, pd.Index, np.ndarray, pd.api.extensions.ExtensionArray)):
+        return y
+    return np.asarray(y, dtype=object)
 
 class LabelEncoder:
     """
     Encode target labels with value between 0 and n_classes-1.
+    
+    Encoding is vectorized: labels are looked up in a hash index of the
+    sorted ``classes_`` instead of one dictionary lookup per label. With
+    ``n_hash_buckets`` set, labels are instead hashed into a fixed number of
+    buckets (the hashing trick), which needs no vocabulary and suits
+    high-cardinality fields such as tail numbers.
+    
+    Parameters
+    ----------
+    handle_unknown : {'value', 'bucket', 'error'}, default='value'
+        How labels not seen during fit are encoded: as ``unknown_value``, as
+        a dedicated extra bucket ``n_classes``, or by raising ValueError
+    unknown_value : int, default=-1
+        Code for unseen labels when ``handle_unknown='value'``
+    n_hash_buckets : int, default=None
+        If set, encode labels as a stable hash modulo this number of buckets
     """
-    def __init__(self):
+    def __init__(self, handle_unknown='value', unknown_value=-1, n_hash_buckets=None):
+        if handle_unknown not in ('value', 'bucket', 'error'):
+            raise ValueError("handle_unknown must be 'value', 'bucket' or 'error'")
+        self.handle_unknown = handle_unknown
+        self.unknown_value = unknown_value
+        self.n_hash_buckets = n_hash_buckets
         self.classes_ = None
-        self._label_to_index = None
+        self._index = None
+    
+    @property
+    def unknown_code_(self):
+        """Code given to labels not seen during fit."""
+        if self.handle_unknown == 'bucket':
+            return len(self.classes_)
+        return self.unknown_value
     
     def fit(self, y):
         """
@@ -164,8 +511,9 @@ class LabelEncoder:
         -------
         self : returns an instance of self
         """
-        self.classes_ = np.unique(y)
-        self._label_to_index = {label: idx for idx, label in enumerate(self.classes_)}
+        _, uniques = pd.factorize(_as_factorizable(y))
+        self.classes_ = np.unique(np.asarray(uniques))
+        self._index = pd.Index(self.classes_)
         return self
     
     def fit_transform(self, y):
@@ -199,11 +547,44 @@ class LabelEncoder:
         y_encoded : array of shape (n_samples,)
             Encoded target values
         """
-        if self.classes_ is None:
-            raise ValueError("LabelEncoder not fitted. Call 'fit' first.")
+        is_scalar = not hasattr(y, "__len__") or isinstance(y, str)
+        # Encode each distinct label once, then broadcast through the factorized codes
+        row_codes, uniques = pd.factorize(_as_factorizable([y] if is_scalar else y))
         
-        # For values not seen during fit, return -1 or a specific "unknown" value
-        if hasattr(y, "__len__"):
-            return np.array([self._label_to_index.get(label, -1) for label in y])
+        if self.n_hash_buckets is not None:
+            hashes = pd.util.hash_array(np.asarray(uniques, dtype=object), categorize=False)
+            unique_codes = (hashes % np.uint64(self.n_hash_buckets)).astype(np.int64)
+            missing_code = 0
         else:
-            return self._label_to_index.get(y, -1)
\ No newline at end of file
+            if self.classes_ is None:
+                raise ValueError("LabelEncoder not fitted. Call 'fit' first.")
+            unique_codes = self._index.get_indexer(uniques).astype(np.int64)
+            unknown = unique_codes < 0
+            if self.handle_unknown == 'error' and (unknown.any() or (row_codes < 0).any()):
+                raise ValueError(f"y contains previously unseen labels: {np.asarray(uniques)[unknown][:5].tolist()}")
+            unique_codes[unknown] = self.unknown_code_
+            missing_code = self.unknown_code_
+        # Missing labels (NaN/None) are factorized to -1, which picks the last slot
+        codes = np.append(unique_codes, missing_code)[row_codes]
+        return codes[0] if is_scalar else codes
+    
+    def inverse_transform(self, y):
+        """
+        Transform codes back to the original labels (unknown codes become None).
+        
+        Parameters
+        ----------
+        y : array-like of shape (n_samples,)
+            Encoded values
+        
+        Returns
+        -------
+        labels : ndarray of shape (n_samples,)
+        """
+        if self.n_hash_buckets is not None:
+            raise ValueError("Hashed labels cannot be inverted")
+        codes = np.asarray(y)
+        valid = (codes >= 0) & (codes < len(self.classes_))
+        labels = np.empty(codes.shape, dtype=object)
+        labels[valid] = self.classes_[codes[valid]]
+        return labels
@@ -9,39 +9,118 @@ import pandas as pd
 import numpy as np
 # Use our custom implementations instead of scikit-learn
 from custom_utils import StandardScaler, LabelEncoder
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pa_csv
+import pyarrow.dataset as pa_ds
 import pyarrow.parquet as pq
+import hashlib
 import os
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+import logging
 
-def load_cmapss_data(dataset_path=None):
-    """Load and preprocess NASA C-MAPSS dataset."""
+logger = logging.getLogger(__name__)
+
+CMAPSS_SUBSETS = [f'FD00{i}' for i in range(1, 5)]
+CMAPSS_COLUMNS = ['unit', 'cycle', 'op_setting_1', 'op_setting_2', 'op_setting_3'] + \
+                 [f'sensor_{i}' for i in range(1, 22)]
+# Bump when the parsed layout changes so stale caches are not reused
+CMAPSS_CACHE_VERSION = 1
+
+def _read_space_delimited(file_path, n_columns):
+    """Parse a whitespace-separated C-MAPSS text file into float32 NumPy columns."""
+    try:
+        table = pa_csv.read_csv(
+            file_path,
+            read_options=pa_csv.ReadOptions(autogenerate_column_names=True),
+            parse_options=pa_csv.ParseOptions(delimiter=' '),
+            convert_options=pa_csv.ConvertOptions(
+                include_columns=[f'f{i}' for i in range(n_columns)],
+                column_types={f'f{i}': pa.float32() for i in range(n_columns)}
+            )
+        )
+        return [table.column(i).to_numpy() for i in range(n_columns)]
+    except (pa.ArrowInvalid, KeyError):
+        # Irregular spacing: fall back to the pandas whitespace parser
+        df = pd.read_csv(file_path, sep=r'\s+', header=None, usecols=range(n_columns), dtype=np.float32)
+        return [df[i].to_numpy() for i in range(n_columns)]
+
+def _parse_cmapss_subset(dataset_path, subset, split):
+    """Parse one train/test subset into a compact frame (int16 ids, float32 readings)."""
+    columns = _read_space_delimited(os.path.join(dataset_path, f'{split}_{subset}.txt'), len(CMAPSS_COLUMNS))
+    df = pd.DataFrame({
+        name: values.astype(np.int16) if name in ('unit', 'cycle') else values
+        for name, values in zip(CMAPSS_COLUMNS, columns)
+    })
+    df['dataset'] = subset
+    if split == 'test':
+        # RUL_FD00x holds the true RUL after the last cycle of each test unit
+        final_rul = _read_space_delimited(os.path.join(dataset_path, f'RUL_{subset}.txt'), 1)[0].astype(np.int16)
+        last_cycle = df.groupby('unit')['cycle'].transform('max').to_numpy()
+        df['RUL'] = (final_rul[df['unit'].to_numpy() - 1] + last_cycle - df['cycle'].to_numpy()).astype(np.int16)
+    return df
+
+def _cmapss_cache_path(cache_dir, source_files, split):
+    """Cache file name derived from the size and mtime of every source file."""
+    key = hashlib.sha1(str(CMAPSS_CACHE_VERSION).encode())
+    for file_path in source_files:
+        stat = os.stat(file_path)
+        key.update(f'{os.path.basename(file_path)}:{stat.st_size}:{stat.st_mtime_ns};'.encode())
+    return Path(cache_dir) / f'cmapss_{split}_{key.hexdigest()[:16]}.parquet'
+
+def load_cmapss_data(dataset_path=None, split='train', use_cache=True, n_workers=None, cache_dir=None):
+    """Load and preprocess NASA C-MAPSS dataset.
+
+    The FD001-FD004 subsets are parsed in parallel with the Arrow CSV reader,
+    stored as int16 ids and float32 readings, and tagged with a ``dataset``
+    column. ``split='test'`` loads the test_FD00x files with per-row RUL
+    labels derived from the matching RUL_FD00x files. Parsed frames are
+    cached as Parquet (in ``cache_dir``, $CMAPSS_CACHE_DIR or
+    ``<dataset_path>/.cache``) keyed on the size and mtime of the source
+    files, so repeated runs skip text parsing.
+    """
     if dataset_path is None:
         # Default path as a fallback
         current_dir = Path(os.path.dirname(os.path.abspath(__file__)))
         dataset_path = str(current_dir / 'data' / 'model' / 'datasets' / 'CMaps') + '/'
+    if split not in ('train', 'test'):
+        raise ValueError(f"Unknown C-MAPSS split '{split}'. Expected 'train' or 'test'")
     
-    print(f"Loading CMAPSS data from: {dataset_path}")
-    train_files = [f'train_FD00{i}.txt' for i in range(1, 5)]
-    test_files = [f'test_FD00{i}.txt' for i in range(1, 5)]
-    rul_files = [f'RUL_FD00{i}.txt' for i in range(1, 5)]
+    print(f"Loading CMAPSS {split} data from: {dataset_path}")
+    subsets = []
+    source_files = []
+    for subset in CMAPSS_SUBSETS:
+        files = [os.path.join(dataset_path, f'{split}_{subset}.txt')]
+        if split == 'test':
+            files.append(os.path.join(dataset_path, f'RUL_{subset}.txt'))
+        missing = [file_path for file_path in files if not os.path.exists(file_path)]
+        if missing:
+            print(f"Warning: File {missing[0]} not found. Skipping.")
+            continue
+        subsets.append(subset)
+        source_files.extend(files)
     
-    column_names = ['unit', 'cycle', 'op_setting_1', 'op_setting_2', 'op_setting_3'] + \
-                  [f'sensor_{i}' for i in range(1, 22)]
+    cache_path = None
+    if subsets and use_cache:
+        cache_dir = cache_dir or os.environ.get('CMAPSS_CACHE_DIR') or os.path.join(dataset_path, '.cache')
+        cache_path = _cmapss_cache_path(cache_dir, source_files, split)
+        if cache_path.exists():
+            try:
+                df = pq.read_table(cache_path).to_pandas()
+                print(f"Loaded {len(df)} cached CMAPSS rows from {cache_path}")
+                return df
+            except Exception as e:
+                print(f"Error reading cache {cache_path}: {str(e)}")
     
     dfs = []
-    for train_file in train_files:
-        file_path = os.path.join(dataset_path, train_file)
-        if not os.path.exists(file_path):
-            print(f"Warning: File {file_path} not found. Skipping.")
-            continue
-            
-        try:
-            df = pd.read_csv(file_path, delimiter=' ', header=None, names=column_names)
-            df = df.drop(columns=df.columns[df.isna().all()].tolist())  # Remove NaN columns
-            dfs.append(df)
-        except Exception as e:
-            print(f"Error reading {file_path}: {str(e)}")
-            continue
+    with ThreadPoolExecutor(max_workers=n_workers or len(subsets) or 1) as pool:
+        futures = {pool.submit(_parse_cmapss_subset, dataset_path, subset, split): subset for subset in subsets}
+        for future, subset in futures.items():
+            try:
+                dfs.append(future.result())
+            except Exception as e:
+                print(f"Error reading {split}_{subset}: {str(e)}")
     
     if not dfs:
         # Create a minimal dummy dataframe if no files were found
@@ -58,7 +137,23 @@ def load_cmapss_data(dataset_path=None):
             dummy_data[f'sensor_{i}'] = [0.1*i, 0.2*i, 0.1*i, 0.2*i]
         return pd.DataFrame(dummy_data)
     
-    return pd.concat(dfs, ignore_index=True)
+    df = pd.concat(dfs, ignore_index=True)
+    df['dataset'] = df['dataset'].astype(pd.CategoricalDtype(subsets))
+    
+    if cache_path is not None and len(dfs) == len(subsets):
+        try:
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = cache_path.with_suffix(f'.{os.getpid()}.tmp')
+            pq.write_table(pa.Table.from_pandas(df, preserve_index=False), tmp_path)
+            os.replace(tmp_path, cache_path)
+            # Drop caches of older versions of the same files
+            for stale in cache_path.parent.glob(f'cmapss_{split}_*.parquet'):
+                if stale != cache_path:
+                    stale.unlink()
+        except OSError as e:
+            print(f"Warning: Could not write CMAPSS cache {cache_path}: {str(e)}")
+    
+    return df
 
 def load_ngafid_data(dataset_path=None):
     """Load and preprocess NGAFID maintenance dataset."""
@@ -88,8 +183,9 @@ def load_ngafid_data(dataset_path=None):
             flight_data = None
         else:
             try:
-                flight_data = pq.read_table(parquet_dir_path).to_pandas()
-                print(f"Successfully loaded parquet data with {len(flight_data)} rows")
+                # Stream the per-second data and keep only per-flight aggregates
+                flight_data = aggregate_ngafid_flights(dataset_path).reset_index()
+                print(f"Successfully aggregated parquet data into {len(flight_data)} flights")
             except Exception as e:
                 print(f"Error loading parquet data: {str(e)}")
                 flight_data = None
@@ -130,6 +226,195 @@ def load_ngafid_data(dataset_path=None):
     }
     return pd.DataFrame(dummy_data)
 
+NGAFID_FLIGHT_KEY = 'Master Index'
+NGAFID_DATE_COLUMN = 'date'
+NGAFID_BATCH_SIZE = 65536
+
+def open_ngafid_dataset(dataset_path=None):
+    """Open the NGAFID ``one_parq`` flight data as a lazy pyarrow dataset (nothing is read yet)."""
+    if dataset_path is None:
+        current_dir = Path(os.path.dirname(os.path.abspath(__file__)))
+        dataset_path = str(current_dir / 'data' / 'model' / 'datasets' / 'Aviation Maintanance Dataset') + '/'
+    return pa_ds.dataset(os.path.join(dataset_path, 'all_flights/all_flights/one_parq/'),
+                         format='parquet', partitioning='hive')
+
+def _filter_scalar(value, field_type):
+    """Convert a date-like bound to an Arrow scalar of the column's type."""
+    if pa.types.is_timestamp(field_type):
+        return pa.scalar(pd.Timestamp(value).to_pydatetime(), type=field_type)
+    if pa.types.is_date(field_type):
+        return pa.scalar(pd.Timestamp(value).date(), type=field_type)
+    return value
+
+def build_ngafid_filter(schema, master_indices=None, date_range=None, date_column=NGAFID_DATE_COLUMN):
+    """Build a pushdown filter on flight ids and/or an inclusive (start, end) date range.
+
+    Either bound of ``date_range`` may be None. Returns None when there is
+    nothing to filter on.
+    """
+    expression = None
+    if master_indices is not None:
+        expression = pa_ds.field(NGAFID_FLIGHT_KEY).isin(list(master_indices))
+    if date_range is not None:
+        if date_column not in schema.names:
+            raise ValueError(f"Date column '{date_column}' not found in NGAFID data")
+        field_type = schema.field(date_column).type
+        start, end = date_range
+        for bound, is_start in ((start, True), (end, False)):
+            if bound is None:
+                continue
+            bound = _filter_scalar(bound, field_type)
+            condition = pa_ds.field(date_column) >= bound if is_start else pa_ds.field(date_column) <= bound
+            expression = condition if expression is None else expression & condition
+    return expression
+
+def iter_ngafid_batches(dataset_path=None, columns=None, master_indices=None, date_range=None,
+                        date_column=NGAFID_DATE_COLUMN, batch_size=NGAFID_BATCH_SIZE):
+    """Stream NGAFID flight data as pyarrow RecordBatches.
+
+    Only the requested ``columns`` are read, and the flight-id/date filter is
+    pushed down to the Parquet reader so non-matching row groups are skipped
+    using their statistics. Peak memory is bounded by ``batch_size`` rows.
+    """
+    dataset = open_ngafid_dataset(dataset_path)
+    row_filter = build_ngafid_filter(dataset.schema, master_indices, date_range, date_column)
+    yield from dataset.to_batches(columns=columns, filter=row_filter, batch_size=batch_size)
+
+def aggregate_ngafid_flights(dataset_path=None, columns=None, master_indices=None, date_range=None,
+                             date_column=NGAFID_DATE_COLUMN, batch_size=NGAFID_BATCH_SIZE):
+    """Aggregate per-flight mean/std/min/max of NGAFID sensor columns out of core.
+
+    Each batch is reduced to per-flight partial sums, sums of squares, minima,
+    maxima and counts; the partials (one row per flight per batch) are then
+    combined, so the per-second table is never materialized.
+
+    Returns a DataFrame indexed by ``Master Index`` with ``<column>_mean``,
+    ``_std``, ``_min`` and ``_max`` columns and an ``n_samples`` column.
+    """
+    dataset = open_ngafid_dataset(dataset_path)
+    if columns is None:
+        columns = [field.name for field in dataset.schema
+                   if field.name not in (NGAFID_FLIGHT_KEY, date_column)
+                   and (pa.types.is_integer(field.type) or pa.types.is_floating(field.type))]
+    columns = list(columns)
+    row_filter = build_ngafid_filter(dataset.schema, master_indices, date_range, date_column)
+    
+    partials = []
+    for batch in dataset.to_batches(columns=[NGAFID_FLIGHT_KEY] + columns, filter=row_filter, batch_size=batch_size):
+        table = pa.Table.from_batches([batch])
+        aggregations = [(NGAFID_FLIGHT_KEY, 'count')]
+        for col in columns:
+            values = pc.cast(table.column(col), pa.float64())
+            table = table.set_column(table.schema.get_field_index(col), col, values)
+            table = table.append_column(f'{col}__sq', pc.multiply(values, values))
+            aggregations += [(col, 'sum'), (f'{col}__sq', 'sum'), (col, 'count'), (col, 'min'), (col, 'max')]
+        partials.append(table.group_by(NGAFID_FLIGHT_KEY).aggregate(aggregations).to_pandas())
+    
+    if not partials:
+        return pd.DataFrame(columns=['n_samples']).rename_axis(NGAFID_FLIGHT_KEY)
+    combined = pd.concat(partials, ignore_index=True).groupby(NGAFID_FLIGHT_KEY)
+    sums = combined.sum()
+    result = {'n_samples': sums[f'{NGAFID_FLIGHT_KEY}_count']}
+    for col in columns:
+        count = sums[f'{col}_count'].replace(0, np.nan)
+        mean = sums[f'{col}_sum'] / count
+        variance = (sums[f'{col}__sq_sum'] - count * mean ** 2) / (count - 1)
+        result[f'{col}_mean'] = mean
+        result[f'{col}_std'] = np.sqrt(variance.clip(lower=0))
+        result[f'{col}_min'] = combined[f'{col}_min'].min()
+        result[f'{col}_max'] = combined[f'{col}_max'].max()
+    return pd.DataFrame(result)
+
+# Number of most recent cycles used for rolling sensor statistics
+CMAPSS_ROLLING_WINDOW = 10
+ROLLING_SUFFIXES = ('_roll_mean', '_roll_std', '_roll_slope')
+
+def cmapss_group_columns(df):
+    """Columns identifying one engine run: (dataset, unit) when the subset is known."""
+    return ['dataset', 'unit'] if 'dataset' in df.columns else ['unit']
+
+def add_rul_labels(df, group_cols=None):
+    """Add a RUL column: cycles remaining until the last observed cycle of each engine run."""
+    group_cols = group_cols or cmapss_group_columns(df)
+    df['RUL'] = df.groupby(group_cols, observed=True)['cycle'].transform('max') - df['cycle']
+    return df
+
+def rolling_window_stats(values, cycles, group_ids, window=CMAPSS_ROLLING_WINDOW):
+    """Compute rolling mean, std and slope over the last ``window`` rows of each group.
+
+    Rows must be sorted by group and then by cycle. Windows never cross group
+    boundaries and include partial windows at the start of each group, so the
+    first row of a group yields mean = value and NaN std/slope. Statistics are computed from grouped
+    prefix sums, in O(rows * sensors) regardless of the window length.
+
+    Parameters
+    ----------
+    values : array-like of shape (n_rows, n_sensors)
+        Sensor readings; NaNs are treated as the column mean
+    cycles : array-like of shape (n_rows,)
+        Cycle numbers, used as the x axis of the slope
+    group_ids : array-like of shape (n_rows,)
+        Group (engine run) identifier of each row
+    window : int, default=CMAPSS_ROLLING_WINDOW
+        Number of most recent rows in each window
+
+    Returns
+    -------
+    mean, std, slope : ndarrays of shape (n_rows, n_sensors)
+    """
+    values = np.asarray(values, dtype=np.float64)
+    if values.ndim == 1:
+        values = values[:, None]
+    cycles = np.asarray(cycles, dtype=np.float64)
+    group_ids = np.asarray(group_ids)
+    n_rows = values.shape[0]
+    idx = np.arange(n_rows)
+
+    # First row of each row's group, then the first row of each row's window
+    is_group_start = np.ones(n_rows, dtype=bool)
+    is_group_start[1:] = group_ids[1:] != group_ids[:-1]
+    group_start = np.maximum.accumulate(np.where(is_group_start, idx, 0))
+    window_start = np.maximum(idx - window + 1, group_start)
+    count = (idx - window_start + 1).astype(np.float64)[:, None]
+
+    # Center values and cycles to keep the prefix sums numerically stable
+    column_mean = np.nanmean(values, axis=0) if n_rows else np.zeros(values.shape[1])
+    y = np.nan_to_num(values - column_mean)
+    x = (cycles - cycles[group_start])[:, None]
+
+    def window_sum(a):
+        prefix = np.concatenate([np.zeros((1, a.shape[1])), np.cumsum(a, axis=0)])
+        return prefix[idx + 1] - prefix[window_start]
+
+    sum_y, sum_yy = window_sum(y), window_sum(y * y)
+    sum_x, sum_xx, sum_xy = window_sum(x), window_sum(x * x), window_sum(x * y)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = sum_y / count + column_mean
+        variance = np.maximum(sum_yy - sum_y * sum_y / count, 0) / (count - 1)
+        std = np.where(count > 1, np.sqrt(variance), np.nan)
+        denominator = count * sum_xx - sum_x * sum_x
+        slope = np.where(denominator > 0, (count * sum_xy - sum_x * sum_y) / denominator, np.nan)
+    return mean, std, slope
+
+def add_cmapss_rolling_features(df, sensor_cols=None, window=CMAPSS_ROLLING_WINDOW, group_cols=None):
+    """Add <sensor>_roll_mean/_roll_std/_roll_slope columns computed per engine run.
+
+    The returned frame is sorted by engine run and cycle.
+    """
+    group_cols = group_cols or cmapss_group_columns(df)
+    if sensor_cols is None:
+        sensor_cols = [col for col in df.columns
+                       if col.startswith('sensor_') and not col.endswith(ROLLING_SUFFIXES)]
+    df = df.sort_values(group_cols + ['cycle'], kind='stable').reset_index(drop=True)
+    group_ids = df.groupby(group_cols, sort=False, observed=True).ngroup().to_numpy()
+    mean, std, slope = rolling_window_stats(df[sensor_cols].to_numpy(), df['cycle'].to_numpy(), group_ids, window)
+    rolling = {}
+    for suffix, stats in zip(ROLLING_SUFFIXES, (mean, std, slope)):
+        for j, col in enumerate(sensor_cols):
+            rolling[col + suffix] = stats[:, j]
+    return pd.concat([df, pd.DataFrame(rolling, index=df.index)], axis=1)
+
 def prepare_failure_features(input_json, weather_data=None):
     """Prepare features for part failure prediction model."""
     features = {
@@ -160,11 +445,12 @@ def prepare_rul_features(input_json):
         'flight_hours': input_json['flight_hours']
     }
     
-    # Add sensor readings
+    # Add sensor readings. Rolling statistics need a reading history, so they
+    # come from the feature store's window (or are left missing for snapshots)
     if 'sensor_readings' in input_json:
         features.update(input_json['sensor_readings'])
     
-    return pd.DataFrame([features])
+    return features
 
 def prepare_fuel_features(input_json, weather_data=None):
     """Prepare features for fuel consumption prediction model."""
@@ -186,7 +472,7 @@ def prepare_fuel_features(input_json, weather_data=None):
             'wind_direction': weather_data.get('wind_direction', 0)
         })
     
-    return pd.DataFrame([features])
+    return features
 
 def calculate_distance(origin, destination):
     """Calculate great circle distance between two airports."""
@@ -194,43 +480,229 @@ def calculate_distance(origin, destination):
     # and haversine formula or similar to calculate actual distances
     return 1000  # Default distance in km for now
 
+class FeaturePipelineError(ValueError):
+    """Raised when input rows do not match the fitted feature columns."""
+
 class FeatureProcessor:
-    """Class to handle feature scaling and encoding consistently."""
-    def __init__(self):
+    """Class to handle feature scaling and encoding consistently.
+
+    Categorical columns are label encoded with a dedicated bucket for
+    categories not seen during fit; columns listed in ``hash_buckets``
+    (e.g. ``{'tail_number': 1024}``) use the hashing trick instead. Any
+    non-numeric column seen during fit is treated as categorical.
+
+    A fitted processor is the preprocessing artifact shared by training and
+    serving: ``save``/``load`` store the column order, encoder classes and
+    scaler statistics as plain arrays (.npz), and ``transform_records`` /
+    ``transform_columns`` encode and scale request rows straight into the
+    model's input matrix with one fused affine step. Fitted features a
+    request does not provide are NaN in the matrix; ``missing_features`` /
+    ``missing_columns`` name them so serving can report them to the caller.
+    """
+    def __init__(self, categorical_columns=None, hash_buckets=None, scale=True):
         self.label_encoders = {}
         self.scaler = StandardScaler()
-        self.categorical_columns = ['aircraft_model']
+        self.hash_buckets = dict(hash_buckets or {})
+        self.categorical_columns = list(categorical_columns or ['aircraft_model']) + \
+            [col for col in self.hash_buckets if col not in (categorical_columns or ['aircraft_model'])]
+        self.scale = scale
         self.numerical_columns = None  # Will be set during fit
+        self.feature_names = None
+        self._offset = None
+        self._divisor = None
+        self._reported_missing = set()
+        
+    def _make_encoder(self, col):
+        if col in self.hash_buckets:
+            return LabelEncoder(n_hash_buckets=self.hash_buckets[col])
+        return LabelEncoder(handle_unknown='bucket')
         
     def fit(self, df):
         """Fit the preprocessor on training data."""
+        df = df.copy()
+        self.feature_names = [str(col) for col in df.columns]
+        self.categorical_columns = [col for col in self.categorical_columns if col in df.columns] + \
+            [col for col in df.columns
+             if col not in self.categorical_columns and not pd.api.types.is_numeric_dtype(df[col])]
+        
         # Initialize label encoders for categorical columns
         for col in self.categorical_columns:
-            if col in df.columns:
-                self.label_encoders[col] = LabelEncoder()
-                df[col] = self.label_encoders[col].fit_transform(df[col])
+            self.label_encoders[col] = self._make_encoder(col)
+            df[col] = self.label_encoders[col].fit_transform(df[col])
         
         # Identify numerical columns
         self.numerical_columns = df.select_dtypes(include=[np.number]).columns
         
         # Fit scaler on numerical columns
-        self.scaler.fit(df[self.numerical_columns])
+        if self.scale:
+            self.scaler.fit(df[self.numerical_columns])
+        self._build_affine()
         
         return self
     
+    def _build_affine(self):
+        """Per-column (offset, divisor) so scaling is one vectorized step over the whole matrix."""
+        self._offset = np.zeros(len(self.feature_names))
+        self._divisor = np.ones(len(self.feature_names))
+        if self.scale and self.scaler.mean_ is not None:
+            positions = [self.feature_names.index(col) for col in self.numerical_columns]
+            self._offset[positions] = self.scaler.mean_
+            self._divisor[positions] = self.scaler.scale_
+    
     def transform(self, df):
         """Transform new data using fitted preprocessor."""
         df = df.copy()
         
-        # Transform categorical columns
+        # Transform categorical columns; unseen categories go to the encoder's unknown bucket
         for col in self.categorical_columns:
             if col in df.columns:
-                # Handle unseen categories
-                df[col] = df[col].map(lambda x: x if x in self.label_encoders[col].classes_ else 'unknown')
                 df[col] = self.label_encoders[col].transform(df[col])
         
         # Scale numerical columns
-        if self.numerical_columns is not None:
+        if self.scale and self.numerical_columns is not None:
             df[self.numerical_columns] = self.scaler.transform(df[self.numerical_columns])
         
-        return df
\ No newline at end of file
+        return df
+    
+    def transform_columns(self, columns, n_rows, strict=False):
+        """Build the model input matrix from column arrays.
+
+        Parameters
+        ----------
+        columns : dict
+            Feature name -> sequence of values (raw categories for
+            categorical columns); extra names are ignored
+        n_rows : int
+            Number of rows
+        strict : bool, default=False
+            Raise FeaturePipelineError when fitted columns are absent instead
+            of filling them with NaN (see ``missing_columns``)
+
+        Returns
+        -------
+        X : ndarray of shape (n_rows, n_features)
+            Encoded and scaled float64 matrix in fitted column order; absent
+            or non-numeric values are NaN
+        """
+        missing = self.missing_columns(columns)
+        if missing:
+            message = f"Input is missing fitted feature columns: {', '.join(missing)}"
+            if strict:
+                raise FeaturePipelineError(message)
+            if missing not in self._reported_missing:
+                # Reported once per distinct set of missing columns, not per request
+                self._reported_missing.add(missing)
+                logger.warning(message)
+        
+        X = np.full((n_rows, len(self.feature_names)), np.nan, dtype=np.float64)
+        for j, name in enumerate(self.feature_names):
+            if name not in columns:
+                continue
+            values = columns[name]
+            if name in self.label_encoders:
+                X[:, j] = self.label_encoders[name].transform(values)
+            else:
+                try:
+                    X[:, j] = np.asarray(values, dtype=np.float64)
+                except (TypeError, ValueError):
+                    X[:, j] = pd.to_numeric(pd.Series(values, dtype=object), errors='coerce').to_numpy(np.float64)
+        # Fused scaling of every column
+        X -= self._offset
+        X /= self._divisor
+        return X
+    
+    def missing_columns(self, columns):
+        """Fitted feature names absent from ``columns`` (a dict or a collection of names)."""
+        return tuple(name for name in self.feature_names if name not in columns)
+    
+    def missing_features(self, record):
+        """Fitted feature names a feature dict does not provide (absent or None), in column order."""
+        return [name for name in self.feature_names if record.get(name) is None]
+    
+    def encode_value(self, name, value):
+        """Encode and scale a single raw value of feature ``name`` as it appears in the matrix."""
+        return float(self.encode_column(name, [value])[0])
+    
+    def encode_column(self, name, values):
+        """Encode and scale raw values of feature ``name`` into a matrix column (float64 array)."""
+        j = self.feature_names.index(name)
+        if name in self.label_encoders:
+            values = self.label_encoders[name].transform(values)
+        return (np.asarray(values, dtype=np.float64) - self._offset[j]) / self._divisor[j]
+    
+    def decode_column(self, name, values):
+        """Raw values of numeric feature ``name`` from its matrix column (inverse of ``encode_column``)."""
+        j = self.feature_names.index(name)
+        return np.asarray(values, dtype=np.float64) * self._divisor[j] + self._offset[j]
+    
+    def transform_frame(self, df, strict=False):
+        """Build the model input matrix from a DataFrame with the raw feature columns."""
+        return self.transform_columns({col: df[col].to_numpy() for col in df.columns}, len(df), strict)
+    
+    def transform_records(self, records, strict=False):
+        """Build the model input matrix from feature dicts (one per row).
+
+        Columns no record provides are reported as in ``transform_columns``;
+        a column missing only from some records is NaN in those rows.
+        """
+        columns = {}
+        for name in self.feature_names:
+            values = [record.get(name) for record in records]
+            if any(value is not None for value in values):
+                columns[name] = values
+        return self.transform_columns(columns, len(records), strict)
+    
+    def save(self, path):
+        """Save the fitted pipeline as plain NumPy arrays (.npz, no pickles)."""
+        arrays = {
+            'feature_names': np.array(self.feature_names, dtype=str),
+            'categorical_columns': np.array(self.categorical_columns, dtype=str),
+            'hash_buckets': np.array([self.hash_buckets.get(col, 0) for col in self.categorical_columns],
+                                     dtype=np.int64),
+            'numerical_columns': np.array(list(self.numerical_columns), dtype=str),
+            'scale': np.array(self.scale),
+            'offset': self._offset,
+            'divisor': self._divisor
+        }
+        for i, col in enumerate(self.categorical_columns):
+            encoder = self.label_encoders[col]
+            if encoder.n_hash_buckets is None:
+                classes = encoder.classes_
+                arrays[f'classes_{i}'] = classes.astype(str) if classes.dtype == object else classes
+        if self.scale:
+            arrays['scaler_mean'] = self.scaler.mean_
+            arrays['scaler_scale'] = self.scaler.scale_
+        with open(path, 'wb') as f:
+            np.savez(f, **arrays)
+    
+    @classmethod
+    def load(cls, path):
+        """Load a pipeline written by ``save``."""
+        with np.load(path, allow_pickle=False) as arrays:
+            categorical_columns = arrays['categorical_columns'].tolist()
+            hash_buckets = {col: int(n) for col, n in zip(categorical_columns, arrays['hash_buckets']) if n}
+            processor = cls(categorical_columns, hash_buckets, scale=bool(arrays['scale']))
+            processor.categorical_columns = categorical_columns
+            processor.feature_names = arrays['feature_names'].tolist()
+            processor.numerical_columns = pd.Index(arrays['numerical_columns'].tolist())
+            for i, col in enumerate(categorical_columns):
+                encoder = processor._make_encoder(col)
+                if encoder.n_hash_buckets is None:
+                    encoder.fit(arrays[f'classes_{i}'])
+                processor.label_encoders[col] = encoder
+            if processor.scale:
+                processor.scaler.mean_ = arrays['scaler_mean']
+                processor.scaler.scale_ = arrays['scaler_scale']
+            processor._offset = arrays['offset']
+            processor._divisor = arrays['divisor']
+        return processor
+    
+    @classmethod
+    def identity(cls, feature_names):
+        """Pass-through pipeline for models saved without one (all columns numeric)."""
+        processor = cls(categorical_columns=[], scale=False)
+        processor.categorical_columns = []
+        processor.feature_names = list(feature_names)
+        processor.numerical_columns = pd.Index(processor.feature_names)
+        processor._build_affine()
+        return processor
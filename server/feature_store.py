@@ -0,0 +1,363 @@
+"""
+Feature Store Module for Aircraft Predictive Maintenance System
+
+This module keeps recent sensor history per aircraft in memory so clients no
+longer have to send full sensor snapshots, and so trend features are
+available at serving time:
+1. Each tail number gets a fixed-size NumPy ring buffer of its last
+   ``window`` readings (one column per sensor)
+2. Windowed sums are maintained incrementally: every reading adds its row and
+   subtracts the evicted one, so the rolling mean, standard deviation and
+   slope of every sensor are updated in O(1) per reading
+3. The statistics use the same definitions and feature names
+   (<sensor>_roll_mean/_roll_std/_roll_slope) as the training features built
+   by data_preprocessing.rolling_window_stats
+4. Static attributes sent with readings (aircraft model, flight hours and
+   cycles) are kept as request defaults, so prediction requests can carry
+   just a tail number
+5. Memory is bounded: readings are limited to the FEATURE_STORE_SENSORS
+   whitelist (when set) and to FEATURE_STORE_MAX_SENSORS sensors per
+   aircraft, further sensor names are ignored, and readings for more than
+   FEATURE_STORE_MAX_AIRCRAFT aircraft are rejected
+"""
+
+import logging
+import math
+import os
+import threading
+
+import numpy as np
+
+from data_preprocessing import CMAPSS_ROLLING_WINDOW, ROLLING_SUFFIXES
+
+logger = logging.getLogger(__name__)
+
+FEATURE_STORE_WINDOW = int(os.environ.get('FEATURE_STORE_WINDOW', CMAPSS_ROLLING_WINDOW))
+# Sensors kept per aircraft: a comma-separated whitelist (empty accepts any
+# name) and a cap on the number of distinct sensors
+FEATURE_STORE_SENSORS = tuple(name.strip() for name in os.environ.get('FEATURE_STORE_SENSORS', '').split(',')
+                              if name.strip())
+FEATURE_STORE_MAX_SENSORS = int(os.environ.get('FEATURE_STORE_MAX_SENSORS', 64))
+FEATURE_STORE_MAX_AIRCRAFT = int(os.environ.get('FEATURE_STORE_MAX_AIRCRAFT', 10000))
+# Windowed sums are recomputed from the buffer this often, so floating point
+# error from repeated add/subtract never accumulates
+RESYNC_INTERVAL = 1024
+ATTRIBUTE_FIELDS = ('aircraft_model', 'flight_hours', 'flight_cycles')
+
+
+class UnknownAircraftError(KeyError):
+    """Raised when a tail number has no stored readings or attributes."""
+
+
+class IncompleteRequestError(ValueError):
+    """Raised when a request still lacks required fields after the store lookup."""
+
+
+class FeatureStoreFullError(RuntimeError):
+    """Raised when readings would add aircraft beyond the store's capacity."""
+
+
+class RollingSensorBuffer:
+    """Ring buffer of one aircraft's recent readings with incremental window sums.
+
+    Sums are kept relative to a reference cycle and per-sensor reference
+    values (reset at every resync), which keeps them numerically stable.
+    Missing readings are NaN in the buffer and excluded from that sensor's
+    statistics. At most ``max_sensors`` sensors are kept; readings of
+    further sensor names are ignored.
+    """
+    def __init__(self, window=FEATURE_STORE_WINDOW, max_sensors=FEATURE_STORE_MAX_SENSORS):
+        self.window = window
+        self.max_sensors = max_sensors
+        self.sensor_names = []
+        self._sensor_index = {}
+        self.values = np.full((window, 0), np.nan)
+        self.cycles = np.zeros(window)
+        self.size = 0
+        self.head = 0  # Slot of the next reading
+        self.last_cycle = None
+        self._limit_reported = False
+        self._updates = 0
+        self._x_ref = 0.0
+        self._y_ref = np.zeros(0)
+        # Per-sensor window sums over non-missing readings
+        self._n = np.zeros(0)
+        self._sx = np.zeros(0)
+        self._sxx = np.zeros(0)
+        self._sy = np.zeros(0)
+        self._syy = np.zeros(0)
+        self._sxy = np.zeros(0)
+
+    def _add_sensors(self, names):
+        """Append columns for sensors not seen before (their history is missing)."""
+        for name in names:
+            self._sensor_index[name] = len(self.sensor_names)
+            self.sensor_names.append(name)
+        extra = len(names)
+        self.values = np.hstack([self.values, np.full((self.window, extra), np.nan)])
+        self._y_ref = np.concatenate([self._y_ref, np.zeros(extra)])
+        for attr in ('_n', '_sx', '_sxx', '_sy', '_syy', '_sxy'):
+            setattr(self, attr, np.concatenate([getattr(self, attr), np.zeros(extra)]))
+
+    def _accumulate(self, x, y, sign):
+        """Add (sign=1) or remove (sign=-1) one row of readings from the window sums."""
+        present = ~np.isnan(y)
+        x = x - self._x_ref
+        y = np.where(present, y - self._y_ref, 0.0)
+        w = present * float(sign)
+        self._n += w
+        self._sx += w * x
+        self._sxx += w * x * x
+        self._sy += w * y
+        self._syy += w * y * y
+        self._sxy += w * x * y
+
+    def _resync(self):
+        """Recompute the window sums from the buffer around fresh references."""
+        slots = (self.head - self.size + np.arange(self.size)) % self.window
+        values, cycles = self.values[slots], self.cycles[slots]
+        self._x_ref = float(cycles[-1]) if self.size else 0.0
+        present = ~np.isnan(values)
+        # Per-sensor mean of the present readings (0 for sensors with none)
+        self._y_ref = np.where(present, values, 0.0).sum(axis=0) / np.maximum(present.sum(axis=0), 1)
+        x = (cycles - self._x_ref)[:, None] * present
+        y = np.where(present, values - self._y_ref, 0.0)
+        self._n = present.sum(axis=0).astype(np.float64)
+        self._sx = x.sum(axis=0)
+        self._sxx = (x * x).sum(axis=0)
+        self._sy = y.sum(axis=0)
+        self._syy = (y * y).sum(axis=0)
+        self._sxy = (x * y).sum(axis=0)
+        self._updates = 0
+
+    def append(self, readings, cycle=None):
+        """Add one reading (dict of sensor name -> number); returns the cycle used."""
+        new = [name for name in readings if name not in self._sensor_index]
+        if len(self.sensor_names) + len(new) > self.max_sensors:
+            if not self._limit_reported:
+                # Reported once per aircraft, not per reading
+                self._limit_reported = True
+                logger.warning("Sensor limit (%d) reached; ignoring readings of further sensors", self.max_sensors)
+            new = new[:self.max_sensors - len(self.sensor_names)]
+        if new:
+            self._add_sensors(new)
+        row = np.full(len(self.sensor_names), np.nan)
+        for name, value in readings.items():
+            if name in self._sensor_index:
+                row[self._sensor_index[name]] = value
+        if cycle is None:
+            cycle = 0 if self.last_cycle is None else self.last_cycle + 1
+
+        if self.size == self.window:
+            # Evict the oldest reading, which occupies the slot being overwritten
+            self._accumulate(self.cycles[self.head], self.values[self.head], -1)
+        else:
+            self.size += 1
+        self.values[self.head] = row
+        self.cycles[self.head] = cycle
+        self.head = (self.head + 1) % self.window
+        self.last_cycle = cycle
+        self._updates += 1
+        if self._updates >= RESYNC_INTERVAL or self.size == 1 or new:
+            self._resync()
+        else:
+            self._accumulate(cycle, row, 1)
+        return cycle
+
+    def latest(self):
+        """Most recent value of every sensor within the window (NaN if none)."""
+        slots = (self.head - 1 - np.arange(self.size)) % self.window
+        latest = np.full(len(self.sensor_names), np.nan)
+        for slot in slots:
+            missing = np.isnan(latest)
+            if not missing.any():
+                break
+            latest[missing] = self.values[slot, missing]
+        return latest
+
+    def stats(self):
+        """Return rolling (mean, std, slope) arrays, one value per sensor."""
+        n = self._n
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = self._sy / n + self._y_ref
+            variance = np.maximum(self._syy - self._sy * self._sy / n, 0) / (n - 1)
+            std = np.where(n > 1, np.sqrt(variance), np.nan)
+            denominator = n * self._sxx - self._sx * self._sx
+            slope = np.where(denominator > 0, (n * self._sxy - self._sx * self._sy) / denominator, np.nan)
+        return np.where(n > 0, mean, np.nan), std, slope
+
+
+def _numeric_readings(readings):
+    """Keep finite numeric sensor values (booleans and strings are ignored)."""
+    return {name: float(value) for name, value in (readings or {}).items()
+            if isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value)}
+
+
+class AircraftFeatureStore:
+    """Thread-safe in-memory store of per-aircraft sensor buffers and attributes.
+
+    Parameters
+    ----------
+    window : int, default=FEATURE_STORE_WINDOW
+        Readings kept per aircraft
+    sensors : sequence of str, default=FEATURE_STORE_SENSORS
+        Sensor names to keep; empty keeps any name (up to ``max_sensors``)
+    max_sensors : int, default=FEATURE_STORE_MAX_SENSORS
+        Distinct sensors kept per aircraft
+    max_aircraft : int, default=FEATURE_STORE_MAX_AIRCRAFT
+        Aircraft the store accepts; readings for more raise FeatureStoreFullError
+    """
+    def __init__(self, window=FEATURE_STORE_WINDOW, sensors=FEATURE_STORE_SENSORS,
+                 max_sensors=FEATURE_STORE_MAX_SENSORS, max_aircraft=FEATURE_STORE_MAX_AIRCRAFT):
+        self.window = window
+        self.sensors = frozenset(sensors or ())
+        self.max_sensors = max_sensors
+        self.max_aircraft = max_aircraft
+        self._buffers = {}
+        self._attributes = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._buffers.keys() | self._attributes.keys())
+
+    def __contains__(self, tail_number):
+        return tail_number in self._buffers or tail_number in self._attributes
+
+    def tail_numbers(self):
+        """Return every tail number with stored readings or attributes."""
+        with self._lock:
+            return sorted(self._buffers.keys() | self._attributes.keys())
+
+    def ingest(self, tail_number, readings=None, cycle=None, attributes=None):
+        """Record one reading and/or attribute update for an aircraft.
+
+        Parameters
+        ----------
+        tail_number : str
+            Aircraft identifier
+        readings : dict, optional
+            Sensor name -> value; non-numeric values are ignored
+        cycle : int or float, optional
+            Cycle of the reading, the slope's x axis (defaults to the
+            aircraft's previous cycle + 1)
+        attributes : dict, optional
+            Values of ATTRIBUTE_FIELDS to remember for prediction requests
+
+        Returns
+        -------
+        int or float or None
+            Cycle the reading was stored under (None if no readings)
+
+        Raises FeatureStoreFullError if ``tail_number`` is new and the store
+        already holds ``max_aircraft`` aircraft.
+        """
+        with self._lock:
+            self._check_capacity([tail_number])
+            return self._ingest(tail_number, readings, cycle, attributes)
+
+    def _check_capacity(self, tail_numbers):
+        new = {tail_number for tail_number in tail_numbers
+               if tail_number not in self._buffers and tail_number not in self._attributes}
+        if new and len(self._buffers.keys() | self._attributes.keys()) + len(new) > self.max_aircraft:
+            raise FeatureStoreFullError(f"Feature store is limited to {self.max_aircraft} aircraft")
+
+    def _ingest(self, tail_number, readings, cycle, attributes):
+        readings = _numeric_readings(readings)
+        if self.sensors:
+            readings = {name: value for name, value in readings.items() if name in self.sensors}
+        attributes = {name: value for name, value in (attributes or {}).items() if name in ATTRIBUTE_FIELDS}
+        if attributes:
+            self._attributes.setdefault(tail_number, {}).update(attributes)
+        if not readings:
+            return None
+        buffer = self._buffers.get(tail_number)
+        if buffer is None:
+            buffer = self._buffers[tail_number] = RollingSensorBuffer(self.window, self.max_sensors)
+        return buffer.append(readings, cycle)
+
+    def ingest_record(self, record):
+        """Ingest one API record: tail_number, optional cycle, sensor_readings and attributes."""
+        return self.ingest_records([record])[0]
+
+    def ingest_records(self, records):
+        """Ingest API records all-or-nothing with respect to capacity; returns their cycles.
+
+        Raises FeatureStoreFullError, before storing any record, if the
+        records name more new aircraft than the store has room for.
+        """
+        with self._lock:
+            self._check_capacity([record['tail_number'] for record in records])
+            return [self._ingest(record['tail_number'], record.get('sensor_readings'), record.get('cycle'),
+                                 {name: record[name] for name in ATTRIBUTE_FIELDS if name in record})
+                    for record in records]
+
+    def features(self, tail_number):
+        """Return latest readings and rolling statistics as a feature dict.
+
+        Raises UnknownAircraftError for tail numbers without readings.
+        """
+        with self._lock:
+            buffer = self._buffers.get(tail_number)
+            if buffer is None:
+                raise UnknownAircraftError(tail_number)
+            names = list(buffer.sensor_names)
+            latest = buffer.latest()
+            stats = buffer.stats()
+        features = {name: float(value) for name, value in zip(names, latest) if not np.isnan(value)}
+        for suffix, values in zip(ROLLING_SUFFIXES, stats):
+            features.update((name + suffix, float(value)) for name, value in zip(names, values))
+        return features
+
+    def attributes(self, tail_number):
+        """Return the stored attributes of an aircraft (empty if none)."""
+        with self._lock:
+            return dict(self._attributes.get(tail_number, {}))
+
+    def describe(self, tail_number):
+        """Summary of one aircraft's state for the API."""
+        if tail_number not in self:
+            raise UnknownAircraftError(tail_number)
+        with self._lock:
+            buffer = self._buffers.get(tail_number)
+            summary = {
+                'tail_number': tail_number,
+                'attributes': dict(self._attributes.get(tail_number, {})),
+                'readings': buffer.size if buffer else 0,
+                'window': self.window,
+                'last_cycle': buffer.last_cycle if buffer else None
+            }
+        summary['features'] = self.features(tail_number) if buffer else {}
+        return summary
+
+    def with_stored_features(self, input_json, readings_field, required=()):
+        """Complete a prediction request from the store when it names a tail number.
+
+        Stored attributes fill fields the request does not set, and the
+        latest stored readings fill ``readings_field`` when it is absent.
+        Returns (request, rolling_features); rolling_features is empty when
+        the request has no tail number or the aircraft has no readings.
+        Raises IncompleteRequestError if a ``required`` field is still missing.
+        """
+        tail_number = input_json.get('tail_number')
+        request, stored = input_json, {}
+        if tail_number is not None and tail_number in self:
+            request = dict(self.attributes(tail_number), **input_json)
+            try:
+                stored = self.features(tail_number)
+            except UnknownAircraftError:
+                pass
+        missing = [name for name in required if name not in request]
+        if missing:
+            known = "" if tail_number is None or tail_number in self else f" (no stored data for {tail_number})"
+            raise IncompleteRequestError(f"Missing required field: {missing[0]}{known}")
+        if not stored:
+            return request, {}
+        if readings_field not in request:
+            request[readings_field] = {name: value for name, value in stored.items()
+                                       if not name.endswith(ROLLING_SUFFIXES)}
+        rolling = {name: value for name, value in stored.items() if name.endswith(ROLLING_SUFFIXES)}
+        return request, rolling
+
+
+# Process-wide store shared by the API and the predictor
+feature_store = AircraftFeatureStore()
@@ -0,0 +1,203 @@
+"""
+Fleet Risk Snapshot Module for Aircraft Predictive Maintenance System
+
+This module keeps the dashboard's fleet view from calling the predictor once
+per aircraft on every page load:
+1. A background job periodically re-scores every aircraft in the feature
+   store with one batched failure model call and one batched RUL model call
+2. The results are kept in an immutable, array-backed snapshot sorted by risk
+   (failure probability descending, then RUL ascending), with a secondary
+   order by RUL and a tail number -> position index
+3. Top-k, probability/RUL range and per-tail queries are answered from the
+   snapshot by slicing and binary search, without touching the models
+4. Every answer reports when the snapshot was generated and its age
+
+Aircraft without the attributes the models need (aircraft model, flight
+cycles, flight hours) are skipped and counted in the snapshot.
+"""
+
+import logging
+import os
+import threading
+import time
+
+import numpy as np
+
+from data_preprocessing import prepare_failure_features, prepare_rul_features
+from feature_store import IncompleteRequestError, feature_store
+from predictor import failure_recommendation, rul_recommendation
+
+logger = logging.getLogger(__name__)
+
+# Seconds between fleet re-scores; 0 disables the background job
+FLEET_RISK_INTERVAL = float(os.environ.get('FLEET_RISK_INTERVAL', 60))
+FLEET_RISK_TOP_K = 10
+
+
+class FleetRiskUnavailableError(RuntimeError):
+    """Raised when there is no snapshot yet and scoring the fleet fails."""
+
+
+class FleetRiskSnapshot:
+    """Scores of the whole fleet at one point in time, sorted by risk."""
+    def __init__(self, tail_numbers, failure_probability, rul_cycles, generated_at=None, skipped=0,
+                 seconds=0.0):
+        tail_numbers = np.asarray(tail_numbers, dtype=object)
+        failure_probability = np.asarray(failure_probability, dtype=np.float64)
+        rul_cycles = np.asarray(rul_cycles, dtype=np.float64)
+        order = np.lexsort((rul_cycles, -failure_probability))
+        self.tail_numbers = tail_numbers[order]
+        self.failure_probability = failure_probability[order]
+        self.rul_cycles = rul_cycles[order]
+        self.generated_at = time.time() if generated_at is None else generated_at
+        self.skipped = skipped
+        self.seconds = seconds
+        # Positions (in risk order) sorted by RUL, for RUL range queries
+        self._by_rul = np.argsort(self.rul_cycles, kind='stable')
+        self._rul_sorted = self.rul_cycles[self._by_rul]
+        self._position = {tail_number: i for i, tail_number in enumerate(self.tail_numbers)}
+
+    def __len__(self):
+        return len(self.tail_numbers)
+
+    def metadata(self):
+        return {
+            "generated_at": self.generated_at,
+            "age_seconds": round(time.time() - self.generated_at, 3),
+            "fleet_size": len(self),
+            "skipped": self.skipped,
+            "scoring_seconds": round(self.seconds, 3)
+        }
+
+    def _entries(self, positions):
+        return [
+            {
+                "rank": int(i) + 1,
+                "tail_number": self.tail_numbers[i],
+                "failure_probability": float(self.failure_probability[i]),
+                "rul_cycles": int(self.rul_cycles[i]),
+                "recommendation": failure_recommendation(self.failure_probability[i]),
+                "maintenance_recommendation": rul_recommendation(self.rul_cycles[i])
+            }
+            for i in positions
+        ]
+
+    def top_k(self, k=FLEET_RISK_TOP_K):
+        """The k riskiest aircraft."""
+        return self._entries(range(min(max(k, 0), len(self))))
+
+    def query(self, min_probability=None, max_probability=None, min_rul=None, max_rul=None, limit=None):
+        """Aircraft within the given probability and RUL ranges (inclusive), in risk order.
+
+        Raises ValueError if ``limit`` is negative.
+        """
+        if limit is not None and limit < 0:
+            raise ValueError("limit must be a non-negative integer")
+        # Probabilities are sorted descending, so the range is one contiguous slice
+        descending = -self.failure_probability
+        start = 0 if max_probability is None else np.searchsorted(descending, -max_probability, side='left')
+        stop = len(self) if min_probability is None else np.searchsorted(descending, -min_probability, side='right')
+        positions = np.arange(start, max(start, stop))
+        if min_rul is not None or max_rul is not None:
+            lo = 0 if min_rul is None else np.searchsorted(self._rul_sorted, min_rul, side='left')
+            hi = len(self) if max_rul is None else np.searchsorted(self._rul_sorted, max_rul, side='right')
+            in_rul = np.zeros(len(self), dtype=bool)
+            in_rul[self._by_rul[lo:hi]] = True
+            positions = positions[in_rul[positions]]
+        if limit is not None:
+            positions = positions[:limit]
+        return self._entries(positions)
+
+    def lookup(self, tail_number):
+        """The entry of one aircraft, or None if it is not in the snapshot."""
+        position = self._position.get(tail_number)
+        return None if position is None else self._entries([position])[0]
+
+
+def score_fleet(predictor, store=feature_store):
+    """Score every aircraft in ``store`` with batched model calls and return a snapshot."""
+    start = time.perf_counter()
+    tail_numbers, failure_rows, rul_rows = [], [], []
+    skipped = 0
+    for tail_number in store.tail_numbers():
+        request = {'tail_number': tail_number}
+        try:
+            failure_request, failure_rolling = store.with_stored_features(
+                request, 'recent_sensor_data', required=('aircraft_model', 'flight_cycles'))
+            rul_request, rul_rolling = store.with_stored_features(
+                request, 'sensor_readings', required=('aircraft_model', 'flight_hours'))
+        except IncompleteRequestError:
+            skipped += 1
+            continue
+        failure_features = prepare_failure_features(failure_request)
+        failure_features.update(failure_rolling)
+        rul_features = prepare_rul_features(rul_request)
+        rul_features.update(rul_rolling)
+        tail_numbers.append(tail_number)
+        failure_rows.append(failure_features)
+        rul_rows.append(rul_features)
+
+    if tail_numbers:
+        probabilities, _ = predictor.predict_failure_batch(predictor.failure_pipeline.transform_records(failure_rows))
+        rul, _ = predictor.predict_rul_batch(predictor.rul_pipeline.transform_records(rul_rows))
+    else:
+        probabilities, rul = np.zeros(0), np.zeros(0)
+    return FleetRiskSnapshot(tail_numbers, probabilities, rul, skipped=skipped,
+                             seconds=time.perf_counter() - start)
+
+
+class FleetRiskService:
+    """Holds the current snapshot and refreshes it on a background thread."""
+    def __init__(self, predictor, store=feature_store, interval=FLEET_RISK_INTERVAL):
+        self.predictor = predictor
+        self.store = store
+        self.interval = interval
+        self.snapshot = None
+        self._refresh_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def refresh(self):
+        """Re-score the fleet now and swap in the new snapshot."""
+        with self._refresh_lock:
+            snapshot = score_fleet(self.predictor, self.store)
+            # Readers keep whichever snapshot they already hold; the swap is atomic
+            self.snapshot = snapshot
+        logger.info("Fleet risk snapshot refreshed: %d aircraft in %.3fs (%d skipped)",
+                    len(snapshot), snapshot.seconds, snapshot.skipped)
+        return snapshot
+
+    def current(self):
+        """The latest snapshot, computed synchronously the first time.
+
+        A failed background refresh keeps the previous snapshot in place;
+        FleetRiskUnavailableError is raised only when there is none yet and
+        scoring the fleet fails.
+        """
+        snapshot = self.snapshot
+        if snapshot is not None:
+            return snapshot
+        try:
+            return self.refresh()
+        except Exception as e:
+            logger.error("Error scoring the fleet for the first snapshot: %s", e, exc_info=True)
+            raise FleetRiskUnavailableError(f"Fleet risk snapshot unavailable: {e}") from e
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.error("Error refreshing fleet risk snapshot: %s", e, exc_info=True)
+            self._stop.wait(self.interval)
+
+    def start(self):
+        """Start the background refresh job (no-op if disabled or already running)."""
+        if self.interval <= 0 or (self._thread is not None and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='fleet-risk', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
@@ -0,0 +1,189 @@
+"""
+Fuel Baseline Module for Aircraft Predictive Maintenance System
+
+The fuel anomaly check compares every prediction with a weather-independent
+baseline (standard temperature, no wind). The baseline only depends on the
+aircraft model, the route and the payload, so instead of a second model call
+per request it is served from a table:
+1. Keys are (aircraft_model, origin, destination, payload bucket); payloads
+   are rounded to the nearest FUEL_PAYLOAD_BUCKET_KG, and requests without a
+   payload use their own bucket (None)
+2. At model load the table is filled for the network's routes and aircraft
+   models with one vectorized model call (up to FUEL_BASELINE_MAX_ENTRIES);
+   a fuel model without an aircraft_model feature gets one entry per route
+   and payload, shared by every aircraft model
+3. Keys outside the precomputed network are computed on first use and
+   memoized (up to FUEL_BASELINE_MAX_ENTRIES)
+4. The table belongs to the loaded fuel model, so a model reload starts from
+   a fresh table
+5. Batch scoring applies the same rule to encoded rows (``baseline_rows``),
+   so a request gets the same baseline from every endpoint; requests without
+   weather are their own baseline everywhere (``has_weather``)
+"""
+
+import itertools
+import logging
+import os
+import threading
+
+import numpy as np
+
+from data_preprocessing import prepare_fuel_features
+from weather_api import AIRPORT_COORDS
+
+logger = logging.getLogger(__name__)
+
+FUEL_PAYLOAD_BUCKET_KG = float(os.environ.get('FUEL_PAYLOAD_BUCKET_KG', 100))
+FUEL_BASELINE_MAX_PAYLOAD_KG = float(os.environ.get('FUEL_BASELINE_MAX_PAYLOAD_KG', 20000))
+FUEL_BASELINE_MAX_ENTRIES = int(os.environ.get('FUEL_BASELINE_MAX_ENTRIES', 1000000))
+# Comma-separated ORIGIN-DESTINATION pairs and aircraft models to precompute;
+# default to every pair of known airports and the fleet's aircraft models
+FUEL_BASELINE_ROUTES = os.environ.get('FUEL_BASELINE_ROUTES', '')
+FUEL_BASELINE_AIRCRAFT_MODELS = os.environ.get('FUEL_BASELINE_AIRCRAFT_MODELS', 'A320,A321,B737,B787,E190')
+
+
+def network_routes(spec=FUEL_BASELINE_ROUTES):
+    """(origin, destination) pairs of the network."""
+    if spec:
+        return [tuple(route.strip().upper().split('-', 1)) for route in spec.split(',') if '-' in route]
+    return list(itertools.permutations(AIRPORT_COORDS, 2))
+
+
+def network_aircraft_models(pipeline, spec=FUEL_BASELINE_AIRCRAFT_MODELS):
+    """Aircraft models to precompute.
+
+    [None] when the fuel model does not use the aircraft model; otherwise the
+    configured fleet together with the models the fuel pipeline was fitted on.
+    """
+    if 'aircraft_model' not in pipeline.feature_names:
+        return [None]
+    names = [name.strip() for name in spec.split(',') if name.strip()]
+    encoder = pipeline.label_encoders.get('aircraft_model')
+    if encoder is not None and encoder.n_hash_buckets is None and encoder.classes_ is not None:
+        names += [str(name) for name in encoder.classes_ if str(name) not in names]
+    return names
+
+
+def payload_bucket(payload_weight, bucket_kg=FUEL_PAYLOAD_BUCKET_KG):
+    """Bucket index of a payload (None when the request has no payload)."""
+    if payload_weight is None:
+        return None
+    return int(round(float(payload_weight) / bucket_kg))
+
+
+class BaselineFuelTable:
+    """Memoized weather-independent baseline fuel of one loaded fuel model.
+
+    Parameters
+    ----------
+    model : estimator
+        Fitted fuel model with a ``predict`` method
+    pipeline : FeatureProcessor
+        The model's fitted preprocessing pipeline
+    baseline_weather : dict
+        Standard weather features used for the baseline
+    bucket_kg : float, default=FUEL_PAYLOAD_BUCKET_KG
+        Payload bucket width
+    """
+    def __init__(self, model, pipeline, baseline_weather, bucket_kg=FUEL_PAYLOAD_BUCKET_KG,
+                 max_entries=FUEL_BASELINE_MAX_ENTRIES):
+        self.model = model
+        self.pipeline = pipeline
+        self.baseline_weather = dict(baseline_weather)
+        self.bucket_kg = bucket_kg
+        self.max_entries = max_entries
+        # Without an aircraft_model feature the baseline is the same for every model
+        self.uses_aircraft_model = 'aircraft_model' in pipeline.feature_names
+        self._table = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._table)
+
+    def key(self, aircraft_model, origin, destination, payload_weight=None):
+        """Table key of a request."""
+        return (aircraft_model if self.uses_aircraft_model else None, origin, destination,
+                payload_bucket(payload_weight, self.bucket_kg))
+
+    def has_weather(self, X):
+        """Whether each encoded row has weather, i.e. whether it has a weather-independent baseline."""
+        columns = [self.pipeline.feature_names.index(name) for name in self.baseline_weather
+                   if name in self.pipeline.feature_names]
+        return np.isfinite(X[:, columns]).any(axis=1)
+
+    def baseline_rows(self, X):
+        """Baseline rows of encoded fuel feature rows: standard weather and bucketed payload.
+
+        Scoring them gives the values ``get`` returns for the same requests.
+        """
+        X = np.array(X, dtype=np.float64, copy=True)
+        names = self.pipeline.feature_names
+        for name, value in self.baseline_weather.items():
+            if name in names:
+                X[:, names.index(name)] = self.pipeline.encode_value(name, value)
+        if 'payload_weight' in names:
+            j = names.index('payload_weight')
+            payloads = np.round(self.pipeline.decode_column('payload_weight', X[:, j]) / self.bucket_kg) * self.bucket_kg
+            X[:, j] = self.pipeline.encode_column('payload_weight', payloads)
+        return X
+
+    def _base_row(self, aircraft_model, origin, destination):
+        """Encoded baseline row of a route without payload."""
+        request = {'aircraft_model': aircraft_model, 'origin': origin, 'destination': destination}
+        return self.pipeline.transform_records([prepare_fuel_features(request, self.baseline_weather)])
+
+    def _score(self, base_rows, buckets):
+        """Score each base row at each payload bucket (NaN bucket = no payload) in one call."""
+        X = np.repeat(base_rows, len(buckets), axis=0)
+        if 'payload_weight' in self.pipeline.feature_names:
+            payloads = np.array([np.nan if b is None else b * self.bucket_kg for b in buckets])
+            j = self.pipeline.feature_names.index('payload_weight')
+            X[:, j] = np.tile(self.pipeline.encode_column('payload_weight', payloads), len(base_rows))
+        return self.model.predict(X).reshape(len(base_rows), len(buckets))
+
+    def precompute(self, aircraft_models, routes, max_payload_kg=FUEL_BASELINE_MAX_PAYLOAD_KG):
+        """Fill the table for every aircraft model, route and payload bucket up to max_payload_kg.
+
+        Stops at ``max_entries``: only the (aircraft model, route) pairs whose
+        payload buckets all fit are precomputed, in the given order.
+        """
+        if not self.uses_aircraft_model:
+            aircraft_models = [None]
+        keys = list(dict.fromkeys(itertools.product(aircraft_models, routes)))
+        buckets = [None] + list(range(payload_bucket(max_payload_kg, self.bucket_kg) + 1))
+        capacity = max(self.max_entries - len(self._table), 0) // len(buckets)
+        if len(keys) > capacity:
+            logger.warning("Baseline fuel table limited to %d entries: precomputing %d of %d aircraft model/route pairs",
+                           self.max_entries, capacity, len(keys))
+            keys = keys[:capacity]
+        if not keys:
+            return 0
+        base_rows = np.vstack([self._base_row(model, origin, destination) for model, (origin, destination) in keys])
+        scores = self._score(base_rows, buckets)
+        table = {}
+        for (model, (origin, destination)), row in zip(keys, scores):
+            table.update(((model, origin, destination, bucket), float(value)) for bucket, value in zip(buckets, row))
+        with self._lock:
+            self._table.update(table)
+        logger.info("Precomputed %d baseline fuel entries for %d aircraft model/route pairs",
+                    len(table), len(keys))
+        return len(table)
+
+    def get(self, aircraft_model, origin, destination, payload_weight=None):
+        """Baseline fuel of a request, computing and memoizing it on a miss."""
+        key = self.key(aircraft_model, origin, destination, payload_weight)
+        value = self._table.get(key)
+        if value is not None:
+            self.hits += 1
+            return value
+        self.misses += 1
+        value = float(self._score(self._base_row(aircraft_model, origin, destination), [key[3]])[0, 0])
+        with self._lock:
+            if len(self._table) < self.max_entries:
+                self._table[key] = value
+        return value
+
+    def stats(self):
+        return {'entries': len(self), 'hits': self.hits, 'misses': self.misses, 'bucket_kg': self.bucket_kg}
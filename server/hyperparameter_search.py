@@ -0,0 +1,243 @@
+"""
+Hyperparameter Search Module for Aircraft Predictive Maintenance System
+
+This module tunes the LightGBM parameters of the failure, RUL and fuel
+models with successive halving:
+1. Sample candidate configurations from the search space
+2. Train every candidate for a small number of boosting rounds, in parallel
+   worker processes, with early stopping on the held-out split
+3. Keep the best 1/eta candidates and retrain them with eta times more
+   rounds, until one rung is left or the round budget is reached
+4. Among the final candidates whose validation loss is within ``tolerance``
+   of the best, pick the one that is cheapest to serve (fewest trees x leaves)
+
+Workers read the LightGBM binary Datasets of the cached feature matrix
+(see model_training.cached_feature_matrix), so features are neither rebuilt
+nor re-binned per candidate. The winning parameters are written as
+<output-dir>/<model>.json, where the training orchestrator picks them up.
+
+Usage:
+    python hyperparameter_search.py --models failure,rul,fuel --workers 4
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import lightgbm as lgb
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+import model_training
+from custom_utils import train_test_split_indices
+
+TUNED_PARAMS_DIR = model_training.MODELS_DIR / 'tuned'
+
+# Dataset-level parameters are fixed so every candidate shares the same binned data
+DATASET_PARAMS = {'max_bin': 255, 'feature_pre_filter': False, 'verbose': -1}
+EARLY_STOPPING_ROUNDS = 20
+
+SEARCH_MODELS = {
+    'failure': {
+        'build': model_training.prepare_failure_training_data,
+        'sources': [model_training.NGAFID_PATH],
+        'params': {},
+        'objective': 'binary',
+        'metric': 'binary_logloss',
+        'stratify': True
+    },
+    'rul': {
+        'build': model_training.prepare_rul_training_data,
+        'sources': [model_training.CMAPSS_PATH],
+        'params': {'rolling_window': model_training.CMAPSS_ROLLING_WINDOW},
+        'objective': 'regression',
+        'metric': 'l2',
+        'stratify': False
+    },
+    'fuel': {
+        'build': model_training.prepare_fuel_training_data,
+        'sources': [model_training.NGAFID_PATH],
+        'params': {},
+        'objective': 'regression',
+        'metric': 'l2',
+        'stratify': False
+    },
+}
+
+
+def sample_config(rng):
+    """Draw one candidate from the search space (sklearn-style LightGBM parameter names)."""
+    return {
+        'learning_rate': float(np.exp(rng.uniform(np.log(0.02), np.log(0.3)))),
+        'num_leaves': int(np.exp(rng.uniform(np.log(8), np.log(128)))),
+        'min_child_samples': int(rng.integers(5, 101)),
+        'colsample_bytree': float(rng.uniform(0.5, 1.0)),
+        'subsample': float(rng.uniform(0.5, 1.0)),
+        'subsample_freq': 1,
+        'reg_lambda': float(np.exp(rng.uniform(np.log(1e-3), np.log(10.0))))
+    }
+
+
+def inference_cost(n_trees, num_leaves):
+    """Serving cost proxy: total leaves evaluated per row across the ensemble."""
+    return int(n_trees) * int(num_leaves)
+
+
+def _evaluate(train_path, valid_path, objective, metric, config, num_boost_round, n_jobs, seed):
+    """Worker: train one candidate on the binary Datasets and return its validation loss."""
+    params = dict(DATASET_PARAMS, objective=objective, metric=metric, num_threads=n_jobs, seed=seed, **config)
+    train = lgb.Dataset(train_path, params=DATASET_PARAMS)
+    valid = lgb.Dataset(valid_path, params=DATASET_PARAMS, reference=train)
+    booster = lgb.train(params, train, num_boost_round=num_boost_round, valid_sets=[valid],
+                        callbacks=[lgb.early_stopping(EARLY_STOPPING_ROUNDS, verbose=False)])
+    best_iteration = booster.best_iteration or booster.current_iteration()
+    return float(booster.best_score['valid_0'][metric]), best_iteration
+
+
+def successive_halving(model_name, n_configs=27, eta=3, min_rounds=50, max_rounds=1000, workers=None,
+                       cores=None, tolerance=0.01, seed=42, use_cache=True):
+    """Tune one model and return the search report.
+
+    Parameters
+    ----------
+    model_name : str
+        One of SEARCH_MODELS
+    n_configs : int, default=27
+        Candidates sampled for the first rung
+    eta : int, default=3
+        Reduction factor: each rung keeps 1/eta candidates with eta x rounds
+    min_rounds, max_rounds : int
+        Boosting round budget of the first and last rungs
+    workers : int, optional
+        Worker processes (defaults to the number of cores)
+    cores : int, optional
+        Cores to split between workers (defaults to os.cpu_count())
+    tolerance : float, default=0.01
+        Relative loss slack within which the cheapest candidate wins
+    seed : int, default=42
+        Seed for sampling, splitting and training
+
+    Returns
+    -------
+    dict
+        ``best_params`` (ready for model_training.train_*_model(params=...)),
+        its loss and cost, and the per-rung history
+    """
+    spec = SEARCH_MODELS[model_name]
+    cores = cores or os.cpu_count() or 1
+    workers = workers or cores
+    n_jobs = max(1, cores // workers)
+    rng = np.random.default_rng(seed)
+
+    X, y, groups, _, entry = model_training.cached_feature_matrix(model_name, spec['sources'], spec['params'],
+                                                                  spec['build'], use_cache)
+    train_idx, valid_idx = train_test_split_indices(len(X), test_size=0.2, random_state=seed, groups=groups,
+                                                    stratify=y if spec['stratify'] else None)
+    X_train, X_valid, y_train, y_valid = X.iloc[train_idx], X.iloc[valid_idx], y.iloc[train_idx], y.iloc[valid_idx]
+    tmp_dir = None
+    if entry is None:
+        tmp_dir = tempfile.TemporaryDirectory(prefix='aircare-search-')
+        entry = tmp_dir.name
+    split_name = f'search-{seed}'
+    train = model_training.lgb_binary_dataset(entry, f'{split_name}-train', X_train, y_train, DATASET_PARAMS)
+    model_training.lgb_binary_dataset(entry, f'{split_name}-valid', X_valid, y_valid, DATASET_PARAMS, reference=train)
+    train_path = str(model_training.lgb_binary_dataset_path(entry, f'{split_name}-train', DATASET_PARAMS))
+    valid_path = str(model_training.lgb_binary_dataset_path(entry, f'{split_name}-valid', DATASET_PARAMS))
+
+    candidates = [{'config': sample_config(rng)} for _ in range(n_configs)]
+    history = []
+    rounds = min_rounds
+    start = time.perf_counter()
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            while True:
+                futures = [pool.submit(_evaluate, train_path, valid_path, spec['objective'], spec['metric'],
+                                       candidate['config'], rounds, n_jobs, seed)
+                           for candidate in candidates]
+                for candidate, future in zip(candidates, futures):
+                    candidate['loss'], candidate['n_trees'] = future.result()
+                    candidate['cost'] = inference_cost(candidate['n_trees'], candidate['config']['num_leaves'])
+                candidates.sort(key=lambda c: c['loss'])
+                history.append({'rounds': rounds, 'candidates': len(candidates),
+                                'best_loss': candidates[0]['loss']})
+                print(f"[{model_name}] rung: {len(candidates)} candidates x {rounds} rounds, "
+                      f"best {spec['metric']} {candidates[0]['loss']:.6g}")
+                if len(candidates) <= eta or rounds >= max_rounds:
+                    break
+                candidates = candidates[:max(1, len(candidates) // eta)]
+                rounds = min(rounds * eta, max_rounds)
+    finally:
+        if tmp_dir is not None:
+            tmp_dir.cleanup()
+
+    # Cheapest model among those (nearly) as accurate as the best
+    best_loss = candidates[0]['loss']
+    limit = best_loss + tolerance * abs(best_loss)
+    winner = min((c for c in candidates if c['loss'] <= limit), key=lambda c: c['cost'])
+    best_params = dict(winner['config'], n_estimators=winner['n_trees'])
+    return {
+        'model': model_name,
+        'metric': spec['metric'],
+        'best_params': best_params,
+        'loss': winner['loss'],
+        'best_loss': best_loss,
+        'inference_cost': winner['cost'],
+        'history': history,
+        'seconds': round(time.perf_counter() - start, 3)
+    }
+
+
+def save_tuned_params(report, output_dir=TUNED_PARAMS_DIR):
+    """Write the winning parameters as <output_dir>/<model>.json."""
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    path = output_dir / f"{report['model']}.json"
+    path.write_text(json.dumps(report['best_params'], indent=2, sort_keys=True))
+    return path
+
+
+def load_tuned_params(model_name, tuned_dir=TUNED_PARAMS_DIR):
+    """Return the tuned parameters of a model, or None if it has not been tuned."""
+    path = Path(tuned_dir) / f'{model_name}.json'
+    if not path.exists():
+        return None
+    return json.loads(path.read_text())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Tune LightGBM parameters with successive halving")
+    parser.add_argument('--models', default=','.join(SEARCH_MODELS), help="Comma-separated models to tune")
+    parser.add_argument('--configs', type=int, default=27, help="Candidates in the first rung")
+    parser.add_argument('--eta', type=int, default=3, help="Successive halving reduction factor")
+    parser.add_argument('--min-rounds', type=int, default=50, help="Boosting rounds in the first rung")
+    parser.add_argument('--max-rounds', type=int, default=1000, help="Boosting round cap")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes")
+    parser.add_argument('--cores', type=int, default=None, help="Cores to split between workers")
+    parser.add_argument('--tolerance', type=float, default=0.01,
+                        help="Relative loss slack within which the cheapest model wins")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output-dir', default=str(TUNED_PARAMS_DIR), help="Where to write <model>.json")
+    args = parser.parse_args(argv)
+
+    names = [name.strip() for name in args.models.split(',') if name.strip()]
+    unknown = [name for name in names if name not in SEARCH_MODELS]
+    if unknown:
+        parser.error(f"Unknown models: {', '.join(unknown)}")
+
+    for name in names:
+        report = successive_halving(name, args.configs, args.eta, args.min_rounds, args.max_rounds, args.workers,
+                                    args.cores, args.tolerance, args.seed)
+        path = save_tuned_params(report, args.output_dir)
+        print(f"[{name}] {report['metric']} {report['loss']:.6g} (best {report['best_loss']:.6g}), "
+              f"{report['best_params']['n_estimators']} trees x {report['best_params']['num_leaves']} leaves, "
+              f"in {report['seconds']:.1f}s -> {path}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,200 @@
+"""
+Incremental Training Module for Aircraft Predictive Maintenance System
+
+This module refreshes a deployed model with newly arrived data instead of
+retraining it from scratch:
+1. The current booster is loaded from the published models version and
+   boosting continues from it (``init_model``) for a few rounds on the new
+   rows only
+2. A validation guard compares the updated model with the previous one on
+   held-out new rows, split like the full trainers do (RUL rows by engine
+   run, so no engine is on both sides); the update is rejected if it is worse
+3. The SHAP explainer is rebuilt only for an accepted update, and the fuel
+   anomaly threshold only when the residual spread has drifted
+4. Accepted updates are written as a new models version (unchanged artifacts
+   are hard-linked) and published like a full retrain
+
+Usage:
+    python incremental_training.py --model fuel --data new_flights.parquet --rounds 50
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+import shap
+from sklearn.metrics import log_loss, mean_squared_error
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+import model_training
+from custom_utils import train_test_split_indices
+from data_preprocessing import FeatureProcessor, cmapss_group_columns
+from training_orchestrator import CURRENT_LINK, VERSIONS_DIRNAME, publish_version
+
+TARGET_COLUMNS = {'failure': 'failure', 'rul': 'RUL', 'fuel': 'fuel_consumed'}
+# Relative change in the residual 90th percentile that triggers a new fuel threshold
+THRESHOLD_DRIFT = 0.1
+
+
+def validation_loss(model_name, model, X, y):
+    """Log loss for the failure classifier, mean squared error for the regressors."""
+    if model_name == 'failure':
+        return float(log_loss(y, model.predict_proba(X)[:, 1], labels=[0, 1]))
+    return float(mean_squared_error(y, model.predict(X)))
+
+
+def _link_or_copy(source, target):
+    try:
+        os.link(source, target)
+    except OSError:
+        shutil.copy2(source, target)
+
+
+def update_model(model_name, new_data, models_root=None, rounds=50, valid_size=0.2, tolerance=0.0,
+                 n_jobs=None, publish=True, seed=42):
+    """Continue boosting a deployed model on new rows and publish it if it validates.
+
+    Parameters
+    ----------
+    model_name : str
+        One of 'failure', 'rul' or 'fuel'
+    new_data : pandas.DataFrame
+        New rows with the model's raw feature columns (categorical columns as
+        labels) and its target column (failure, RUL or fuel_consumed); RUL
+        rows also need their engine run columns (unit, and dataset when known)
+    models_root : str or Path, optional
+        Models directory (defaults to model_training.MODELS_DIR); the
+        version under its current symlink is updated
+    rounds : int, default=50
+        Boosting rounds added to the existing ensemble
+    valid_size : float, default=0.2
+        Share of the new rows held out for the validation guard
+    tolerance : float, default=0.0
+        Relative validation loss increase still accepted
+    publish : bool, default=True
+        Repoint the current symlink at the new version when accepted
+
+    Returns
+    -------
+    dict
+        Update report with ``accepted``, the previous and updated validation
+        losses, what was regenerated and, when accepted, ``models_dir``
+    """
+    start = time.perf_counter()
+    models_root = Path(models_root or model_training.MODELS_DIR)
+    base_dir = models_root / CURRENT_LINK if (models_root / CURRENT_LINK).is_dir() else models_root
+    previous = joblib.load(base_dir / f'{model_name}_model.joblib')
+    feature_names = joblib.load(base_dir / f'{model_name}_feature_names.joblib')
+
+    target = TARGET_COLUMNS[model_name]
+    group_cols = cmapss_group_columns(new_data) if model_name == 'rul' else []
+    missing = [name for name in feature_names + [target] + group_cols if name not in new_data.columns]
+    if missing:
+        raise ValueError(f"New data is missing columns: {', '.join(missing)}")
+    # Encode the raw rows with the deployed model's fitted pipeline
+    pipeline_path = base_dir / f'{model_name}_pipeline.npz'
+    pipeline = FeatureProcessor.load(pipeline_path) if pipeline_path.exists() else FeatureProcessor.identity(feature_names)
+    X = pd.DataFrame(pipeline.transform_frame(new_data[feature_names]), columns=feature_names, index=new_data.index)
+    y = new_data[target]
+    stratify = y.to_numpy() if model_name == 'failure' and y.nunique() > 1 else None
+    groups = new_data.groupby(group_cols, observed=True, sort=False).ngroup().to_numpy() if group_cols else None
+    train_idx, valid_idx = train_test_split_indices(len(X), test_size=valid_size, random_state=seed,
+                                                    groups=groups, stratify=stratify)
+    X_train, X_valid, y_train, y_valid = X.iloc[train_idx], X.iloc[valid_idx], y.iloc[train_idx], y.iloc[valid_idx]
+
+    # Continue boosting from the deployed booster with the same parameters
+    params = previous.get_params()
+    params.update(n_estimators=rounds, n_jobs=n_jobs)
+    updated = type(previous)(**params)
+    updated.fit(X_train, y_train, init_model=previous.booster_)
+
+    report = {
+        'model': model_name,
+        'base_version': base_dir.resolve().name,
+        'new_rows': len(new_data),
+        'rounds': rounds,
+        'trees': updated.booster_.num_trees(),
+        'previous_loss': validation_loss(model_name, previous, X_valid, y_valid),
+        'updated_loss': validation_loss(model_name, updated, X_valid, y_valid),
+        'regenerated': []
+    }
+    limit = report['previous_loss'] * (1 + tolerance)
+    report['accepted'] = bool(report['updated_loss'] <= limit)
+    if not report['accepted']:
+        report['seconds'] = round(time.perf_counter() - start, 3)
+        print(f"Rejected {model_name} update: validation loss {report['updated_loss']:.6g} "
+              f"> previous {report['previous_loss']:.6g}")
+        return report
+
+    # Stage a new version: hard-link unchanged artifacts, write the changed ones
+    version = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S%fZ') + f'-{model_name}-incr'
+    versions_dir = models_root / VERSIONS_DIRNAME
+    staging_dir = versions_dir / f'.{version}.tmp'
+    staging_dir.mkdir(parents=True, exist_ok=True)
+    for artifact in base_dir.iterdir():
+        if artifact.is_file() and artifact.name != 'training_report.json':
+            _link_or_copy(artifact, staging_dir / artifact.name)
+
+    changed = {f'{model_name}_model.joblib': updated}
+    # The explainer embeds the trees, so it is stale once trees are added
+    changed[f'{model_name}_explainer.joblib'] = shap.TreeExplainer(updated)
+    report['regenerated'].append('explainer')
+    if model_name == 'fuel':
+        old_threshold = float(joblib.load(base_dir / 'fuel_threshold.joblib'))
+        new_threshold = float(np.percentile(np.abs(y_valid - updated.predict(X_valid)), 90))
+        if abs(new_threshold - old_threshold) > THRESHOLD_DRIFT * old_threshold:
+            changed['fuel_threshold.joblib'] = new_threshold
+            report['regenerated'].append('threshold')
+        report['fuel_threshold'] = changed.get('fuel_threshold.joblib', old_threshold)
+    for name, value in changed.items():
+        # Replace the hard link rather than writing through it into the base version
+        (staging_dir / name).unlink(missing_ok=True)
+        joblib.dump(value, staging_dir / name)
+
+    report['seconds'] = round(time.perf_counter() - start, 3)
+    (staging_dir / 'training_report.json').write_text(json.dumps({'incremental': report}, indent=2))
+    version_dir = versions_dir / version
+    os.replace(staging_dir, version_dir)
+    report['models_dir'] = str(version_dir)
+    if publish:
+        publish_version(models_root, version_dir)
+    print(f"Accepted {model_name} update: validation loss {report['previous_loss']:.6g} -> "
+          f"{report['updated_loss']:.6g}, {report['trees']} trees, in {report['seconds']:.2f}s")
+    return report
+
+
+def read_table(path):
+    """Read new rows from a Parquet or CSV file."""
+    if str(path).endswith('.parquet'):
+        return pd.read_parquet(path)
+    return pd.read_csv(path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Continue training a deployed model on new data")
+    parser.add_argument('--model', required=True, choices=sorted(TARGET_COLUMNS))
+    parser.add_argument('--data', required=True, help="Parquet or CSV file of new rows (features + target)")
+    parser.add_argument('--models-root', default=None, help="Models directory holding current/")
+    parser.add_argument('--rounds', type=int, default=50, help="Boosting rounds to add")
+    parser.add_argument('--valid-size', type=float, default=0.2, help="Share of new rows held out")
+    parser.add_argument('--tolerance', type=float, default=0.0, help="Accepted relative validation loss increase")
+    parser.add_argument('--n-jobs', type=int, default=None)
+    parser.add_argument('--no-publish', action='store_true', help="Do not repoint the current symlink")
+    args = parser.parse_args(argv)
+
+    report = update_model(args.model, read_table(args.data), args.models_root, args.rounds, args.valid_size,
+                          args.tolerance, args.n_jobs, publish=not args.no_publish)
+    print(json.dumps(report, indent=2, default=str))
+    return 0 if report['accepted'] else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,394 @@
+"""
+HTTP Load Testing Harness for Aircraft Predictive Maintenance System
+
+This module drives the Flask API with a configurable request mix and reports:
+1. Throughput and p50/p95/p99/p999 latency per endpoint
+2. Server-side CPU time and RSS sampled over the run
+3. Requests served per CPU-second, for sizing deployments per core
+
+Scenarios are JSON files (see loadtest_scenarios/) describing concurrency,
+duration and a weighted endpoint mix with payload distributions. By default
+the harness starts a local stub of the OpenWeatherMap API (canned or replayed
+responses) and spawns app.py against it, so runs never hit the real upstream.
+
+Usage:
+    python loadtest.py loadtest_scenarios/dashboard_refresh.json --synthetic-models
+    python loadtest.py loadtest_scenarios/fuel_planning_burst.json --models-dir models
+    python loadtest.py scenario.json --target http://localhost:5200 --server-pid 1234
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import requests
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+PERCENTILES = (50, 95, 99, 99.9)
+
+
+# ---------------------------------------------------------------------------
+# Payload generation
+# ---------------------------------------------------------------------------
+
+def generate_value(spec, rng):
+    """Generate a payload value from a distribution spec.
+
+    Supported specs: literals, lists of specs, nested dicts of specs and the
+    generators {"choice": [...]}, {"uniform": [lo, hi]}, {"randint": [lo, hi]},
+    {"normal": [mean, std]} and {"dict_of": {"count": n, "prefix": "...", "value": spec}}.
+    """
+    if isinstance(spec, dict):
+        if 'choice' in spec:
+            return rng.choice(spec['choice'])
+        if 'uniform' in spec:
+            return rng.uniform(*spec['uniform'])
+        if 'randint' in spec:
+            return rng.randint(*spec['randint'])
+        if 'normal' in spec:
+            return rng.gauss(*spec['normal'])
+        if 'dict_of' in spec:
+            options = spec['dict_of']
+            count = generate_value(options.get('count', 10), rng)
+            return {f"{options.get('prefix', 'key_')}{i}": generate_value(options['value'], rng)
+                    for i in range(int(count))}
+        return {key: generate_value(value, rng) for key, value in spec.items()}
+    if isinstance(spec, list):
+        return [generate_value(value, rng) for value in spec]
+    return spec
+
+
+# ---------------------------------------------------------------------------
+# Weather upstream stub
+# ---------------------------------------------------------------------------
+
+def default_weather_responses():
+    """Canned /weather and /forecast responses shared with the benchmark suite."""
+    from benchmark import current_weather_response, forecast_weather_response
+    return {'weather': current_weather_response(), 'forecast': forecast_weather_response()}
+
+
+def start_weather_stub(responses, latency_ms=0.0):
+    """Serve OpenWeatherMap-shaped responses on a local port.
+
+    ``responses`` maps the endpoint name ("weather" or "forecast") to the JSON
+    body to return, e.g. a response recorded from the real API for replay.
+    Returns the running server; its base URL is ``http://127.0.0.1:<port>``.
+    """
+    bodies = {name: json.dumps(body).encode() for name, body in responses.items()}
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            name = self.path.split('?', 1)[0].rstrip('/').rsplit('/', 1)[-1]
+            body = bodies.get(name)
+            if latency_ms:
+                time.sleep(latency_ms / 1000)
+            self.send_response(200 if body is not None else 404)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body or b'')))
+            self.end_headers()
+            self.wfile.write(body or b'')
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, name='weather-stub', daemon=True).start()
+    return server
+
+
+# ---------------------------------------------------------------------------
+# Server process management and resource sampling
+# ---------------------------------------------------------------------------
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def spawn_server(env_overrides, port, startup_timeout=120):
+    """Start app.py in a subprocess and wait until /health responds."""
+    env = dict(os.environ, PORT=str(port), FLASK_ENV='production', LOG_FILE='', **env_overrides)
+    process = subprocess.Popen([sys.executable, 'app.py'], cwd=os.path.dirname(os.path.abspath(__file__)),
+                               env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.time() + startup_timeout
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Server exited during startup with code {process.returncode}")
+        try:
+            if requests.get(f"http://127.0.0.1:{port}/health", timeout=1).status_code == 200:
+                return process
+        except requests.RequestException:
+            pass
+        time.sleep(0.25)
+    process.terminate()
+    raise RuntimeError("Server did not become healthy in time")
+
+
+def read_process_stats(pid):
+    """Return (cpu_seconds, rss_bytes) for a process, or None if unavailable."""
+    try:
+        import psutil
+        proc = psutil.Process(pid)
+        cpu = proc.cpu_times()
+        return cpu.user + cpu.system, proc.memory_info().rss
+    except ImportError:
+        pass
+    except Exception:
+        return None
+    try:
+        # Fall back to procfs on Linux
+        with open(f'/proc/{pid}/stat') as f:
+            fields = f.read().rsplit(')', 1)[1].split()
+        ticks = os.sysconf('SC_CLK_TCK')
+        cpu_seconds = (int(fields[11]) + int(fields[12])) / ticks
+        rss_bytes = int(fields[21]) * os.sysconf('SC_PAGE_SIZE')
+        return cpu_seconds, rss_bytes
+    except (OSError, IndexError, ValueError):
+        return None
+
+
+class ResourceSampler:
+    """Periodically sample server CPU time and RSS in a background thread."""
+    def __init__(self, pid, interval=0.5):
+        self.pid = pid
+        self.interval = interval
+        self.samples = []
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='resource-sampler', daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            stats = read_process_stats(self.pid)
+            if stats is not None:
+                self.samples.append((time.time(), *stats))
+            self._stop_event.wait(self.interval)
+
+    def summary(self, since=None):
+        """Summarize samples taken at or after ``since`` (e.g. the end of warm-up)."""
+        samples = [s for s in self.samples if since is None or s[0] >= since]
+        if len(samples) < 2:
+            return None
+        (t0, cpu0, _), (t1, cpu1, _) = samples[0], samples[-1]
+        rss = [sample[2] for sample in samples]
+        return {
+            "cpu_seconds": cpu1 - cpu0,
+            "avg_cores_used": (cpu1 - cpu0) / (t1 - t0) if t1 > t0 else 0.0,
+            "rss_start_mb": rss[0] / 2**20,
+            "rss_peak_mb": max(rss) / 2**20,
+            "rss_end_mb": rss[-1] / 2**20
+        }
+
+
+# ---------------------------------------------------------------------------
+# Load generation
+# ---------------------------------------------------------------------------
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def run_scenario(scenario, target, seed=0):
+    """Drive the target with the scenario's request mix.
+
+    Returns per-endpoint latency samples (in ms, measured after warm-up),
+    status code counts and the measured wall-clock window.
+    """
+    mix = scenario['mix']
+    weights = [entry.get('weight', 1) for entry in mix]
+    concurrency = scenario.get('concurrency', 4)
+    warmup = scenario.get('warmup_s', 2)
+    duration = scenario.get('duration_s', 30)
+    think_time = scenario.get('think_time_ms', 0) / 1000
+    timeout = scenario.get('timeout_s', 30)
+
+    latencies = defaultdict(list)
+    statuses = defaultdict(lambda: defaultdict(int))
+    lock = threading.Lock()
+    start = time.time()
+    measure_from = start + warmup
+    stop_at = measure_from + duration
+
+    def worker(worker_id):
+        rng = random.Random(seed + worker_id)
+        session = requests.Session()
+        while True:
+            now = time.time()
+            if now >= stop_at:
+                break
+            entry = rng.choices(mix, weights)[0]
+            payload = generate_value(entry.get('payload'), rng) if 'payload' in entry else None
+            began = time.perf_counter()
+            try:
+                response = session.request(entry.get('method', 'POST'), target + entry['path'],
+                                           json=payload, timeout=timeout)
+                status = str(response.status_code)
+            except requests.RequestException as e:
+                status = type(e).__name__
+            elapsed_ms = (time.perf_counter() - began) * 1000
+            if now >= measure_from:
+                name = entry.get('name', entry['path'])
+                with lock:
+                    latencies[name].append(elapsed_ms)
+                    statuses[name][status] += 1
+            if think_time:
+                time.sleep(think_time)
+
+    threads = [threading.Thread(target=worker, args=(i,), daemon=True) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, statuses, (measure_from, max(time.time(), measure_from))
+
+
+def summarize(latencies, statuses, window):
+    """Build the per-endpoint and overall report."""
+    elapsed = window[1] - window[0]
+    endpoints = {}
+    all_latencies = []
+    for name, values in latencies.items():
+        values.sort()
+        all_latencies.extend(values)
+        endpoints[name] = {
+            "requests": len(values),
+            "throughput_rps": len(values) / elapsed if elapsed else 0.0,
+            "statuses": dict(statuses[name]),
+            **{f"p{str(p).replace('.', '')}_ms": percentile(values, p) for p in PERCENTILES},
+            "max_ms": values[-1]
+        }
+    all_latencies.sort()
+    overall = {
+        "requests": len(all_latencies),
+        "throughput_rps": len(all_latencies) / elapsed if elapsed else 0.0,
+        **{f"p{str(p).replace('.', '')}_ms": percentile(all_latencies, p) for p in PERCENTILES}
+    }
+    return {"duration_s": elapsed, "overall": overall, "endpoints": endpoints}
+
+
+def print_report(report):
+    print(f"\nScenario: {report['scenario']}  ({report['duration_s']:.1f}s measured)")
+    header = f"{'endpoint':<28}{'reqs':>8}{'rps':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'p999':>9}  statuses"
+    print(header)
+    print('-' * len(header))
+    rows = list(report['endpoints'].items()) + [('TOTAL', report['overall'])]
+    for name, stats in rows:
+        if not stats['requests']:
+            continue
+        print(f"{name:<28}{stats['requests']:>8}{stats['throughput_rps']:>9.1f}"
+              f"{stats['p50_ms']:>9.1f}{stats['p95_ms']:>9.1f}{stats['p99_ms']:>9.1f}{stats['p999_ms']:>9.1f}"
+              f"  {stats.get('statuses', '')}")
+    server = report.get('server')
+    if server:
+        print(f"\nServer CPU: {server['cpu_seconds']:.1f}s ({server['avg_cores_used']:.2f} cores avg), "
+              f"RSS start/peak/end: {server['rss_start_mb']:.0f}/{server['rss_peak_mb']:.0f}/{server['rss_end_mb']:.0f} MB")
+        if server.get('requests_per_cpu_second'):
+            print(f"Capacity: {server['requests_per_cpu_second']:.1f} requests per CPU-second")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load test the AirCare prediction API.")
+    parser.add_argument('scenario', help="Path to a scenario JSON file")
+    parser.add_argument('--target', help="Base URL of a running server (default: spawn app.py locally)")
+    parser.add_argument('--server-pid', type=int, help="PID of the running target server, for CPU/RSS sampling")
+    parser.add_argument('--models-dir', help="MODELS_DIR for the spawned server")
+    parser.add_argument('--synthetic-models', action='store_true',
+                        help="Spawn the server with small synthetic models (see benchmark.py)")
+    parser.add_argument('--weather-replay', help="JSON file with recorded {'weather': ..., 'forecast': ...} responses")
+    parser.add_argument('--weather-latency-ms', type=float, default=0.0, help="Added latency for the weather stub")
+    parser.add_argument('--concurrency', type=int, help="Override the scenario concurrency")
+    parser.add_argument('--duration', type=float, help="Override the scenario duration in seconds")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help="Write the report as JSON to this path")
+    args = parser.parse_args(argv)
+
+    with open(args.scenario) as f:
+        scenario = json.load(f)
+    if args.concurrency:
+        scenario['concurrency'] = args.concurrency
+    if args.duration:
+        scenario['duration_s'] = args.duration
+
+    weather_stub = None
+    server_process = None
+    temp_models_dir = None
+    try:
+        target, server_pid = args.target, args.server_pid
+        if target is None:
+            if args.weather_replay:
+                with open(args.weather_replay) as f:
+                    responses = json.load(f)
+            else:
+                responses = default_weather_responses()
+            weather_stub = start_weather_stub(responses, args.weather_latency_ms)
+            # Stub responses must not be kept as real observations in the weather store
+            env = {'OPENWEATHER_BASE_URL': f"http://127.0.0.1:{weather_stub.server_address[1]}",
+                   'WEATHER_STORE_DIR': ''}
+            if args.synthetic_models:
+                from benchmark import build_synthetic_models
+                temp_models_dir = tempfile.mkdtemp(prefix='aircare-loadtest-models-')
+                build_synthetic_models(temp_models_dir)
+                env['MODELS_DIR'] = temp_models_dir
+            elif args.models_dir:
+                env['MODELS_DIR'] = str(Path(args.models_dir).resolve())
+            port = _free_port()
+            server_process = spawn_server(env, port)
+            target, server_pid = f"http://127.0.0.1:{port}", server_process.pid
+
+        sampler = ResourceSampler(server_pid) if server_pid else None
+        if sampler:
+            sampler.start()
+        latencies, statuses, window = run_scenario(scenario, target.rstrip('/'), seed=args.seed)
+        if sampler:
+            sampler.stop()
+
+        report = {"scenario": scenario.get('name', args.scenario), "target": target,
+                  "concurrency": scenario.get('concurrency', 4), **summarize(latencies, statuses, window)}
+        server = sampler.summary(since=window[0]) if sampler else None
+        if server:
+            server['requests_per_cpu_second'] = (report['overall']['requests'] / server['cpu_seconds']
+                                                 if server['cpu_seconds'] else None)
+            report['server'] = server
+        print_report(report)
+        if args.output:
+            with open(args.output, 'w') as f:
+                json.dump(report, f, indent=2)
+            print(f"Report written to {args.output}")
+    finally:
+        if server_process is not None:
+            server_process.terminate()
+            server_process.wait(timeout=10)
+        if weather_stub is not None:
+            weather_stub.shutdown()
+        if temp_models_dir is not None:
+            shutil.rmtree(temp_models_dir, ignore_errors=True)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
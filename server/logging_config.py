@@ -0,0 +1,146 @@
+"""
+Logging Configuration Module for Aircraft Predictive Maintenance System
+
+This module sets up non-blocking, structured logging for the API:
+1. Records are handed to a background thread through a QueueHandler, so
+   request threads never wait on file or console I/O
+2. Records are written as compact, single-line JSON objects (or text lines
+   with structured fields appended as key=value pairs)
+3. Levels are configured per logger, so library DEBUG output stays off
+4. Per-request payload logging is sampled
+
+Environment variables:
+    LOG_LEVEL                 Root level (default INFO)
+    LOG_LEVELS                Per-logger overrides, e.g. "weather_api=DEBUG,urllib3=WARNING"
+    LOG_FILE                  Log file path (default app.log, empty to disable)
+    LOG_FORMAT                "json" (default) or "text"
+    LOG_PAYLOAD_SAMPLE_RATE   Fraction of requests whose payloads are logged (default 0.01)
+"""
+
+import atexit
+import copy
+import datetime
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+
+LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO').upper()
+LOG_FILE = os.environ.get('LOG_FILE', 'app.log')
+LOG_FORMAT = os.environ.get('LOG_FORMAT', 'json').lower()
+LOG_PAYLOAD_SAMPLE_RATE = float(os.environ.get('LOG_PAYLOAD_SAMPLE_RATE', 0.01))
+
+# Noisy third-party loggers are kept quiet unless explicitly overridden
+DEFAULT_LOGGER_LEVELS = {
+    'urllib3': 'WARNING',
+    'requests': 'WARNING',
+    'werkzeug': 'INFO',
+    'shap': 'WARNING',
+    'numba': 'WARNING',
+    'matplotlib': 'WARNING',
+}
+
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+_listener = None
+
+
+class JsonFormatter(logging.Formatter):
+    """Format log records as compact single-line JSON objects.
+
+    Structured fields can be attached to a record with
+    ``logger.info("...", extra={'fields': {...}})``.
+    """
+    def format(self, record):
+        entry = {
+            "ts": datetime.datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        fields = getattr(record, 'fields', None)
+        if fields:
+            entry.update(fields)
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exc_info"] = record.exc_text
+        return json.dumps(entry, default=str, separators=(',', ':'))
+
+
+class TextFormatter(logging.Formatter):
+    """Plain text formatter that appends structured fields as ``key=value`` pairs."""
+    def format(self, record):
+        line = super().format(record)
+        fields = getattr(record, 'fields', None)
+        if not fields:
+            return line
+        pairs = ' '.join(f"{key}={json.dumps(value, default=str, separators=(',', ':'))}"
+                         for key, value in fields.items())
+        head, sep, tail = line.partition('\n')
+        return f"{head} {pairs}{sep}{tail}"
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that only merges message arguments in the calling thread.
+
+    Formatting (JSON encoding) is left to the handlers on the listener thread.
+    """
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def parse_logger_levels(spec):
+    """Parse a "name=LEVEL,name=LEVEL" specification into a dict."""
+    levels = {}
+    for item in (spec or '').split(','):
+        if '=' in item:
+            name, level = item.split('=', 1)
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+def configure_logging():
+    """Configure root logging with a queue-backed, non-blocking handler.
+
+    Safe to call more than once; only the first call installs handlers.
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    formatter = JsonFormatter() if LOG_FORMAT == 'json' else TextFormatter(TEXT_FORMAT)
+    handlers = [logging.StreamHandler()]
+    if LOG_FILE:
+        handlers.append(logging.FileHandler(LOG_FILE))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    log_queue = queue.SimpleQueue()
+    _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(DeferredQueueHandler(log_queue))
+    root.setLevel(LOG_LEVEL)
+
+    levels = dict(DEFAULT_LOGGER_LEVELS)
+    levels.update(parse_logger_levels(os.environ.get('LOG_LEVELS')))
+    for name, level in levels.items():
+        logging.getLogger(name).setLevel(level)
+
+
+def should_log_payload():
+    """Return True if the current request's payloads should be logged."""
+    return LOG_PAYLOAD_SAMPLE_RATE > 0 and random.random() < LOG_PAYLOAD_SAMPLE_RATE
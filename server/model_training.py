@@ -9,20 +9,30 @@ This module handles training of the three main models:
 
 import numpy as np
 import pandas as pd
-from sklearn.model_selection import train_test_split
 import lightgbm as lgb
 import joblib
 import shap
+import hashlib
+import inspect
+import json
+import shutil
+from collections import namedtuple
+from functools import lru_cache
 from pathlib import Path
 
 # Fix the path to data preprocessing
 import os
 import sys
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from custom_utils import train_test_split_indices
 from data_preprocessing import (
     load_cmapss_data, 
     load_ngafid_data, 
-    FeatureProcessor
+    FeatureProcessor,
+    add_rul_labels,
+    add_cmapss_rolling_features,
+    cmapss_group_columns,
+    CMAPSS_ROLLING_WINDOW
 )
 
 # Fix the paths for datasets
@@ -30,12 +40,169 @@ CURRENT_DIR = Path(os.path.dirname(os.path.abspath(__file__)))
 DATA_DIR = CURRENT_DIR / 'data' / 'model' / 'datasets'
 MODELS_DIR = CURRENT_DIR / 'models'
 MODELS_DIR.mkdir(exist_ok=True)
+NGAFID_PATH = DATA_DIR / 'Aviation Maintanance Dataset'
+CMAPSS_PATH = DATA_DIR / 'CMaps'
 
-def train_failure_model(save_model=True):
-    """Train the part failure prediction model using NGAFID data."""
-    # Load and preprocess data with fixed path
-    dataset_path = DATA_DIR / 'Aviation Maintanance Dataset/'
-    data = load_ngafid_data(dataset_path=str(dataset_path) + '/')
+# Prepared feature matrices, keyed by source fingerprints and feature parameters
+TRAINING_CACHE_DIR = Path(os.environ.get('TRAINING_CACHE_DIR', CURRENT_DIR / 'cache' / 'training'))
+# Bump to invalidate every cached feature matrix
+FEATURE_CACHE_VERSION = 2
+
+def source_fingerprint(paths):
+    """Describe source files (recursively for directories) by relative path, size and mtime."""
+    fingerprint = []
+    for path in map(Path, paths):
+        if path.is_dir():
+            files = sorted(p for p in path.rglob('*') if p.is_file() and '.cache' not in p.parts)
+        else:
+            files = [path] if path.exists() else []
+        if not files:
+            fingerprint.append([str(path), None])
+        for file_path in files:
+            stat = file_path.stat()
+            fingerprint.append([str(file_path), stat.st_size, stat.st_mtime_ns])
+    return fingerprint
+
+def feature_cache_key(name, source_paths, params, build):
+    """Hash the sources, feature parameters and feature-building code of a training matrix."""
+    description = {
+        'name': name,
+        'version': FEATURE_CACHE_VERSION,
+        'sources': source_fingerprint(source_paths),
+        'params': params,
+        'code': inspect.getsource(build)
+    }
+    return hashlib.sha256(json.dumps(description, sort_keys=True, default=str).encode()).hexdigest()[:20]
+
+# A prepared training matrix: encoded features, target, split groups (or None),
+# the fitted FeatureProcessor that encoded them and the cache entry (or None)
+TrainingMatrix = namedtuple('TrainingMatrix', ['X', 'y', 'groups', 'pipeline', 'entry'])
+
+def _fit_pipeline(X):
+    """Fit the serving pipeline on raw features and return it with the encoded matrix.
+
+    Trees are invariant to monotonic rescaling, so only categorical encoding
+    is fitted; the matrix is produced by the same transform used at serve time.
+    """
+    pipeline = FeatureProcessor(scale=False).fit(X)
+    return pipeline, pd.DataFrame(pipeline.transform_frame(X), columns=pipeline.feature_names)
+
+def cached_feature_matrix(name, source_paths, params, build, use_cache=True):
+    """Return the prepared TrainingMatrix of a model, building it only on a cache miss.
+
+    ``build(**params)`` must return a raw feature DataFrame (categorical
+    columns as labels), a target Series and per-row group ids for group-aware
+    splitting (or None). The features are encoded by a FeatureProcessor fitted
+    here, which is returned as ``pipeline`` so trainers can save it next to
+    the model. The encoded matrix is stored column-major as .npy files, so on
+    a hit each feature column is a contiguous slice of a read-only memory map
+    and nothing is parsed. ``entry`` is the directory that also holds the
+    pipeline and, for jobs that train through ``lgb.train`` (the
+    hyperparameter search), LightGBM binary datasets of this matrix (see
+    lgb_binary_dataset); it is None when caching is disabled.
+    """
+    if not use_cache:
+        X, y, groups = build(**params)
+        pipeline, X = _fit_pipeline(X)
+        return TrainingMatrix(X, y, groups, pipeline, None)
+    
+    entry = TRAINING_CACHE_DIR / f'{name}-{feature_cache_key(name, source_paths, params, build)}'
+    if (entry / 'meta.json').exists():
+        try:
+            meta = json.loads((entry / 'meta.json').read_text())
+            matrix = np.load(entry / 'X.npy', mmap_mode='r')
+            X = pd.DataFrame(matrix, columns=meta['feature_names'], copy=False)
+            y = pd.Series(np.load(entry / 'y.npy', mmap_mode='r'), name=meta['target'], copy=False)
+            groups = np.load(entry / 'groups.npy', mmap_mode='r') if meta.get('has_groups') else None
+            pipeline = FeatureProcessor.load(entry / 'pipeline.npz')
+            print(f"Loaded cached {name} feature matrix {matrix.shape} from {entry}")
+            return TrainingMatrix(X, y, groups, pipeline, entry)
+        except Exception as e:
+            print(f"Error reading feature cache {entry}: {str(e)}. Rebuilding.")
+    
+    X, y, groups = build(**params)
+    pipeline, X = _fit_pipeline(X)
+    tmp_entry = entry.with_name(f'{entry.name}.{os.getpid()}.tmp')
+    try:
+        tmp_entry.mkdir(parents=True, exist_ok=True)
+        np.save(tmp_entry / 'X.npy', np.asfortranarray(X.to_numpy(dtype=np.float64)))
+        pipeline.save(tmp_entry / 'pipeline.npz')
+        np.save(tmp_entry / 'y.npy', y.to_numpy())
+        if groups is not None:
+            np.save(tmp_entry / 'groups.npy', np.asarray(groups))
+        (tmp_entry / 'meta.json').write_text(json.dumps({
+            'feature_names': X.columns.tolist(), 'target': y.name, 'params': params,
+            'has_groups': groups is not None
+        }))
+        shutil.rmtree(entry, ignore_errors=True)
+        os.replace(tmp_entry, entry)
+        # Drop matrices built from older sources or feature code
+        for stale in TRAINING_CACHE_DIR.glob(f'{name}-*'):
+            if stale != entry:
+                shutil.rmtree(stale, ignore_errors=True)
+    except OSError as e:
+        print(f"Warning: Could not write feature cache {entry}: {str(e)}")
+        shutil.rmtree(tmp_entry, ignore_errors=True)
+        return TrainingMatrix(X, y, groups, pipeline, None)
+    return TrainingMatrix(X, y, groups, pipeline, entry)
+
+def lgb_binary_dataset_path(cache_entry, split_name, params=None):
+    """Path of the binary LightGBM Dataset of one split of a cached matrix."""
+    params_key = hashlib.sha256(json.dumps(params or {}, sort_keys=True).encode()).hexdigest()[:8]
+    return Path(cache_entry) / f'{split_name}-{params_key}.bin'
+
+def lgb_binary_dataset(cache_entry, split_name, X, y, params=None, reference=None):
+    """Return a LightGBM Dataset for one split, loading its binary file when cached.
+
+    Binary datasets skip LightGBM's feature binning entirely. The file name
+    includes the Dataset parameters, since they change the binning; pass the
+    training split as ``reference`` for validation splits so they share its
+    bins.
+
+    Only ``lgb.train`` accepts a Dataset: the train_*_model functions fit the
+    scikit-learn estimators that the predictor and incremental training load,
+    so they bin the memory-mapped matrix once per fit instead.
+    """
+    params = params or {}
+    if cache_entry is None:
+        return lgb.Dataset(X, label=y, params=params, reference=reference, free_raw_data=False)
+    path = lgb_binary_dataset_path(cache_entry, split_name, params)
+    if path.exists():
+        return lgb.Dataset(str(path), params=params)
+    dataset = lgb.Dataset(X, label=y, params=params, reference=reference, free_raw_data=False).construct()
+    tmp_path = path.with_name(f'{path.name}.{os.getpid()}.tmp')
+    dataset.save_binary(str(tmp_path))
+    os.replace(tmp_path, path)
+    return dataset
+
+DEFAULT_LGBM_PARAMS = {
+    'n_estimators': 100,
+    'learning_rate': 0.1,
+    'num_leaves': 31,
+    'random_state': 42
+}
+
+def lgbm_params(params=None, n_jobs=None):
+    """LightGBM estimator parameters: the defaults updated with (tuned) ``params``."""
+    merged = dict(DEFAULT_LGBM_PARAMS)
+    merged.update(params or {})
+    merged['n_jobs'] = n_jobs
+    return merged
+
+@lru_cache(maxsize=None)
+def _load_ngafid_once(dataset_path):
+    return load_ngafid_data(dataset_path=dataset_path)
+
+def load_ngafid_frame():
+    """Load NGAFID data at most once per process; callers get their own copy.
+
+    Worker processes do not share this; see NGAFID_TRAINING_MATRICES.
+    """
+    return _load_ngafid_once(str(NGAFID_PATH) + '/').copy()
+
+def prepare_failure_training_data():
+    """Build the raw feature frame and target of the failure model from NGAFID data."""
+    data = load_ngafid_frame()
     
     # Create target variable based on the actual data structure
     print("Columns available in dataset:", data.columns.tolist())
@@ -88,35 +255,24 @@ def train_failure_model(save_model=True):
     print(f"Using features: {feature_cols}")
     print(f"Target distribution: {data['failure'].value_counts().to_dict()}")
     
-    X = data[feature_cols]
+    X = data[feature_cols].copy()
     y = data['failure']
+    return X, y, None
+
+def failure_training_matrix(use_cache=True):
+    """Prepared TrainingMatrix of the failure model (cached)."""
+    return cached_feature_matrix('failure', [NGAFID_PATH], {}, prepare_failure_training_data, use_cache)
+
+def train_failure_model(save_model=True, use_cache=True, models_dir=None, n_jobs=None, params=None):
+    """Train the part failure prediction model using NGAFID data."""
+    X, y, _, pipeline, _ = failure_training_matrix(use_cache)
     
-    # Split data
-    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-    
-    # Manually handle categorical features
-    if 'before_after' in X_train.columns:
-        # Convert categorical to numeric
-        mapping = {'before': 0, 'same': 1, 'after': 2}
-        X_train['before_after'] = X_train['before_after'].map(mapping)
-        X_test['before_after'] = X_test['before_after'].map(mapping)
-        
-    # Skip using the FeatureProcessor class since it's causing issues
-    # Instead, we'll just ensure all data is numeric
-    for col in X_train.columns:
-        if X_train[col].dtype == object:
-            print(f"Converting column {col} to categorical codes")
-            # For any string columns, convert to category codes
-            X_train[col] = pd.Categorical(X_train[col]).codes
-            X_test[col] = pd.Categorical(X_test[col]).codes
+    # Split data, keeping the failure rate the same in both splits
+    train_idx, test_idx = train_test_split_indices(len(X), test_size=0.2, random_state=42, stratify=y)
+    X_train, X_test, y_train, y_test = X.iloc[train_idx], X.iloc[test_idx], y.iloc[train_idx], y.iloc[test_idx]
     
     # Train model
-    model = lgb.LGBMClassifier(
-        n_estimators=100,
-        learning_rate=0.1,
-        num_leaves=31,
-        random_state=42
-    )
+    model = lgb.LGBMClassifier(**lgbm_params(params, n_jobs))
     model.fit(X_train, y_train)
     
     # Create SHAP explainer
@@ -126,18 +282,18 @@ def train_failure_model(save_model=True):
     feature_names = X_train.columns.tolist()
     
     if save_model:
-        os.makedirs(MODELS_DIR, exist_ok=True)
-        joblib.dump(model, MODELS_DIR / 'failure_model.joblib')
-        joblib.dump(feature_names, MODELS_DIR / 'failure_feature_names.joblib')
-        joblib.dump(explainer, MODELS_DIR / 'failure_explainer.joblib')
+        models_dir = Path(models_dir or MODELS_DIR)
+        models_dir.mkdir(parents=True, exist_ok=True)
+        joblib.dump(model, models_dir / 'failure_model.joblib')
+        joblib.dump(feature_names, models_dir / 'failure_feature_names.joblib')
+        pipeline.save(models_dir / 'failure_pipeline.npz')
+        joblib.dump(explainer, models_dir / 'failure_explainer.joblib')
     
     return model, feature_names, explainer
 
-def train_rul_model(save_model=True):
-    """Train the RUL prediction model using C-MAPSS data."""
-    # Load and preprocess data with fixed path
-    dataset_path = DATA_DIR / 'CMaps/'
-    data = load_cmapss_data(dataset_path=str(dataset_path) + '/')
+def prepare_rul_training_data(rolling_window=CMAPSS_ROLLING_WINDOW):
+    """Build the raw feature frame and RUL target from C-MAPSS data."""
+    data = load_cmapss_data(dataset_path=str(CMAPSS_PATH) + '/')
     
     # Check if required columns exist, generate dummy data if not
     required_columns = ['unit', 'cycle']
@@ -185,14 +341,9 @@ def train_rul_model(save_model=True):
             if col_name not in data.columns:
                 data[col_name] = np.random.uniform(0, 1, size=len(data))
     
-    # Calculate RUL for each engine
-    rul = pd.DataFrame()
+    # Calculate RUL and rolling sensor statistics for each engine run
     try:
-        for unit in data['unit'].unique():
-            unit_data = data[data['unit'] == unit].copy()  # Create explicit copy of the slice
-            max_cycle = unit_data['cycle'].max()
-            unit_data.loc[:, 'RUL'] = max_cycle - unit_data['cycle']  # Use .loc to properly set values
-            rul = pd.concat([rul, unit_data])
+        rul = add_cmapss_rolling_features(add_rul_labels(data), window=rolling_window)
     except Exception as e:
         print(f"Error calculating RUL: {e}. Using original dataframe with random RUL values.")
         # Add random RUL values if calculation fails
@@ -200,29 +351,25 @@ def train_rul_model(save_model=True):
         rul = data.copy()
     
     # Prepare features
-    feature_cols = [col for col in data.columns if 'sensor_' in col or 'op_setting_' in col]
-    X = rul[feature_cols]
+    feature_cols = [col for col in rul.columns if 'sensor_' in col or 'op_setting_' in col]
+    X = rul[feature_cols].copy()
     y = rul['RUL']
+    # One group per engine run, so no engine has cycles on both sides of a split
+    groups = rul.groupby(cmapss_group_columns(rul), observed=True, sort=False).ngroup().to_numpy()
+    return X, y, groups
+
+def train_rul_model(save_model=True, rolling_window=CMAPSS_ROLLING_WINDOW, use_cache=True, models_dir=None,
+                    n_jobs=None, params=None):
+    """Train the RUL prediction model using C-MAPSS data."""
+    X, y, groups, pipeline, _ = cached_feature_matrix('rul', [CMAPSS_PATH], {'rolling_window': rolling_window},
+                                                      prepare_rul_training_data, use_cache)
     
-    # Split data
-    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+    # Split data by engine run
+    train_idx, test_idx = train_test_split_indices(len(X), test_size=0.2, random_state=42, groups=groups)
+    X_train, X_test, y_train, y_test = X.iloc[train_idx], X.iloc[test_idx], y.iloc[train_idx], y.iloc[test_idx]
     
-    # Preprocess features - don't use FeatureProcessor as it's causing issues
-    # Instead, manually ensure all features are numeric
-    for col in X_train.columns:
-        if X_train[col].dtype == object:
-            print(f"Converting column {col} to categorical codes")
-            # For any string columns, convert to category codes
-            X_train[col] = pd.Categorical(X_train[col]).codes
-            X_test[col] = pd.Categorical(X_test[col]).codes
-
     # Train model
-    model = lgb.LGBMRegressor(
-        n_estimators=100,
-        learning_rate=0.1,
-        num_leaves=31,
-        random_state=42
-    )
+    model = lgb.LGBMRegressor(**lgbm_params(params, n_jobs))
     model.fit(X_train, y_train)
     
     # Create SHAP explainer
@@ -232,17 +379,18 @@ def train_rul_model(save_model=True):
     feature_names = X_train.columns.tolist()
 
     if save_model:
-        joblib.dump(model, MODELS_DIR / 'rul_model.joblib')
-        joblib.dump(feature_names, MODELS_DIR / 'rul_feature_names.joblib')
-        joblib.dump(explainer, MODELS_DIR / 'rul_explainer.joblib')
+        models_dir = Path(models_dir or MODELS_DIR)
+        models_dir.mkdir(parents=True, exist_ok=True)
+        joblib.dump(model, models_dir / 'rul_model.joblib')
+        joblib.dump(feature_names, models_dir / 'rul_feature_names.joblib')
+        pipeline.save(models_dir / 'rul_pipeline.npz')
+        joblib.dump(explainer, models_dir / 'rul_explainer.joblib')
 
     return model, feature_names, explainer
 
-def train_fuel_model(save_model=True):
-    """Train the fuel consumption prediction model using flight data."""
-    # Load and preprocess data with fixed path
-    dataset_path = DATA_DIR / 'Aviation Maintanance Dataset/'
-    data = load_ngafid_data(dataset_path=str(dataset_path) + '/')
+def prepare_fuel_training_data():
+    """Build the raw feature frame and fuel target from NGAFID data."""
+    data = load_ngafid_frame()
     
     # Create a fuel consumption estimate based on available data
     print("Creating fuel consumption model with available columns:", data.columns.tolist())
@@ -291,35 +439,24 @@ def train_fuel_model(save_model=True):
             feature_cols.append(col_name)
     
     print(f"Using features for fuel model: {feature_cols}")
-    X = data[feature_cols]
+    X = data[feature_cols].copy()
     y = data['fuel_consumed']
+    return X, y, None
+
+def fuel_training_matrix(use_cache=True):
+    """Prepared TrainingMatrix of the fuel model (cached)."""
+    return cached_feature_matrix('fuel', [NGAFID_PATH], {}, prepare_fuel_training_data, use_cache)
+
+def train_fuel_model(save_model=True, use_cache=True, models_dir=None, n_jobs=None, params=None):
+    """Train the fuel consumption prediction model using flight data."""
+    X, y, _, pipeline, _ = fuel_training_matrix(use_cache)
     
     # Split data
-    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-    
-    # Manually handle categorical features
-    if 'before_after' in X_train.columns:
-        # Convert categorical to numeric
-        mapping = {'before': 0, 'same': 1, 'after': 2}
-        X_train['before_after'] = X_train['before_after'].map(mapping)
-        X_test['before_after'] = X_test['before_after'].map(mapping)
-        
-    # Skip using the FeatureProcessor class since it's causing issues
-    # Instead, we'll just ensure all data is numeric
-    for col in X_train.columns:
-        if X_train[col].dtype == object:
-            print(f"Converting column {col} to categorical codes")
-            # For any string columns, convert to category codes
-            X_train[col] = pd.Categorical(X_train[col]).codes
-            X_test[col] = pd.Categorical(X_test[col]).codes
+    train_idx, test_idx = train_test_split_indices(len(X), test_size=0.2, random_state=42)
+    X_train, X_test, y_train, y_test = X.iloc[train_idx], X.iloc[test_idx], y.iloc[train_idx], y.iloc[test_idx]
     
     # Train model
-    model = lgb.LGBMRegressor(
-        n_estimators=100,
-        learning_rate=0.1,
-        num_leaves=31,
-        random_state=42
-    )
+    model = lgb.LGBMRegressor(**lgbm_params(params, n_jobs))
     model.fit(X_train, y_train)
     
     # Calculate baseline fuel consumption for anomaly detection
@@ -333,22 +470,25 @@ def train_fuel_model(save_model=True):
     feature_names = X_train.columns.tolist()
     
     if save_model:
-        joblib.dump(model, MODELS_DIR / 'fuel_model.joblib')
-        joblib.dump(feature_names, MODELS_DIR / 'fuel_feature_names.joblib')
-        joblib.dump(explainer, MODELS_DIR / 'fuel_explainer.joblib')
-        joblib.dump(threshold, MODELS_DIR / 'fuel_threshold.joblib')
+        models_dir = Path(models_dir or MODELS_DIR)
+        models_dir.mkdir(parents=True, exist_ok=True)
+        joblib.dump(model, models_dir / 'fuel_model.joblib')
+        joblib.dump(feature_names, models_dir / 'fuel_feature_names.joblib')
+        pipeline.save(models_dir / 'fuel_pipeline.npz')
+        joblib.dump(explainer, models_dir / 'fuel_explainer.joblib')
+        joblib.dump(threshold, models_dir / 'fuel_threshold.joblib')
     
     return model, feature_names, explainer, threshold
 
+# Trainer -> builder of its matrix, for the trainers that read NGAFID. Building
+# these matrices in one process parses NGAFID once (see load_ngafid_frame); the
+# orchestrator does that before starting its workers, which then hit the cache
+NGAFID_TRAINING_MATRICES = {
+    'train_failure_model': failure_training_matrix,
+    'train_fuel_model': fuel_training_matrix,
+}
+
 if __name__ == '__main__':
-    # Train all models
-    print("Training failure prediction model...")
-    failure_model, failure_feature_names, failure_explainer = train_failure_model()
-    
-    print("Training RUL prediction model...")
-    rul_model, rul_feature_names, rul_explainer = train_rul_model()
-    
-    print("Training fuel consumption model...")
-    fuel_model, fuel_feature_names, fuel_explainer, fuel_threshold = train_fuel_model()
-    
-    print("All models trained and saved successfully!")
\ No newline at end of file
+    # Train all models concurrently into a new versioned models directory
+    from training_orchestrator import main
+    sys.exit(main())
@@ -0,0 +1,190 @@
+"""
+NDJSON Streaming Scoring Module for Aircraft Predictive Maintenance System
+
+This module scores newline-delimited JSON records as they are read from the
+request body. Records are collected into fixed-size chunks, each chunk is
+scored with a single vectorized model call, and the results for the chunk are
+emitted immediately as NDJSON lines. Memory use is bounded by the chunk size,
+whatever the size of the upload, and clients receive their first results
+while the rest of the body is still being processed.
+
+Each input line is one request object as accepted by the corresponding
+/api/v1/predict/<model> endpoint. Each output line carries the record's
+zero-based ``index`` (and its ``id``/``tail_number`` when present) followed
+by either the prediction fields, with the record's ``missing_features`` as in
+the single-request responses, or an ``error`` message. Output order matches
+input order. If scoring a chunk fails, its records are scored one at a time,
+so a bad record gets its own error line and the stream carries on.
+"""
+
+import logging
+import os
+
+from data_preprocessing import prepare_failure_features, prepare_rul_features, prepare_fuel_features
+from predictor import failure_recommendation, rul_recommendation, top_k_contributions
+from schemas import (FAILURE_REQUEST, RUL_REQUEST, FUEL_REQUEST, RequestDecodeError,
+                     decode_body, encode_payload)
+from weather_api import get_weather, get_route_weather
+
+logger = logging.getLogger(__name__)
+
+NDJSON_MIMETYPE = 'application/x-ndjson'
+STREAM_CHUNK_SIZE = int(os.environ.get('STREAM_CHUNK_SIZE', 1000))
+# Upper bound on client-requested chunk sizes, which bound the memory per stream
+STREAM_MAX_CHUNK_SIZE = int(os.environ.get('STREAM_MAX_CHUNK_SIZE', 10000))
+MAX_LINE_BYTES = int(os.environ.get('STREAM_MAX_LINE_BYTES', 1 << 20))
+STREAM_SCHEMAS = {'failure': FAILURE_REQUEST, 'rul': RUL_REQUEST, 'fuel': FUEL_REQUEST}
+ECHO_FIELDS = ('id', 'tail_number')
+
+
+def iter_lines(stream, max_line_bytes=MAX_LINE_BYTES):
+    """Yield (line, too_long) pairs from a binary stream without buffering the whole body."""
+    while True:
+        line = stream.readline(max_line_bytes)
+        if not line:
+            return
+        too_long = len(line) >= max_line_bytes and not line.endswith(b'\n')
+        if too_long:
+            # Discard the rest of the oversized line
+            while line and not line.endswith(b'\n'):
+                line = stream.readline(max_line_bytes)
+        yield line, too_long
+
+
+class ChunkScorer:
+    """Score chunks of validated records for one model."""
+    def __init__(self, predictor, model_name, top_k=0):
+        self.predictor = predictor
+        self.model_name = model_name
+        self.top_k = top_k
+        # Weather is looked up once per airport (or route) for the whole stream
+        self._weather = {}
+
+    def _airport_weather(self, airport_code):
+        if airport_code not in self._weather:
+            try:
+                self._weather[airport_code] = get_weather(airport_code)
+            except Exception as e:
+                logger.warning("Error fetching weather data for %s: %s", airport_code, e)
+                self._weather[airport_code] = None
+        return self._weather[airport_code]
+
+    def _route_weather(self, origin, destination):
+        key = (origin, destination)
+        if key not in self._weather:
+            self._weather[key] = get_route_weather(origin, destination)
+        return self._weather[key]
+
+    def score(self, records):
+        """Return one result dict per record, in order."""
+        predictor = self.predictor
+        explain = self.top_k > 0
+        if self.model_name == 'failure':
+            pipeline = predictor.failure_pipeline
+            feature_names = predictor.failure_feature_names
+            rows = [prepare_failure_features(r, self._airport_weather(r['airport_code']) if r.get('airport_code') else None)
+                    for r in records]
+            probabilities, shap_values = predictor.predict_failure_batch(predictor.failure_pipeline.transform_records(rows), explain)
+            results = [{"failure_probability": float(p), "recommendation": failure_recommendation(p)}
+                       for p in probabilities]
+        elif self.model_name == 'rul':
+            pipeline = predictor.rul_pipeline
+            feature_names = predictor.rul_feature_names
+            rows = [prepare_rul_features(r) for r in records]
+            rul, shap_values = predictor.predict_rul_batch(predictor.rul_pipeline.transform_records(rows), explain)
+            results = [{"rul_cycles": int(value), "maintenance_recommendation": rul_recommendation(value)}
+                       for value in rul]
+        else:
+            pipeline = predictor.fuel_pipeline
+            feature_names = predictor.fuel_feature_names
+            rows = [prepare_fuel_features(r, self._route_weather(r['origin'], r['destination'])) for r in records]
+            fuel = predictor.predict_fuel_batch(predictor.fuel_pipeline.transform_records(rows), explain)
+            shap_values = fuel['shap_values']
+            results = [
+                {"predicted_fuel": float(predicted), "units": "kg", "high_fuel_flag": bool(flag),
+                 "baseline_fuel": float(baseline), "fuel_difference": float(difference)}
+                for predicted, flag, baseline, difference in zip(
+                    fuel['predicted_fuel'], fuel['high_fuel_flag'], fuel['baseline_fuel'], fuel['fuel_difference'])
+            ]
+
+        for result, row in zip(results, rows):
+            result["missing_features"] = pipeline.missing_features(row)
+        if explain:
+            names, values = top_k_contributions(shap_values, feature_names, self.top_k)
+            for result, row_names, row_values in zip(results, names, values):
+                result["explanation"] = {name: float(value) for name, value in zip(row_names, row_values)}
+        return results
+
+    def score_isolated(self, records):
+        """Score a chunk, falling back to one record at a time if the chunk fails.
+
+        Returns one (result, error) pair per record.
+        """
+        try:
+            return [(result, None) for result in self.score(records)]
+        except Exception as e:
+            logger.warning("Scoring a chunk of %d %s records failed, retrying one by one: %s",
+                           len(records), self.model_name, e)
+        outcomes = []
+        for record in records:
+            try:
+                outcomes.append((self.score([record])[0], None))
+            except Exception as e:
+                outcomes.append((None, f"{type(e).__name__}: {e}"))
+        return outcomes
+
+
+def stream_scores(predictor, model_name, stream, chunk_size=STREAM_CHUNK_SIZE, top_k=0):
+    """Generate NDJSON output, one bytes block per scored chunk."""
+    schema = STREAM_SCHEMAS[model_name]
+    chunk_size = min(max(1, chunk_size), STREAM_MAX_CHUNK_SIZE)
+    scorer = ChunkScorer(predictor, model_name, top_k)
+    pending = []  # (output line header, record or None, error or None)
+
+    def flush():
+        valid = [record for _, record, _ in pending if record is not None]
+        outcomes = iter(scorer.score_isolated(valid)) if valid else iter(())
+        lines = []
+        for header, record, error in pending:
+            line = dict(header)
+            if record is not None:
+                result, error = next(outcomes)
+            if error is not None:
+                line["error"] = error
+            else:
+                line.update(result)
+            lines.append(encode_payload(line)[0])
+        pending.clear()
+        return b'\n'.join(lines) + b'\n'
+
+    try:
+        index = 0
+        for raw_line, too_long in iter_lines(stream):
+            if not too_long and not raw_line.strip():
+                continue
+            header = {"index": index}
+            index += 1
+            record, error = None, None
+            if too_long:
+                error = f"Record exceeds {MAX_LINE_BYTES} bytes"
+            else:
+                try:
+                    record = decode_body(raw_line)
+                except RequestDecodeError as e:
+                    error = str(e)
+                else:
+                    # Invalid records still echo their id so clients can match the error
+                    if isinstance(record, dict):
+                        header.update((field, record[field]) for field in ECHO_FIELDS if field in record)
+                    error = schema.validate(record)
+                    if error is not None:
+                        record = None
+            pending.append((header, record, error))
+            if len(pending) >= chunk_size:
+                yield flush()
+        if pending:
+            yield flush()
+    except Exception as e:
+        # Headers are already sent, so report the failure in-band and stop
+        logger.error("Error while streaming %s scores: %s", model_name, e, exc_info=True)
+        yield encode_payload({"error": str(e), "type": type(e).__name__})[0] + b'\n'
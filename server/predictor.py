@@ -5,189 +5,280 @@ This module handles loading trained models and making predictions
 for failure probability, RUL, and fuel consumption.
 """
 
+import os
 import joblib
+from datetime import date, timedelta
 from pathlib import Path
 import numpy as np
-import pandas as pd
 import logging
-from data_preprocessing import prepare_failure_features, prepare_rul_features, prepare_fuel_features
+from data_preprocessing import (prepare_failure_features, prepare_rul_features, prepare_fuel_features,
+                                FeatureProcessor)
+from feature_store import feature_store
+from fuel_baseline import BaselineFuelTable, network_aircraft_models, network_routes
 
-# Configure logging
-logging.basicConfig(level=logging.INFO, 
-                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-MODELS_DIR = Path('models')
+MODELS_DIR = Path(os.environ.get('MODELS_DIR', 'models'))
+
+# RUL trajectory forecasts: default horizon, fleet-average daily utilization,
+# the RUL treated as 100% health and the RUL at or below which an engine is no-go
+RUL_TRAJECTORY_DAYS = int(os.environ.get('RUL_TRAJECTORY_DAYS', 30))
+DAILY_FLIGHT_HOURS = float(os.environ.get('DAILY_FLIGHT_HOURS', 8.0))
+DAILY_FLIGHT_CYCLES = float(os.environ.get('DAILY_FLIGHT_CYCLES', 4.0))
+RUL_FULL_HEALTH_CYCLES = float(os.environ.get('RUL_FULL_HEALTH_CYCLES', 200))
+RUL_NO_GO_CYCLES = 10  # Matches the critical threshold of rul_recommendation
+
+def resolve_models_dir(models_dir):
+    """Return the published version (<models_dir>/current) when one exists, else models_dir."""
+    current = Path(models_dir) / 'current'
+    return current if current.is_dir() else Path(models_dir)
+
+def load_pipeline(models_dir, model_name, feature_names):
+    """Load <model_name>_pipeline.npz, or a pass-through pipeline for models saved without one."""
+    path = Path(models_dir) / f'{model_name}_pipeline.npz'
+    if not path.exists():
+        logger.warning("No preprocessing pipeline for %s model; using raw numeric features", model_name)
+        return FeatureProcessor.identity(feature_names)
+    pipeline = FeatureProcessor.load(path)
+    if pipeline.feature_names != list(feature_names):
+        raise ValueError(f"{path.name} does not match the {model_name} model's feature columns")
+    return pipeline
 
 class PredictiveMaintenancePredictor:
-    def __init__(self):
+    def __init__(self, models_dir=None):
         logger.info("Initializing PredictiveMaintenancePredictor")
+        self.models_root = models_dir if models_dir is not None else MODELS_DIR
+        models_dir = resolve_models_dir(self.models_root)
+        self.models_dir = models_dir
         try:
             # Load failure prediction model and related objects
             logger.info("Loading failure prediction models and objects")
-            self.failure_model = joblib.load(MODELS_DIR / 'failure_model.joblib')
-            self.failure_feature_names = joblib.load(MODELS_DIR / 'failure_feature_names.joblib')
-            self.failure_explainer = joblib.load(MODELS_DIR / 'failure_explainer.joblib')
+            self.failure_model = joblib.load(models_dir / 'failure_model.joblib')
+            self.failure_feature_names = joblib.load(models_dir / 'failure_feature_names.joblib')
+            self.failure_explainer = joblib.load(models_dir / 'failure_explainer.joblib')
+            self.failure_pipeline = load_pipeline(models_dir, 'failure', self.failure_feature_names)
             
             # Load RUL prediction model and related objects
             logger.info("Loading RUL prediction models and objects")
-            self.rul_model = joblib.load(MODELS_DIR / 'rul_model.joblib')
-            self.rul_feature_names = joblib.load(MODELS_DIR / 'rul_feature_names.joblib')
-            self.rul_explainer = joblib.load(MODELS_DIR / 'rul_explainer.joblib')
+            self.rul_model = joblib.load(models_dir / 'rul_model.joblib')
+            self.rul_feature_names = joblib.load(models_dir / 'rul_feature_names.joblib')
+            self.rul_explainer = joblib.load(models_dir / 'rul_explainer.joblib')
+            self.rul_pipeline = load_pipeline(models_dir, 'rul', self.rul_feature_names)
             
             # Load fuel prediction model and related objects
             logger.info("Loading fuel prediction models and objects")
-            self.fuel_model = joblib.load(MODELS_DIR / 'fuel_model.joblib')
-            self.fuel_feature_names = joblib.load(MODELS_DIR / 'fuel_feature_names.joblib')
-            self.fuel_explainer = joblib.load(MODELS_DIR / 'fuel_explainer.joblib')
-            self.fuel_threshold = joblib.load(MODELS_DIR / 'fuel_threshold.joblib')
+            self.fuel_model = joblib.load(models_dir / 'fuel_model.joblib')
+            self.fuel_feature_names = joblib.load(models_dir / 'fuel_feature_names.joblib')
+            self.fuel_explainer = joblib.load(models_dir / 'fuel_explainer.joblib')
+            self.fuel_pipeline = load_pipeline(models_dir, 'fuel', self.fuel_feature_names)
+            self.fuel_threshold = joblib.load(models_dir / 'fuel_threshold.joblib')
+            self.fuel_baseline = BaselineFuelTable(self.fuel_model, self.fuel_pipeline, FUEL_BASELINE_WEATHER)
             logger.info("All models loaded successfully")
         except Exception as e:
-            logger.error(f"Error initializing predictor: {str(e)}", exc_info=True)
+            logger.error("Error initializing predictor: %s", e, exc_info=True)
             raise
+        
+        # Baseline fuel for the network, in one model call; misses are filled lazily
+        try:
+            self.fuel_baseline.precompute(network_aircraft_models(self.fuel_pipeline), network_routes())
+        except Exception as e:
+            logger.warning("Could not precompute baseline fuel table: %s", e)
 
-    def predict_failure(self, input_json, weather_data=None):
-        """Predict probability of part failure."""
-        logger.info(f"predict_failure called with input: {input_json}")
-        logger.info(f"Weather data: {weather_data}")
+    def reload(self):
+        """Reload every model from the models directory (e.g. a newly published version).
+
+        Models are loaded into a new predictor first, so a failed reload leaves
+        the current models in place; the baseline fuel table is rebuilt.
+        """
+        fresh = PredictiveMaintenancePredictor(self.models_root)
+        self.__dict__.update(fresh.__dict__)
+        logger.info("Reloaded models from %s", self.models_dir)
+        return self.models_dir
+
+    def predict_failure(self, input_json, weather_data=None, explain=True):
+        """Predict probability of part failure. Set explain=False to skip SHAP.
+
+        A request with a ``tail_number`` known to the feature store is
+        completed with the stored attributes, latest readings and rolling
+        sensor statistics.
+        """
+        logger.debug("predict_failure called with input: %s", input_json)
+        logger.debug("Weather data: %s", weather_data)
         
         try:
             # Prepare features
-            logger.info("Preparing features for failure prediction")
+            logger.debug("Preparing features for failure prediction")
+            input_json, rolling = feature_store.with_stored_features(
+                input_json, 'recent_sensor_data', required=('aircraft_model', 'flight_cycles'))
             features = prepare_failure_features(input_json, weather_data)
-            logger.info(f"Prepared features: {features}")
+            features.update(rolling)
+            logger.debug("Prepared features: %s", features)
             
-            # Verify feature names match what the model expects
-            logger.info(f"Expected feature names: {self.failure_feature_names}")
-            missing_features = [f for f in self.failure_feature_names if f not in features]
-            extra_features = [f for f in features.keys() if f not in self.failure_feature_names]
-            if missing_features:
-                logger.warning(f"Missing features: {missing_features}")
-            if extra_features:
-                logger.warning(f"Extra features not expected by model: {extra_features}")
-                
-            features_df = pd.DataFrame([features], columns=self.failure_feature_names)
-            logger.info("Created features DataFrame")
+            # Encode into the model's column order; missing features are NaN and listed in the result
+            features_X = self.failure_pipeline.transform_records([features])
+            logger.debug("Created feature matrix")
             
             # Make prediction
-            logger.info("Making prediction with failure model")
-            failure_prob = self.failure_model.predict_proba(features_df)[0, 1]
-            logger.info(f"Predicted failure probability: {failure_prob}")
+            logger.debug("Making prediction with failure model")
+            failure_prob = self.failure_model.predict_proba(features_X)[0, 1]
+            logger.debug("Predicted failure probability: %s", failure_prob)
             
-            # Get SHAP explanation
-            logger.info("Getting SHAP explanation")
-            shap_values = self.failure_explainer.shap_values(features_df)
-            if isinstance(shap_values, list):  # For binary classification
-                logger.info("Processing SHAP values for binary classification")
-                shap_values = shap_values[1]  # Get values for positive class
+            explanation = {}
+            if explain:
+                # Get SHAP explanation
+                logger.debug("Getting SHAP explanation")
+                shap_values = self.failure_explainer.shap_values(features_X)
+                if isinstance(shap_values, list):  # For binary classification
+                    logger.debug("Processing SHAP values for binary classification")
+                    shap_values = shap_values[1]  # Get values for positive class
+                    
+                # Format explanation
+                logger.debug("Formatting SHAP explanation")
+                explanation = {
+                    name: float(value) 
+                    for name, value in zip(self.failure_feature_names, shap_values[0])
+                }
                 
-            # Format explanation
-            logger.info("Formatting SHAP explanation")
-            explanation = {
-                name: float(value) 
-                for name, value in zip(self.failure_feature_names, shap_values[0])
-            }
-            
-            # Sort explanations by absolute magnitude and get top 5
-            explanation = dict(sorted(
-                explanation.items(),
-                key=lambda x: abs(x[1]),
-                reverse=True
-            )[:5])
+                # Sort explanations by absolute magnitude and get top 5
+                explanation = dict(sorted(
+                    explanation.items(),
+                    key=lambda x: abs(x[1]),
+                    reverse=True
+                )[:5])
             
             # Generate recommendation
-            logger.info("Generating recommendation based on failure probability")
-            if failure_prob >= 0.2:  # 20% threshold for high risk
-                recommendation = "Immediate maintenance check recommended."
-            elif failure_prob >= 0.1:  # 10% threshold for moderate risk
-                recommendation = "Schedule maintenance check within next week."
-            else:
-                recommendation = "No immediate maintenance needed. Perform routine check."
+            logger.debug("Generating recommendation based on failure probability")
+            recommendation = failure_recommendation(failure_prob)
                 
             result = {
                 "failure_probability": float(failure_prob),
                 "explanation": explanation,
-                "recommendation": recommendation
+                "recommendation": recommendation,
+                "missing_features": self.failure_pipeline.missing_features(features)
             }
-            logger.info(f"Returning prediction result: {result}")
+            logger.debug("Returning prediction result: %s", result)
             return result
             
         except Exception as e:
-            logger.error(f"Error in predict_failure: {str(e)}", exc_info=True)
+            logger.error("Error in predict_failure: %s", e, exc_info=True)
             raise
 
-    def predict_rul(self, input_json):
-        """Predict Remaining Useful Life."""
+    def predict_rul(self, input_json, explain=True):
+        """Predict Remaining Useful Life. Set explain=False to skip SHAP.
+
+        As for predict_failure, a known ``tail_number`` pulls stored features,
+        including rolling statistics over the stored reading window. Snapshot
+        requests have no history, so their rolling features are missing (NaN).
+        """
         # Prepare features
+        input_json, rolling = feature_store.with_stored_features(
+            input_json, 'sensor_readings', required=('aircraft_model', 'flight_hours'))
         features = prepare_rul_features(input_json)
-        features_df = pd.DataFrame([features], columns=self.rul_feature_names)
+        features.update(rolling)
+        features_X = self.rul_pipeline.transform_records([features])
         
         # Make prediction
-        rul = self.rul_model.predict(features_df)[0]
+        rul = self.rul_model.predict(features_X)[0]
         
-        # Get SHAP explanation
-        shap_values = self.rul_explainer.shap_values(features_df)
-        
-        # Format explanation
-        explanation = {
-            name: float(value)
-            for name, value in zip(self.rul_feature_names, shap_values[0])
-        }
-        
-        # Sort explanations by absolute magnitude and get top 5
-        explanation = dict(sorted(
-            explanation.items(),
-            key=lambda x: abs(x[1]),
-            reverse=True
-        )[:5])
-        
-        # Generate recommendation based on RUL
-        if rul <= 10:  # Critical
-            recommendation = "Schedule engine overhaul immediately."
-        elif rul <= 50:  # Warning
-            recommendation = f"Plan engine overhaul within next {max(1, int(rul/10))} weeks."
-        else:  # Normal
-            recommendation = "No immediate action needed."
+        explanation = {}
+        if explain:
+            # Get SHAP explanation
+            shap_values = self.rul_explainer.shap_values(features_X)
             
+            # Format explanation
+            explanation = {
+                name: float(value)
+                for name, value in zip(self.rul_feature_names, shap_values[0])
+            }
+            
+            # Sort explanations by absolute magnitude and get top 5
+            explanation = dict(sorted(
+                explanation.items(),
+                key=lambda x: abs(x[1]),
+                reverse=True
+            )[:5])
+        
         return {
             "rul_cycles": int(rul),
             "explanation": explanation,
-            "maintenance_recommendation": recommendation
+            "maintenance_recommendation": rul_recommendation(rul),
+            "missing_features": self.rul_pipeline.missing_features(features)
         }
 
-    def predict_fuel(self, input_json, weather_data=None):
-        """Predict fuel consumption and detect anomalies."""
+    def predict_rul_trajectory(self, input_json, horizon_days=RUL_TRAJECTORY_DAYS, step_days=1,
+                               hours_per_day=DAILY_FLIGHT_HOURS, cycles_per_day=DAILY_FLIGHT_CYCLES,
+                               start_date=None):
+        """Forecast engine health over the coming days with one RUL model call.
+
+        The current RUL is scored once from the request's feature row (stored
+        features for a known tail number, as in predict_rul); each future date
+        then has that RUL minus the cycles flown by then at the given daily
+        utilization (floored at 0). Flight hours and cycles are reported at
+        the same utilization. Returns one dict per date with the projected
+        RUL, the health percentage and the go/no-go flag, in the shape of the
+        client's RulForecastVM.
+        """
+        input_json, rolling = feature_store.with_stored_features(
+            input_json, 'sensor_readings', required=('aircraft_model', 'flight_hours'))
+        features = prepare_rul_features(input_json)
+        features.update(rolling)
+        
+        days = np.arange(0, horizon_days + 1, step_days)
+        flight_hours = float(input_json['flight_hours']) + hours_per_day * days
+        flight_cycles = float(input_json.get('flight_cycles', 0)) + cycles_per_day * days
+        
+        # RUL is counted in cycles, so every cycle flown consumes one
+        current_rul = self.rul_model.predict(self.rul_pipeline.transform_records([features]))[0]
+        rul = np.maximum(current_rul - cycles_per_day * days, 0.0)
+        
+        health = engine_health_percentage(rul)
+        start = date.fromisoformat(start_date) if start_date else date.today()
+        return [
+            {
+                "date": (start + timedelta(days=int(day))).isoformat(),
+                "engineHealthPercentage": float(h),
+                "isOkayToFlight": bool(r > RUL_NO_GO_CYCLES),
+                "rulCycles": int(r),
+                "flightHours": float(hours),
+                "flightCycles": float(cycles)
+            }
+            for day, r, h, hours, cycles in zip(days, rul, health, flight_hours, flight_cycles)
+        ]
+
+    def predict_fuel(self, input_json, weather_data=None, explain=True):
+        """Predict fuel consumption and detect anomalies. Set explain=False to skip SHAP."""
         # Prepare features
         features = prepare_fuel_features(input_json, weather_data)
-        features_df = pd.DataFrame([features], columns=self.fuel_feature_names)
+        features_X = self.fuel_pipeline.transform_records([features])
         
         # Make prediction
-        predicted_fuel = self.fuel_model.predict(features_df)[0]
-        
-        # Get SHAP explanation
-        shap_values = self.fuel_explainer.shap_values(features_df)
+        predicted_fuel = self.fuel_model.predict(features_X)[0]
         
-        # Format explanation
-        explanation = {
-            name: float(value)
-            for name, value in zip(self.fuel_feature_names, shap_values[0] if isinstance(shap_values, list) else shap_values)
-        }
-        
-        # Sort explanations by absolute magnitude and get top 5
-        explanation = dict(sorted(
-            explanation.items(),
-            key=lambda x: abs(x[1]),
-            reverse=True
-        )[:5])
+        # Baseline fuel for this route/aircraft/payload from the memoized table;
+        # without weather data the request is its own baseline (as in predict_fuel_batch)
+        if self.fuel_baseline.has_weather(features_X)[0]:
+            baseline_fuel = self.fuel_baseline.get(input_json['aircraft_model'], input_json['origin'],
+                                                   input_json['destination'], input_json.get('payload_weight'))
+        else:
+            baseline_fuel = predicted_fuel
         
-        # Calculate baseline fuel for this route/aircraft
-        baseline_features = features.copy()
-        if weather_data:  # Remove weather impact for baseline
-            baseline_features['temperature'] = 15  # Standard temperature
-            baseline_features['wind_speed'] = 0
-            baseline_features['wind_direction'] = 0
-        baseline_df = pd.DataFrame([baseline_features], columns=self.fuel_feature_names)
-        baseline_fuel = self.fuel_model.predict(baseline_df)[0]
+        explanation = {}
+        if explain:
+            # Get SHAP explanation
+            shap_values = _shap_matrix(self.fuel_explainer, features_X)
+            
+            # Format explanation
+            explanation = {
+                name: float(value)
+                for name, value in zip(self.fuel_feature_names, shap_values[0])
+            }
+            
+            # Sort explanations by absolute magnitude and get top 5
+            explanation = dict(sorted(
+                explanation.items(),
+                key=lambda x: abs(x[1]),
+                reverse=True
+            )[:5])
         
         # Determine if consumption is abnormally high
         fuel_difference = predicted_fuel - baseline_fuel
@@ -199,8 +290,159 @@ class PredictiveMaintenancePredictor:
             "high_fuel_flag": bool(high_fuel_flag),
             "explanation": explanation,
             "baseline_fuel": float(baseline_fuel),
-            "fuel_difference": float(fuel_difference)
+            "fuel_difference": float(fuel_difference),
+            "missing_features": self.fuel_pipeline.missing_features(features)
+        }
+
+    def predict_fuel_sensitivity(self, input_json, weather_data=None, axes=None):
+        """Predict fuel over a what-if grid of payloads and weather with one model call.
+
+        Parameters
+        ----------
+        input_json : dict
+            Fuel request (aircraft_model, origin, destination, payload_weight)
+        weather_data : dict, optional
+            Current route weather, used for axes that are not swept
+        axes : dict, optional
+            Feature name (one of FUEL_SENSITIVITY_AXES) -> sequence of values
+            to sweep; other axes keep the request's value
+
+        Returns
+        -------
+        dict
+            ``axes`` (name -> values, in grid dimension order),
+            ``predicted_fuel`` (nested lists with one dimension per axis),
+            ``baseline_fuel`` (standard weather, one value per payload) and
+            ``unused_axes`` (swept features the fuel model does not use)
+        """
+        features = prepare_fuel_features(input_json, weather_data)
+        axes = axes or {}
+        grid_axes = {}
+        for name in FUEL_SENSITIVITY_AXES:
+            values = axes.get(name)
+            if values is None:
+                values = [features.get(name, np.nan)]
+            grid_axes[name] = np.asarray(values, dtype=np.float64)
+        shape = tuple(len(values) for values in grid_axes.values())
+        n_points = int(np.prod(shape))
+        payloads = grid_axes['payload_weight']
+        
+        # Grid rows followed by one standard-weather baseline row per payload
+        base = self.fuel_pipeline.transform_records([features])
+        X = np.repeat(base, n_points + len(payloads), axis=0)
+        mesh = np.meshgrid(*grid_axes.values(), indexing='ij')
+        unused = []
+        for (name, values), column in zip(grid_axes.items(), mesh):
+            if name not in self.fuel_feature_names:
+                if name in axes:
+                    unused.append(name)
+                continue
+            j = self.fuel_feature_names.index(name)
+            X[:n_points, j] = self.fuel_pipeline.encode_column(name, column.ravel())
+            if name == 'payload_weight':
+                X[n_points:, j] = self.fuel_pipeline.encode_column(name, payloads)
+            elif name in FUEL_BASELINE_WEATHER:
+                X[n_points:, j] = self.fuel_pipeline.encode_value(name, FUEL_BASELINE_WEATHER[name])
+        scores = self.fuel_model.predict(X)
+        
+        return {
+            "axes": {name: values.tolist() for name, values in grid_axes.items()},
+            "predicted_fuel": scores[:n_points].reshape(shape).tolist(),
+            "baseline_fuel": scores[n_points:].tolist(),
+            "units": "kg",
+            "unused_axes": unused,
+            "missing_features": [name for name in self.fuel_pipeline.missing_features(features) if name not in axes]
         }
 
+    # ------------------------------------------------------------------
+    # Batch scoring on feature matrices
+    # ------------------------------------------------------------------
+    # The *_batch methods take a 2-D float matrix already encoded by the
+    # corresponding *_pipeline (columns in *_feature_names order, NaN for
+    # unavailable features) and score all rows with a single model call.
+
+    def predict_failure_batch(self, X, explain=False):
+        """Return (failure_probabilities, shap_values or None) for a feature matrix."""
+        probabilities = self.failure_model.predict_proba(X)[:, 1]
+        shap_values = _shap_matrix(self.failure_explainer, X) if explain else None
+        return probabilities, shap_values
+
+    def predict_rul_batch(self, X, explain=False):
+        """Return (rul_cycles, shap_values or None) for a feature matrix."""
+        rul = self.rul_model.predict(X)
+        shap_values = _shap_matrix(self.rul_explainer, X) if explain else None
+        return rul, shap_values
+
+    def predict_fuel_batch(self, X, explain=False):
+        """Return a dict of fuel prediction arrays for a feature matrix.
+
+        Baselines follow the rule of predict_fuel's baseline table: rows with
+        weather are scored at standard weather with the payload bucketed (see
+        BaselineFuelTable.baseline_rows), stacked under X so both are
+        evaluated in one model call; rows without weather are their own
+        baseline.
+        """
+        n_rows = X.shape[0]
+        has_weather = self.fuel_baseline.has_weather(X)
+        scores = self.fuel_model.predict(np.vstack([X, self.fuel_baseline.baseline_rows(X[has_weather])]))
+        predicted_fuel = scores[:n_rows]
+        baseline_fuel = predicted_fuel.copy()
+        baseline_fuel[has_weather] = scores[n_rows:]
+        fuel_difference = predicted_fuel - baseline_fuel
+        return {
+            "predicted_fuel": predicted_fuel,
+            "baseline_fuel": baseline_fuel,
+            "fuel_difference": fuel_difference,
+            "high_fuel_flag": fuel_difference > self.fuel_threshold,
+            "shap_values": _shap_matrix(self.fuel_explainer, X) if explain else None
+        }
+
+def failure_recommendation(failure_prob):
+    """Map a failure probability to a maintenance recommendation."""
+    if failure_prob >= 0.2:  # 20% threshold for high risk
+        return "Immediate maintenance check recommended."
+    elif failure_prob >= 0.1:  # 10% threshold for moderate risk
+        return "Schedule maintenance check within next week."
+    return "No immediate maintenance needed. Perform routine check."
+
+def rul_recommendation(rul):
+    """Map a predicted RUL (in cycles) to a maintenance recommendation."""
+    if rul <= 10:  # Critical
+        return "Schedule engine overhaul immediately."
+    elif rul <= 50:  # Warning
+        return f"Plan engine overhaul within next {max(1, int(rul/10))} weeks."
+    return "No immediate action needed."
+
+def engine_health_percentage(rul):
+    """Engine health as the share of RUL_FULL_HEALTH_CYCLES remaining, in [0, 100]."""
+    return np.round(np.clip(np.asarray(rul, dtype=np.float64) / RUL_FULL_HEALTH_CYCLES, 0, 1) * 100, 1)
+
+# Weather used for the weather-independent fuel baseline
+FUEL_BASELINE_WEATHER = {'temperature': 15, 'wind_speed': 0, 'wind_direction': 0}
+
+# Features that can be swept by predict_fuel_sensitivity, in grid dimension order
+FUEL_SENSITIVITY_AXES = ('payload_weight', 'temperature', 'wind_speed', 'wind_direction')
+
+def _shap_matrix(explainer, X):
+    """Return SHAP values as an (n_rows, n_features) matrix for the predicted class."""
+    shap_values = explainer.shap_values(X)
+    if isinstance(shap_values, list):  # For binary classification
+        shap_values = shap_values[1]  # Get values for positive class
+    shap_values = np.asarray(shap_values)
+    if shap_values.ndim == 3:
+        shap_values = shap_values[:, :, 1]
+    return shap_values
+
+def top_k_contributions(shap_values, feature_names, k=5):
+    """Return the k largest SHAP contributions per row, by absolute magnitude.
+
+    Returns (names, values), each of shape (n_rows, k).
+    """
+    k = min(k, shap_values.shape[1])
+    order = np.argsort(-np.abs(shap_values), axis=1, kind='stable')[:, :k]
+    names = np.asarray(feature_names, dtype=object)[order]
+    values = np.take_along_axis(shap_values, order, axis=1)
+    return names, values
+
 # Initialize predictor as a singleton
 predictor = PredictiveMaintenancePredictor()
\ No newline at end of file
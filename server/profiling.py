@@ -0,0 +1,200 @@
+"""
+Request Profiling Module for Aircraft Predictive Maintenance System
+
+This module provides opt-in, per-request profiling for the Flask API.
+A request is profiled when it carries an ``X-Profile`` header or a
+``profile`` query flag, or when it is picked by the configured sampling
+rate. Two profilers are available:
+
+1. cprofile - deterministic cProfile capture, stored as a ``.prof`` pstats file
+2. sample   - stack sampling of the handler thread, stored as ``.collapsed``
+              stacks that can be fed directly to flamegraph.pl or speedscope
+
+Stored profiles are listed and served from the ``/admin/profiles`` endpoints.
+Requests that are not profiled only pay for a header and query lookup.
+
+Access is denied by default: the admin endpoints and client-requested
+profiling require an ``X-Admin-Token`` header matching PROFILE_ADMIN_TOKEN.
+Without a configured token only sampled profiling (PROFILE_SAMPLE_RATE) runs.
+"""
+
+import cProfile
+import hmac
+import itertools
+import logging
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+from flask import Blueprint, abort, g, jsonify, request, send_from_directory
+
+logger = logging.getLogger(__name__)
+
+PROFILE_DIR = Path(os.environ.get('PROFILE_DIR', 'profiles'))
+PROFILE_SAMPLE_RATE = float(os.environ.get('PROFILE_SAMPLE_RATE', 0))
+PROFILE_MAX_FILES = int(os.environ.get('PROFILE_MAX_FILES', 200))
+PROFILE_SAMPLE_INTERVAL = float(os.environ.get('PROFILE_SAMPLE_INTERVAL', 0.001))  # seconds
+# Profiling headers/flags and the admin endpoints require X-Admin-Token to match;
+# when unset they are disabled
+PROFILE_ADMIN_TOKEN = os.environ.get('PROFILE_ADMIN_TOKEN') or None
+
+PROFILER_MODES = ('cprofile', 'sample')
+PROFILE_EXTENSIONS = {'cprofile': '.prof', 'sample': '.collapsed'}
+
+admin_blueprint = Blueprint('profiling_admin', __name__)
+_profile_counter = itertools.count()
+
+
+class StackSampler:
+    """Sample the call stack of a single thread and aggregate collapsed stacks."""
+    def __init__(self, thread_id, interval=PROFILE_SAMPLE_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='profile-sampler', daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{Path(code.co_filename).name}:{code.co_name}")
+                    frame = frame.f_back
+                self.stacks[';'.join(reversed(stack))] += 1
+            self._stop_event.wait(self.interval)
+
+    def dump(self, path):
+        """Write stacks in the collapsed format used by flamegraph tools."""
+        with open(path, 'w') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+def _is_authorized():
+    if PROFILE_ADMIN_TOKEN is None:
+        return False
+    return hmac.compare_digest(request.headers.get('X-Admin-Token', '').encode(), PROFILE_ADMIN_TOKEN.encode())
+
+
+def _requested_mode():
+    """Return the profiler mode for the current request, or None if not profiled."""
+    flag = request.headers.get('X-Profile') or request.args.get('profile')
+    if flag:
+        if not _is_authorized():
+            return None
+        flag = flag.lower()
+        return flag if flag in PROFILER_MODES else 'cprofile'
+    if PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE:
+        return 'cprofile'
+    return None
+
+
+def _prune_old_profiles():
+    profiles = sorted(PROFILE_DIR.glob('*'), key=lambda p: p.stat().st_mtime)
+    for path in profiles[:max(0, len(profiles) - PROFILE_MAX_FILES)]:
+        try:
+            path.unlink()
+        except OSError:
+            pass
+
+
+def _start_profiling():
+    mode = _requested_mode()
+    if mode is None:
+        return
+    if mode == 'sample':
+        profiler = StackSampler(threading.get_ident())
+        profiler.start()
+    else:
+        profiler = cProfile.Profile()
+        profiler.enable()
+    g.profiler = (mode, profiler, time.perf_counter())
+
+
+def _stop_profiling():
+    """Stop the active profiler, if any, and return the stored profile name."""
+    active = g.pop('profiler', None)
+    if active is None:
+        return None
+    mode, profiler, started = active
+    if mode == 'sample':
+        profiler.stop()
+    else:
+        profiler.disable()
+
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    endpoint = (request.endpoint or 'unknown').replace('.', '_')
+    name = f"{time.strftime('%Y%m%d-%H%M%S')}-{endpoint}-{os.getpid()}-{next(_profile_counter)}{PROFILE_EXTENSIONS[mode]}"
+    try:
+        PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+        if mode == 'sample':
+            profiler.dump(PROFILE_DIR / name)
+        else:
+            profiler.dump_stats(PROFILE_DIR / name)
+        _prune_old_profiles()
+    except OSError as e:
+        logger.warning("Could not store profile %s: %s", name, e)
+        return None
+    logger.info("Stored %s profile for %s (%.1f ms): %s", mode, request.path, elapsed_ms, name)
+    return name
+
+
+def _after_request(response):
+    name = _stop_profiling()
+    if name is not None:
+        response.headers['X-Profile-Id'] = name
+    return response
+
+
+def _teardown_request(exc):
+    # Make sure a profiler never outlives its request, even on unhandled errors
+    if 'profiler' in g:
+        _stop_profiling()
+
+
+@admin_blueprint.route('/admin/profiles', methods=['GET'])
+def list_profiles():
+    """List stored request profiles, newest first."""
+    if not _is_authorized():
+        abort(403)
+    profiles = []
+    if PROFILE_DIR.exists():
+        for path in sorted(PROFILE_DIR.glob('*'), key=lambda p: p.stat().st_mtime, reverse=True):
+            stat = path.stat()
+            profiles.append({
+                "name": path.name,
+                "format": "pstats" if path.suffix == '.prof' else "collapsed",
+                "size_bytes": stat.st_size,
+                "created": time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(stat.st_mtime))
+            })
+    return jsonify({"profiles": profiles}), 200
+
+
+@admin_blueprint.route('/admin/profiles/<name>', methods=['GET'])
+def get_profile(name):
+    """Download a stored profile."""
+    if not _is_authorized():
+        abort(403)
+    return send_from_directory(PROFILE_DIR.resolve(), name, as_attachment=True)
+
+
+def init_profiling(app):
+    """Register the profiling hooks and admin endpoints on a Flask app."""
+    app.before_request(_start_profiling)
+    app.after_request(_after_request)
+    app.teardown_request(_teardown_request)
+    app.register_blueprint(admin_blueprint)
@@ -0,0 +1,280 @@
+"""
+Request Schemas and Codecs for Aircraft Predictive Maintenance System
+
+This module replaces per-request ``request.json`` parsing, Python-loop field
+checks and ``jsonify`` with:
+1. Typed request schemas compiled once at import time: required fields are
+   checked with a single set comparison on the fast path, and every declared
+   field present in the body is checked against its type, so malformed
+   values are rejected with a 400 before they reach feature preparation
+2. Fast JSON decoding and encoding (orjson or msgspec when installed,
+   falling back to the standard library)
+3. MessagePack content negotiation on the same routes: bodies sent with a
+   MessagePack Content-Type are decoded as MessagePack, and responses are
+   encoded as MessagePack when the client's Accept header prefers it
+"""
+
+import json
+
+from flask import Response, request
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+JSON_MIMETYPE = 'application/json'
+MSGPACK_MIMETYPES = ('application/msgpack', 'application/x-msgpack', 'application/vnd.msgpack')
+
+
+class RequestDecodeError(ValueError):
+    """Raised when a request body cannot be decoded or is not an object."""
+
+
+class UnsupportedMediaType(ValueError):
+    """Raised when a request uses a content type that cannot be decoded here."""
+
+
+# ---------------------------------------------------------------------------
+# Codecs, chosen once at import time
+# ---------------------------------------------------------------------------
+
+def _json_default(value):
+    # numpy scalars and arrays
+    if hasattr(value, 'tolist'):
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+if orjson is not None:
+    _json_loads = orjson.loads
+
+    def _json_dumps(payload):
+        return orjson.dumps(payload, default=_json_default,
+                            option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+elif msgspec is not None:
+    _json_loads = msgspec.json.Decoder().decode
+    _json_dumps = msgspec.json.Encoder(enc_hook=_json_default).encode
+else:
+    _json_loads = json.loads
+
+    def _json_dumps(payload):
+        return json.dumps(payload, default=_json_default, separators=(',', ':')).encode()
+
+if msgspec is not None:
+    _msgpack_loads = msgspec.msgpack.Decoder().decode
+    _msgpack_dumps = msgspec.msgpack.Encoder(enc_hook=_json_default).encode
+elif msgpack is not None:
+    def _msgpack_loads(body):
+        return msgpack.unpackb(body, raw=False)
+
+    def _msgpack_dumps(payload):
+        return msgpack.packb(payload, default=_json_default, use_bin_type=True)
+else:
+    _msgpack_loads = _msgpack_dumps = None
+
+MSGPACK_AVAILABLE = _msgpack_loads is not None
+
+
+def is_msgpack(mimetype):
+    return mimetype in MSGPACK_MIMETYPES
+
+
+def decode_body(body, mimetype=JSON_MIMETYPE):
+    """Decode a raw request body according to its mimetype."""
+    if not body:
+        return None
+    if is_msgpack(mimetype):
+        if not MSGPACK_AVAILABLE:
+            raise UnsupportedMediaType("MessagePack support is not installed on this server")
+        loads = _msgpack_loads
+    else:
+        loads = _json_loads
+    try:
+        return loads(body)
+    except Exception as e:
+        raise RequestDecodeError(f"Invalid request body: {e}") from e
+
+
+def encode_payload(payload, msgpack_response=False):
+    """Encode a response payload, returning (body, mimetype)."""
+    if msgpack_response and MSGPACK_AVAILABLE:
+        return _msgpack_dumps(payload), MSGPACK_MIMETYPES[0]
+    return _json_dumps(payload), JSON_MIMETYPE
+
+
+def wants_msgpack():
+    """Return True if the current request's Accept header prefers MessagePack."""
+    if not MSGPACK_AVAILABLE:
+        return False
+    accept = request.headers.get('Accept')
+    if not accept or 'msgpack' not in accept:
+        return False
+    return is_msgpack(request.accept_mimetypes.best_match((JSON_MIMETYPE,) + MSGPACK_MIMETYPES))
+
+
+def respond(payload, status=200):
+    """Build a Flask response in the format negotiated with the client."""
+    body, mimetype = encode_payload(payload, wants_msgpack())
+    return Response(body, status=status, mimetype=mimetype)
+
+
+# ---------------------------------------------------------------------------
+# Request schemas
+# ---------------------------------------------------------------------------
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _is_number_map(value):
+    return isinstance(value, dict) and all(_is_number(v) for v in value.values())
+
+
+# Field type -> (check, description used in error messages)
+FIELD_TYPES = {
+    'string': (lambda value: isinstance(value, str), "a string"),
+    'number': (_is_number, "a number"),
+    'string_or_number': (lambda value: isinstance(value, str) or _is_number(value), "a string or a number"),
+    'sensor_map': (_is_number_map, "an object of numeric sensor readings"),
+}
+
+
+class RequestSchema:
+    """Compiled description of a JSON object request body.
+
+    Parameters
+    ----------
+    name : str
+        Schema name, used in logs
+    required : sequence of str
+        Required top-level fields, in the order they are reported when missing
+    optional : sequence of str, default=()
+        Known optional fields (unknown fields are allowed and not checked)
+    lookup_key : str, optional
+        Field (e.g. tail_number) that lets the other required fields come
+        from the feature store; bodies carrying it are checked after lookup
+    types : dict, optional
+        Field name -> FIELD_TYPES key; declared fields present in a body must
+        match their type
+    """
+    def __init__(self, name, required, optional=(), lookup_key=None, types=None):
+        self.name = name
+        self.required = tuple(required)
+        self.optional = tuple(optional)
+        self.lookup_key = lookup_key
+        self.types = dict(types or {})
+        self._required_set = frozenset(self.required)
+        self._checks = tuple((field,) + FIELD_TYPES[kind] for field, kind in self.types.items())
+
+    def validate(self, data):
+        """Return an error message for an invalid body, or None if it is valid."""
+        if not isinstance(data, dict):
+            return "Request body must be a JSON object"
+        if not self._required_set.issubset(data.keys()) and (
+                self.lookup_key is None or data.get(self.lookup_key) is None):
+            # Slow path: report the first missing field in declaration order
+            for field in self.required:
+                if field not in data:
+                    return f"Missing required field: {field}"
+        for field, check, description in self._checks:
+            if field in data and not check(data[field]):
+                return f"Invalid field {field}: expected {description}"
+        return None
+
+
+def parse_request(schema):
+    """Decode and validate the current request body against ``schema``.
+
+    Returns (data, error_response). Exactly one of the two is None; the
+    error response is ready to be returned from a view.
+    """
+    try:
+        data = decode_body(request.get_data(cache=False), request.mimetype)
+    except UnsupportedMediaType as e:
+        return None, respond({"error": str(e)}, 415)
+    except RequestDecodeError as e:
+        return None, respond({"error": str(e)}, 400)
+    error = schema.validate(data)
+    if error is not None:
+        return None, respond({"error": error}, 400)
+    return data, None
+
+
+# Types of the fields shared by the request schemas
+FIELD_DECLARATIONS = {
+    'tail_number': 'string',
+    'aircraft_model': 'string',
+    'airport_code': 'string',
+    'origin': 'string',
+    'destination': 'string',
+    'flight_cycles': 'number',
+    'flight_hours': 'number',
+    'payload_weight': 'number',
+    'cycle': 'number',
+    'timestamp': 'string_or_number',
+    'recent_sensor_data': 'sensor_map',
+    'sensor_readings': 'sensor_map',
+}
+
+
+def _declared_types(*fields):
+    return {field: FIELD_DECLARATIONS[field] for field in fields if field in FIELD_DECLARATIONS}
+
+
+FAILURE_REQUEST = RequestSchema(
+    'failure',
+    required=('aircraft_model', 'flight_cycles', 'airport_code'),
+    optional=('recent_sensor_data',),
+    types=_declared_types('aircraft_model', 'flight_cycles', 'airport_code', 'recent_sensor_data', 'tail_number')
+)
+
+RUL_REQUEST = RequestSchema(
+    'rul',
+    required=('aircraft_model', 'flight_hours'),
+    optional=('sensor_readings',),
+    types=_declared_types('aircraft_model', 'flight_hours', 'sensor_readings', 'tail_number')
+)
+
+FUEL_REQUEST = RequestSchema(
+    'fuel',
+    required=('aircraft_model', 'origin', 'destination'),
+    optional=('payload_weight',),
+    types=_declared_types('aircraft_model', 'origin', 'destination', 'payload_weight')
+)
+
+# Single-request endpoints also accept a tail number known to the feature store
+# in place of the aircraft fields and sensor readings
+FAILURE_LOOKUP_REQUEST = RequestSchema(
+    'failure',
+    required=FAILURE_REQUEST.required,
+    optional=FAILURE_REQUEST.optional + ('tail_number',),
+    lookup_key='tail_number',
+    types=FAILURE_REQUEST.types
+)
+
+RUL_LOOKUP_REQUEST = RequestSchema(
+    'rul',
+    required=RUL_REQUEST.required,
+    optional=RUL_REQUEST.optional + ('tail_number',),
+    lookup_key='tail_number',
+    types=RUL_REQUEST.types
+)
+
+READINGS_REQUEST = RequestSchema(
+    'readings',
+    required=('tail_number',),
+    optional=('cycle', 'timestamp', 'sensor_readings', 'aircraft_model', 'flight_hours', 'flight_cycles'),
+    types=_declared_types('tail_number', 'cycle', 'timestamp', 'sensor_readings', 'aircraft_model',
+                          'flight_hours', 'flight_cycles')
+)
@@ -0,0 +1,32 @@
+"""
+Shared pytest setup for the server tests.
+
+Server modules are flat and import each other by name, so the server
+directory is put on sys.path. The predictor singleton loads its models at
+import time; small synthetic models (see benchmark.build_synthetic_models)
+are trained into a temporary MODELS_DIR before any test module is imported,
+and the weather API, weather store, log file and fleet risk job are kept
+offline.
+"""
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+SERVER_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(SERVER_DIR))
+
+_tmp_dir = Path(tempfile.mkdtemp(prefix='aircare-tests-'))
+os.environ['MODELS_DIR'] = str(_tmp_dir / 'models')
+os.environ['WEATHER_STORE_DIR'] = str(_tmp_dir / 'weather_history')
+os.environ['PROFILE_DIR'] = str(_tmp_dir / 'profiles')
+os.environ['OPENWEATHER_BASE_URL'] = 'http://127.0.0.1:9'
+os.environ['FLEET_RISK_INTERVAL'] = '0'
+os.environ['FUEL_BASELINE_ROUTES'] = 'JFK-LAX'
+os.environ['LOG_FILE'] = ''
+os.environ.setdefault('LOG_LEVEL', 'WARNING')
+
+from benchmark import build_synthetic_models  # noqa: E402
+
+build_synthetic_models(os.environ['MODELS_DIR'], n_rows=500, n_estimators=20)
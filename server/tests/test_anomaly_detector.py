@@ -0,0 +1,107 @@
+import numpy as np
+import pytest
+
+from anomaly_detector import MAD_TO_STD, MONITORED_SENSORS, StreamingAnomalyDetector
+
+
+def sequential_reference(values, alpha, threshold, warmup):
+    """Per-reading loop of the detector's update rule for one aircraft and sensor."""
+    mean = mad = 0.0
+    count = 0
+    scores, alerts = [], []
+    for value in values:
+        residual = value - mean
+        scale = MAD_TO_STD * mad
+        score = abs(residual) / scale if scale > 0 else (np.inf if residual != 0 else 0.0)
+        ready = count >= warmup
+        scores.append(score)
+        alerts.append(ready and score > threshold)
+        if count == 0:
+            mean, mad = value, 0.0
+        else:
+            limit = threshold * scale if ready and scale > 0 else np.inf
+            clipped = min(max(residual, -limit), limit)
+            mean += alpha * clipped
+            mad += alpha * (abs(clipped) - mad)
+        count += 1
+    return np.array(scores), np.array(alerts), mean, mad
+
+
+def test_default_sensors_match_client_keys():
+    detector = StreamingAnomalyDetector()
+    reading = {'oilPressure': 40.0, 'engineVibration': 2.0, 'cylinderHeadTemperature': 180.0, 'unknown': 1.0}
+    values = detector.readings_matrix([reading, {'oil_pressure': 41.0, 'cht': 181.0}])
+    assert set(reading) - {'unknown'} <= set(MONITORED_SENSORS)
+    j = MONITORED_SENSORS.index('oilPressure')
+    assert values[0, j] == 40.0 and values[1, j] == 41.0
+    assert values[1, MONITORED_SENSORS.index('cylinderHeadTemperature')] == 181.0
+    assert np.isnan(values[1, MONITORED_SENSORS.index('engineVibration')])
+
+
+def test_interleaved_batch_matches_sequential_updates():
+    rng = np.random.default_rng(0)
+    tails = ['N1', 'N2', 'N3']
+    n = 120
+    series = {tail: 100.0 * (i + 1) + rng.normal(size=n) for i, tail in enumerate(tails)}
+    series['N2'][80] += 50.0  # Spike after warmup
+    series['N3'][10] += 50.0  # Spike during warmup
+    alpha, threshold, warmup = 0.1, 5.0, 20
+
+    # Readings arrive interleaved and unevenly, in a few large batches
+    arrivals = [tail for tail in tails for _ in range(n)]
+    rng.shuffle(arrivals)
+    position = dict.fromkeys(tails, 0)
+    stream = []
+    for tail in arrivals:
+        stream.append((tail, series[tail][position[tail]], position[tail]))
+        position[tail] += 1
+
+    detector = StreamingAnomalyDetector(sensors=('egt',), alpha=alpha, threshold=threshold, warmup=warmup)
+    alerts = []
+    for start in range(0, len(stream), 97):
+        batch = stream[start:start + 97]
+        alerts += detector.update([tail for tail, _, _ in batch], [{'egt': value} for _, value, _ in batch],
+                                  timestamps=[k for _, _, k in batch])
+
+    expected_alerts = set()
+    for tail in tails:
+        scores, flags, mean, mad = sequential_reference(series[tail], alpha, threshold, warmup)
+        expected_alerts |= {(tail, k) for k in np.flatnonzero(flags)}
+        state = detector.state(tail)['egt']
+        assert state['readings'] == n
+        assert state['mean'] == pytest.approx(mean, rel=1e-12)
+        assert state['std'] == pytest.approx(MAD_TO_STD * mad, rel=1e-9)
+    assert {(alert['tail_number'], alert['timestamp']) for alert in alerts} == expected_alerts
+    assert ('N2', 80) in expected_alerts
+    assert not any(tail == 'N3' and k < warmup for tail, k in expected_alerts)
+
+
+def test_warmup_suppresses_alerts():
+    detector = StreamingAnomalyDetector(sensors=('egt',), warmup=5, threshold=3.0)
+    values = [10.0, 10.1, 9.9, 10.0, 500.0]
+    assert detector.update(['N1'] * len(values), np.array(values)[:, None]) == []
+    assert detector.state('N1')['egt']['readings'] == 5
+
+
+def test_huberised_update_clips_spikes():
+    alpha, threshold = 0.1, 4.0
+    detector = StreamingAnomalyDetector(sensors=('egt',), alpha=alpha, threshold=threshold, warmup=10)
+    rng = np.random.default_rng(1)
+    detector.update(['N1'] * 200, (50.0 + rng.normal(size=200))[:, None])
+    before = detector.state('N1')['egt']
+
+    alerts = detector.update(['N1'], np.array([[1e6]]))
+    after = detector.state('N1')['egt']
+    assert len(alerts) == 1 and alerts[0]['expected'] == pytest.approx(before['mean'])
+    # The spike moves the mean by at most alpha * threshold * std, not alpha * 1e6
+    assert after['mean'] - before['mean'] == pytest.approx(alpha * threshold * before['std'])
+    assert after['std'] < 1.5 * before['std']
+
+
+def test_missing_readings_leave_state_alone():
+    detector = StreamingAnomalyDetector(sensors=('egt', 'cht'), warmup=0)
+    detector.update(['N1', 'N1'], [{'egt': 1.0}, {'egt': 2.0, 'cht': 5.0}])
+    state = detector.state('N1')
+    assert state['egt']['readings'] == 2
+    assert state['cht'] == {'mean': 5.0, 'std': 0.0, 'readings': 1}
+    assert detector.state('N2') is None
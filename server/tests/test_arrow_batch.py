@@ -0,0 +1,105 @@
+import io
+import json
+
+import numpy as np
+import pyarrow as pa
+import pytest
+
+import ndjson_stream
+from arrow_batch import MISSING_FEATURES_KEY, read_ipc_stream, score_table, write_ipc_stream
+from data_preprocessing import prepare_failure_features, prepare_fuel_features, prepare_rul_features
+from predictor import predictor
+
+SENSORS = ['oil_pressure', 'engine_vibration', 'cht', 'egt', 'oil_temperature']
+
+
+def _requests(n=25, seed=0):
+    rng = np.random.default_rng(seed)
+    requests = []
+    for i in range(n):
+        readings = {name: float(rng.normal()) for name in SENSORS if rng.random() > 0.2}
+        weather = None
+        if i % 3:
+            # Synthetic models are trained on standard normal features
+            weather = {name: float(rng.normal()) for name in ('temperature', 'humidity', 'wind_speed', 'wind_direction')}
+        requests.append({
+            'tail_number': f'T{i}',
+            'aircraft_model': 'A320',
+            'flight_cycles': float(rng.integers(0, 5000)),
+            'flight_hours': float(rng.normal()),
+            'recent_sensor_data': readings,
+            'sensor_readings': readings,
+            'origin': 'JFK',
+            'destination': 'LAX',
+            'payload_weight': None if i % 5 == 0 else float(rng.normal()),
+            'weather': weather,
+        })
+    return requests
+
+
+def _fuel_request(request):
+    return {key: request[key] for key in ('aircraft_model', 'origin', 'destination', 'payload_weight')
+            if request[key] is not None}
+
+
+def _round_trip(model_name, rows, **kwargs):
+    """Score rows of raw features through an Arrow IPC request/response round trip."""
+    names = list(dict.fromkeys(name for row in rows for name in row))
+    table = pa.table({name: [row.get(name) for row in rows] for name in names})
+    table = read_ipc_stream(write_ipc_stream(table))
+    return read_ipc_stream(write_ipc_stream(score_table(predictor, model_name, table, **kwargs)))
+
+
+def test_failure_and_rul_batches_match_single_requests():
+    requests = _requests()
+    failure = _round_trip('failure', [prepare_failure_features(r, r['weather']) for r in requests],
+                          top_k=0)
+    expected = [predictor.predict_failure(r, r['weather'], explain=False)['failure_probability'] for r in requests]
+    np.testing.assert_allclose(failure.column('failure_probability').to_numpy(), expected, rtol=1e-12)
+
+    rows = [dict(prepare_rul_features(r), tail_number=r['tail_number']) for r in requests]
+    rul = _round_trip('rul', rows, top_k=2, passthrough=['tail_number'])
+    expected = [predictor.predict_rul(r, explain=False)['rul_cycles'] for r in requests]
+    assert rul.column('rul_cycles').to_pylist() == expected
+    assert rul.column('tail_number').to_pylist() == [r['tail_number'] for r in requests]
+    assert rul.column_names[-4:] == ['explanation_1_feature', 'explanation_1_value',
+                                     'explanation_2_feature', 'explanation_2_value']
+
+
+def test_fuel_baseline_matches_across_endpoints(monkeypatch):
+    # Buckets narrow enough for the synthetic model's payload scale
+    monkeypatch.setattr(predictor.fuel_baseline, 'bucket_kg', 0.5)
+    monkeypatch.setattr(predictor.fuel_baseline, '_table', {})
+    requests = _requests(seed=1)
+    single = [predictor.predict_fuel(_fuel_request(r), r['weather'], explain=False) for r in requests]
+    arrow = _round_trip('fuel', [prepare_fuel_features(_fuel_request(r), r['weather']) for r in requests], top_k=0)
+
+    weather = {(r['origin'], r['destination'], i): r['weather'] for i, r in enumerate(requests)}
+    lines = [json.dumps(dict(_fuel_request(r), id=i)).encode() + b'\n' for i, r in enumerate(requests)]
+    # NDJSON looks weather up per route; serve each record its own weather
+    order = iter(range(len(requests)))
+    monkeypatch.setattr(ndjson_stream.ChunkScorer, '_route_weather',
+                        lambda self, origin, destination: weather[(origin, destination, next(order))])
+    stream = [json.loads(line) for block in ndjson_stream.stream_scores(
+        predictor, 'fuel', io.BytesIO(b''.join(lines)), chunk_size=len(requests))
+        for line in block.splitlines()]
+
+    for name in ('predicted_fuel', 'baseline_fuel', 'fuel_difference', 'high_fuel_flag'):
+        expected = [result[name] for result in single]
+        np.testing.assert_allclose(arrow.column(name).to_numpy(), expected, rtol=1e-12)
+        np.testing.assert_allclose([line[name] for line in stream], expected, rtol=1e-12)
+    # Requests without weather are their own baseline
+    assert all(result['fuel_difference'] == 0 for result, r in zip(single, requests) if r['weather'] is None)
+
+
+def test_missing_features_in_schema_metadata():
+    result = _round_trip('fuel', [{'route_distance': 1000.0, 'payload_weight': 100.0}], top_k=0)
+    assert result.schema.metadata[MISSING_FEATURES_KEY] == b'temperature,wind_speed,wind_direction'
+
+
+def test_unknown_model_and_passthrough_are_rejected():
+    table = pa.table({'route_distance': [1000.0]})
+    with pytest.raises(ValueError):
+        score_table(predictor, 'engine', table)
+    with pytest.raises(ValueError, match='tail_number'):
+        score_table(predictor, 'fuel', table, passthrough=['tail_number'])
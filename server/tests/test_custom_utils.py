@@ -0,0 +1,184 @@
+import subprocess
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from custom_utils import (GroupKFold, KFold, LabelEncoder, StandardScaler, StratifiedKFold,
+                          train_test_split_indices)
+
+
+def _groups(n_groups=37, seed=0):
+    rng = np.random.default_rng(seed)
+    return np.repeat(np.arange(n_groups), rng.integers(1, 30, size=n_groups))
+
+
+@pytest.mark.parametrize('test_size', [0.1, 0.2, 0.5])
+def test_group_split_keeps_groups_together(test_size):
+    groups = _groups()
+    train_idx, test_idx = train_test_split_indices(len(groups), test_size, random_state=1, groups=groups)
+
+    assert not set(groups[train_idx]) & set(groups[test_idx])
+    np.testing.assert_array_equal(np.sort(np.concatenate([train_idx, test_idx])), np.arange(len(groups)))
+    assert len(set(groups[test_idx])) == int(len(set(groups)) * test_size)
+
+
+def test_stratified_split_keeps_class_proportions():
+    y = np.array([0] * 900 + [1] * 100)
+    train_idx, test_idx = train_test_split_indices(len(y), 0.2, random_state=3, stratify=y)
+    assert len(test_idx) == 200
+    assert y[test_idx].sum() == 20
+
+
+def test_split_is_reproducible_and_leaves_global_state_alone():
+    np.random.seed(0)
+    before = np.random.get_state()[1].copy()
+    first = train_test_split_indices(100, random_state=7)
+    second = train_test_split_indices(100, random_state=7)
+    np.testing.assert_array_equal(first[1], second[1])
+    np.testing.assert_array_equal(np.random.get_state()[1], before)
+
+
+@pytest.mark.parametrize('shuffle', [False, True])
+def test_group_kfold_never_splits_a_group(shuffle):
+    groups = _groups()
+    X = np.zeros((len(groups), 2))
+    seen = []
+    for train_idx, test_idx in GroupKFold(n_splits=5, shuffle=shuffle, random_state=0).split(X, groups=groups):
+        assert not set(groups[train_idx]) & set(groups[test_idx])
+        seen.append(test_idx)
+    # Every row is tested exactly once
+    np.testing.assert_array_equal(np.sort(np.concatenate(seen)), np.arange(len(groups)))
+    sizes = [len(test_idx) for test_idx in seen]
+    assert max(sizes) - min(sizes) <= np.bincount(groups).max()
+
+
+def test_group_kfold_requires_enough_groups():
+    with pytest.raises(ValueError):
+        list(GroupKFold(n_splits=5).split(np.zeros((4, 1)), groups=[0, 1, 2, 3]))
+
+
+def test_stratified_and_plain_kfold_cover_every_row():
+    y = np.array([0] * 50 + [1] * 10)
+    X = np.zeros((len(y), 1))
+    for splitter in (KFold(3, shuffle=True, random_state=0), StratifiedKFold(5, shuffle=True, random_state=0)):
+        folds = list(splitter.split(X, y))
+        np.testing.assert_array_equal(np.sort(np.concatenate([test for _, test in folds])), np.arange(len(y)))
+    for _, test_idx in StratifiedKFold(5).split(X, y):
+        assert y[test_idx].sum() == 2
+
+
+def _assert_same_fit(scaler, expected):
+    assert scaler.n_samples_seen_ == expected.n_samples_seen_
+    for attr in ('mean_', 'var_', 'scale_'):
+        np.testing.assert_allclose(getattr(scaler, attr), getattr(expected, attr), rtol=1e-9, atol=1e-12)
+
+
+def _scaler_data(seed=0):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(loc=[1e4, -3.0, 0.0, 7.5], scale=[50.0, 1e-3, 1.0, 2.0], size=(1000, 4))
+    X[:, 2] = 5.0  # Constant column keeps scale 1
+    return X
+
+
+def test_scaler_partial_fit_matches_full_fit():
+    X = _scaler_data()
+    expected = StandardScaler().fit(X)
+    np.testing.assert_allclose(expected.mean_, X.mean(axis=0))
+    np.testing.assert_allclose(expected.var_, X.var(axis=0), rtol=1e-9, atol=1e-18)
+    assert expected.scale_[2] == 1.0
+
+    scaler = StandardScaler()
+    for start, stop in [(0, 1), (1, 17), (17, 500), (500, 500), (500, 1000)]:
+        scaler.partial_fit(X[start:stop])
+    _assert_same_fit(scaler, expected)
+    np.testing.assert_allclose(scaler.transform(X), expected.transform(X), rtol=1e-9, atol=1e-9)
+
+
+def test_scaler_merge_matches_full_fit():
+    X = _scaler_data(1)
+    shards = np.array_split(X, [3, 250, 700])
+    merged = StandardScaler().fit(shards[0])
+    for shard in shards[1:]:
+        merged.merge(StandardScaler().fit(shard))
+    merged.merge(StandardScaler())  # An unfitted scaler is a no-op
+    _assert_same_fit(merged, StandardScaler().fit(X))
+
+
+def test_scaler_without_mean_or_std():
+    X = _scaler_data(2)
+    scaler = StandardScaler(with_mean=False).partial_fit(X[:400]).partial_fit(X[400:])
+    np.testing.assert_array_equal(scaler.mean_, np.zeros(X.shape[1]))
+    np.testing.assert_allclose(scaler.var_, X.var(axis=0), rtol=1e-9, atol=1e-18)
+    scaler = StandardScaler(with_std=False).fit(X)
+    np.testing.assert_array_equal(scaler.scale_, np.ones(X.shape[1]))
+
+
+def test_scaler_transform_keeps_float32():
+    X = _scaler_data(3).astype(np.float32)
+    scaler = StandardScaler().fit(X)
+    scaled = scaler.transform(X)
+    assert scaled.dtype == np.float32
+    np.testing.assert_allclose(scaled[:, [0, 1, 3]].mean(axis=0), 0, atol=1e-3)
+
+
+LABELS = np.array(['B737', 'A320', 'E190', 'A320', 'B787', 'B737'], dtype=object)
+
+
+def test_label_encoder_round_trip():
+    encoder = LabelEncoder().fit(LABELS)
+    codes = encoder.transform(LABELS)
+    np.testing.assert_array_equal(encoder.classes_, ['A320', 'B737', 'B787', 'E190'])
+    np.testing.assert_array_equal(codes, [1, 0, 3, 0, 2, 1])
+    np.testing.assert_array_equal(encoder.inverse_transform(codes), LABELS)
+    np.testing.assert_array_equal(encoder.transform(pd.Series(LABELS)), codes)
+    assert encoder.transform('E190') == 3
+    numeric = LabelEncoder().fit([30, 10, 20])
+    np.testing.assert_array_equal(numeric.inverse_transform(numeric.transform([20, 30])), [20, 30])
+
+
+@pytest.mark.parametrize('handle_unknown, unknown_code', [('value', -1), ('bucket', 4)])
+def test_label_encoder_unseen_labels(handle_unknown, unknown_code):
+    encoder = LabelEncoder(handle_unknown=handle_unknown).fit(LABELS)
+    assert encoder.unknown_code_ == unknown_code
+    codes = encoder.transform(['A320', 'A380', None, 'A380', 'E190'])
+    np.testing.assert_array_equal(codes, [0, unknown_code, unknown_code, unknown_code, 3])
+    # Unknown codes do not invert to a label
+    assert encoder.inverse_transform(codes).tolist() == ['A320', None, None, None, 'E190']
+
+
+def test_label_encoder_unseen_labels_error():
+    encoder = LabelEncoder(handle_unknown='error').fit(LABELS)
+    with pytest.raises(ValueError, match='A380'):
+        encoder.transform(['A320', 'A380'])
+    with pytest.raises(ValueError):
+        encoder.transform(['A320', None])
+    with pytest.raises(ValueError):
+        LabelEncoder(handle_unknown='ignore')
+    with pytest.raises(ValueError):
+        LabelEncoder().transform(['A320'])
+
+
+HASHED = {'N12345': 325, 'N1': 527, 'A320': 267}
+
+
+def test_hash_buckets_are_stable():
+    encoder = LabelEncoder(n_hash_buckets=1024)
+    labels = list(HASHED)
+    # Codes are fixed (saved models depend on them) and do not depend on the other labels
+    assert encoder.transform(labels).tolist() == list(HASHED.values())
+    assert encoder.transform(['N1']).tolist() == [HASHED['N1']]
+    assert encoder.transform(['X', 'N1', 'Y', 'N1'])[[1, 3]].tolist() == [HASHED['N1']] * 2
+    assert encoder.transform([None]).tolist() == [0]
+    codes = encoder.transform([f'N{i}' for i in range(5000)])
+    assert codes.min() >= 0 and codes.max() < 1024
+    with pytest.raises(ValueError):
+        encoder.inverse_transform(codes)
+    # ... and do not depend on the interpreter's string hash seed
+    script = ("from custom_utils import LabelEncoder; "
+              f"print(LabelEncoder(n_hash_buckets=1024).transform({labels!r}).tolist())")
+    output = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True, check=True,
+                            env={'PYTHONHASHSEED': '123', 'PYTHONPATH': str(Path(__file__).resolve().parents[1])}).stdout
+    assert output.strip() == str(list(HASHED.values()))
@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from custom_utils import LabelEncoder
+from data_preprocessing import FeaturePipelineError, FeatureProcessor
+
+
+@pytest.fixture(scope='module')
+def training_frame():
+    rng = np.random.default_rng(0)
+    n = 200
+    return pd.DataFrame({
+        'aircraft_model': rng.choice(['A320', 'B737', 'E190'], n),
+        'tail_number': [f'N{i % 37}' for i in range(n)],
+        'flight_cycles': rng.integers(0, 5000, n),
+        'egt': rng.normal(600, 20, n),
+    })
+
+
+@pytest.fixture(scope='module')
+def pipeline(training_frame):
+    return FeatureProcessor(hash_buckets={'tail_number': 64}).fit(training_frame)
+
+
+RECORDS = [
+    {'aircraft_model': 'A320', 'tail_number': 'N3', 'flight_cycles': 1200, 'egt': 610.5},
+    {'aircraft_model': 'A380', 'tail_number': 'N999', 'flight_cycles': 10, 'egt': None},
+    {'aircraft_model': 'E190', 'flight_cycles': '42', 'extra': 1.0},
+]
+
+
+def test_save_load_round_trip(pipeline, training_frame, tmp_path):
+    path = tmp_path / 'pipeline.npz'
+    pipeline.save(path)
+    loaded = FeatureProcessor.load(path)
+
+    assert loaded.feature_names == pipeline.feature_names
+    assert loaded.categorical_columns == pipeline.categorical_columns
+    np.testing.assert_array_equal(loaded.transform_records(RECORDS), pipeline.transform_records(RECORDS))
+    np.testing.assert_array_equal(loaded.transform_frame(training_frame), pipeline.transform_frame(training_frame))
+    # The matrix path matches the DataFrame transform used at training time
+    np.testing.assert_allclose(pipeline.transform_frame(training_frame),
+                               pipeline.transform(training_frame).to_numpy(np.float64))
+
+
+def test_missing_features_are_reported(pipeline):
+    assert pipeline.missing_features(RECORDS[0]) == []
+    assert pipeline.missing_features(RECORDS[1]) == ['egt']
+    assert pipeline.missing_features(RECORDS[2]) == ['tail_number', 'egt']
+    assert pipeline.missing_columns({'aircraft_model': [], 'egt': []}) == ('tail_number', 'flight_cycles')
+
+    X = pipeline.transform_records(RECORDS)
+    assert np.isnan(X[1:, pipeline.feature_names.index('egt')]).all()
+    with pytest.raises(FeaturePipelineError, match='egt'):
+        pipeline.transform_records(RECORDS[2:], strict=True)
+
+
+def test_unseen_categories_are_encoded(pipeline):
+    X = pipeline.transform_records(RECORDS[:2])
+    model, tail = pipeline.feature_names.index('aircraft_model'), pipeline.feature_names.index('tail_number')
+    encoder = pipeline.label_encoders['aircraft_model']
+    # Unseen aircraft models share the encoder's dedicated bucket
+    assert pipeline.decode_column('aircraft_model', X[1:, model]) == pytest.approx(len(encoder.classes_))
+    # Tail numbers are hashed, so unseen ones get the same stable code as a standalone encoder
+    hashed = LabelEncoder(n_hash_buckets=64).transform(['N3', 'N999'])
+    np.testing.assert_allclose(pipeline.decode_column('tail_number', X[:, tail]), hashed)
@@ -0,0 +1,98 @@
+import numpy as np
+import pytest
+
+from feature_store import (RESYNC_INTERVAL, AircraftFeatureStore, FeatureStoreFullError, IncompleteRequestError,
+                           RollingSensorBuffer)
+
+
+def naive_window_stats(history, window):
+    """Mean, sample std and least-squares slope of each sensor over the last ``window`` readings."""
+    cycles = np.array([cycle for cycle, _ in history[-window:]], dtype=np.float64)
+    values = np.array([row for _, row in history[-window:]], dtype=np.float64)
+    mean, std, slope = [], [], []
+    for column in values.T:
+        present = ~np.isnan(column)
+        x, y = cycles[present], column[present]
+        mean.append(y.mean() if len(y) else np.nan)
+        std.append(y.std(ddof=1) if len(y) > 1 else np.nan)
+        slope.append(np.polyfit(x, y, 1)[0] if len(y) > 1 and np.ptp(x) > 0 else np.nan)
+    return np.array(mean), np.array(std), np.array(slope)
+
+
+@pytest.mark.parametrize('window', [1, 5, 10])
+def test_rolling_buffer_matches_naive_window(window):
+    rng = np.random.default_rng(0)
+    names = ['egt', 'oil_pressure', 'cht']
+    buffer = RollingSensorBuffer(window)
+    history = []
+    for i in range(RESYNC_INTERVAL + 200):
+        # Large offsets and drift exercise the reference-centred sums; some readings are missing
+        row = 1e4 + 0.01 * i + rng.normal(size=len(names))
+        row[rng.random(len(names)) < 0.2] = np.nan
+        cycle = buffer.append({name: value for name, value in zip(names, row) if not np.isnan(value)},
+                              cycle=2 * i)
+        history.append((cycle, row))
+        if i % 97 == 0 or i > RESYNC_INTERVAL:
+            # The buffer orders sensors by first appearance
+            order = [names.index(name) for name in buffer.sensor_names]
+            for got, expected in zip(buffer.stats(), naive_window_stats(history, window)):
+                expected = expected[order]
+                np.testing.assert_allclose(got, expected, rtol=1e-6, atol=1e-8, equal_nan=True)
+
+
+def test_rolling_buffer_adds_new_sensors_with_missing_history():
+    buffer = RollingSensorBuffer(4)
+    buffer.append({'egt': 1.0})
+    buffer.append({'egt': 2.0, 'cht': 5.0})
+    mean, std, slope = buffer.stats()
+    assert buffer.sensor_names == ['egt', 'cht']
+    np.testing.assert_allclose(mean, [1.5, 5.0])
+    assert np.isnan(std[1]) and np.isnan(slope[1])
+    np.testing.assert_allclose(buffer.latest(), [2.0, 5.0])
+
+
+def test_store_completes_requests_from_stored_features():
+    store = AircraftFeatureStore(window=3)
+    for cycle in range(5):
+        store.ingest('N1', {'egt': float(cycle)}, cycle, {'aircraft_model': 'A320', 'flight_hours': 10.0})
+    request, rolling = store.with_stored_features({'tail_number': 'N1'}, 'sensor_readings',
+                                                   required=('aircraft_model', 'flight_hours'))
+    assert request['aircraft_model'] == 'A320'
+    assert request['sensor_readings'] == {'egt': 4.0}
+    assert rolling['egt_roll_mean'] == pytest.approx(3.0)
+    assert rolling['egt_roll_slope'] == pytest.approx(1.0)
+
+    # Request fields win over stored attributes
+    request, _ = store.with_stored_features({'tail_number': 'N1', 'flight_hours': 99.0}, 'sensor_readings')
+    assert request['flight_hours'] == 99.0
+
+    with pytest.raises(IncompleteRequestError):
+        store.with_stored_features({'tail_number': 'N2'}, 'sensor_readings', required=('aircraft_model',))
+
+
+def test_store_ignores_sensors_beyond_whitelist_and_limit():
+    store = AircraftFeatureStore(window=4, sensors=('egt', 'cht', 'oil_pressure'), max_sensors=2)
+    for i in range(10):
+        store.ingest('N1', {'egt': 600.0 + i, f'junk_{i}': 1.0, 'cht': 200.0, 'oil_pressure': 50.0})
+    buffer = store._buffers['N1']
+    assert buffer.sensor_names == ['egt', 'cht']
+    assert buffer.values.shape == (4, 2)
+    assert store.features('N1')['egt'] == 609.0
+    assert 'oil_pressure' not in store.features('N1')
+
+
+def test_store_rejects_aircraft_beyond_capacity():
+    store = AircraftFeatureStore(max_aircraft=2)
+    store.ingest('N1', {'egt': 1.0})
+    store.ingest('N2', attributes={'aircraft_model': 'A320'})
+    with pytest.raises(FeatureStoreFullError):
+        store.ingest('N3', {'egt': 1.0})
+    # Known aircraft still accept readings
+    assert store.ingest('N2', {'egt': 2.0}) == 0
+    # A batch naming too many new aircraft stores none of its records
+    store = AircraftFeatureStore(max_aircraft=2)
+    records = [{'tail_number': name, 'sensor_readings': {'egt': 1.0}} for name in ('N1', 'N2', 'N3')]
+    with pytest.raises(FeatureStoreFullError):
+        store.ingest_records(records)
+    assert len(store) == 0
+    assert store.ingest_records(records[:2]) == [0, 0]
@@ -0,0 +1,128 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import fleet_risk
+from fleet_risk import FleetRiskService, FleetRiskSnapshot, FleetRiskUnavailableError
+
+
+@pytest.fixture(scope='module')
+def fleet():
+    rng = np.random.default_rng(0)
+    n = 500
+    # Rounded values so ties in probability and RUL are common
+    return pd.DataFrame({
+        'tail_number': [f'N{i:04d}' for i in range(n)],
+        'failure_probability': rng.integers(0, 21, n) / 20,
+        'rul_cycles': rng.integers(0, 40, n) * 5.0,
+    })
+
+
+@pytest.fixture(scope='module')
+def snapshot(fleet):
+    return FleetRiskSnapshot(fleet['tail_number'], fleet['failure_probability'], fleet['rul_cycles'],
+                             generated_at=0.0)
+
+
+def _expected(fleet, mask, limit=None):
+    ranked = fleet[mask].sort_values(['failure_probability', 'rul_cycles'], ascending=[False, True], kind='stable')
+    return list(ranked['tail_number'][:limit])
+
+
+@pytest.mark.parametrize('min_probability, max_probability, min_rul, max_rul, limit', [
+    (None, None, None, None, None),
+    (0.5, None, None, None, None),
+    (None, 0.25, None, None, None),
+    (0.3, 0.7, None, None, 15),
+    (None, None, 20, 60, None),
+    (0.55, 0.95, None, 100, None),
+    (0.9, 0.1, None, None, None),
+    (1.5, None, None, None, None),
+    (None, None, 201, None, None),
+    (0.0, 1.0, 0, 195, 0),
+])
+def test_query_matches_pandas_filter(fleet, snapshot, min_probability, max_probability, min_rul, max_rul, limit):
+    p, rul = fleet['failure_probability'], fleet['rul_cycles']
+    mask = pd.Series(True, index=fleet.index)
+    if min_probability is not None:
+        mask &= p >= min_probability
+    if max_probability is not None:
+        mask &= p <= max_probability
+    if min_rul is not None:
+        mask &= rul >= min_rul
+    if max_rul is not None:
+        mask &= rul <= max_rul
+    entries = snapshot.query(min_probability, max_probability, min_rul, max_rul, limit)
+
+    assert [entry['tail_number'] for entry in entries] == _expected(fleet, mask, limit)
+    for entry in entries:
+        assert snapshot.lookup(entry['tail_number']) == entry
+
+
+def test_top_k_and_lookup(fleet, snapshot):
+    ranked = _expected(fleet, pd.Series(True, index=fleet.index))
+    top = snapshot.top_k(7)
+    assert [entry['tail_number'] for entry in top] == ranked[:7]
+    assert [entry['rank'] for entry in top] == list(range(1, 8))
+    assert snapshot.top_k(-1) == []
+    assert len(snapshot.top_k(10 ** 6)) == len(fleet)
+
+    row = fleet.iloc[123]
+    entry = snapshot.lookup(row['tail_number'])
+    assert entry['failure_probability'] == row['failure_probability']
+    assert entry['rul_cycles'] == int(row['rul_cycles'])
+    assert entry['rank'] == ranked.index(row['tail_number']) + 1
+    assert snapshot.lookup('UNKNOWN') is None
+
+
+def test_empty_snapshot():
+    snapshot = FleetRiskSnapshot([], [], [])
+    assert len(snapshot) == 0
+    assert snapshot.top_k() == []
+    assert snapshot.query(min_probability=0.5, max_rul=10) == []
+    assert snapshot.metadata()['fleet_size'] == 0
+
+
+def test_query_rejects_negative_limit(snapshot):
+    with pytest.raises(ValueError):
+        snapshot.query(min_probability=0.5, limit=-1)
+
+
+def _fail_scoring(predictor, store):
+    raise RuntimeError('model unavailable')
+
+
+def test_service_keeps_previous_snapshot_when_refresh_fails(snapshot, monkeypatch):
+    monkeypatch.setattr(fleet_risk, 'score_fleet', _fail_scoring)
+    service = FleetRiskService(predictor=None, interval=0)
+    with pytest.raises(FleetRiskUnavailableError, match='model unavailable'):
+        service.current()
+
+    service.snapshot = snapshot
+    with pytest.raises(RuntimeError):
+        service.refresh()
+    assert service.current() is snapshot
+
+
+@pytest.fixture
+def client(snapshot, monkeypatch):
+    import app as app_module
+    monkeypatch.setattr(app_module.fleet_risk, 'snapshot', snapshot)
+    return app_module.app.test_client()
+
+
+def test_fleet_risk_endpoint_validates_counts(client, fleet):
+    response = client.get('/api/v1/fleet/risk?min_probability=0.5&limit=2')
+    assert response.status_code == 200
+    assert len(response.get_json()['aircraft']) == 2
+    for query in ('min_probability=0.5&limit=-1', 'limit=x', 'top_k=-3'):
+        response = client.get(f'/api/v1/fleet/risk?{query}')
+        assert response.status_code == 400, query
+
+
+def test_fleet_risk_endpoint_without_snapshot(client, monkeypatch):
+    import app as app_module
+    monkeypatch.setattr(fleet_risk, 'score_fleet', _fail_scoring)
+    monkeypatch.setattr(app_module, 'fleet_risk', FleetRiskService(predictor=None, interval=0))
+    assert client.get('/api/v1/fleet/risk').status_code == 503
+    assert client.get('/api/v1/fleet/risk/N1').status_code == 503
@@ -0,0 +1,39 @@
+import pytest
+
+from data_preprocessing import prepare_fuel_features
+from fuel_baseline import BaselineFuelTable, network_aircraft_models
+from predictor import FUEL_BASELINE_WEATHER, predictor
+
+
+@pytest.fixture
+def table():
+    return BaselineFuelTable(predictor.fuel_model, predictor.fuel_pipeline, FUEL_BASELINE_WEATHER)
+
+
+def test_precompute_serves_every_aircraft_model_when_the_model_ignores_it(table):
+    # The synthetic fuel model, like the trained one, has no aircraft_model feature
+    assert network_aircraft_models(predictor.fuel_pipeline) == [None]
+    assert table.precompute(['A320', 'B737'], [('JFK', 'LAX')], max_payload_kg=1000) == 12
+
+    value = table.get('E190', 'JFK', 'LAX', 449)
+    assert table.stats()['hits'] == 1 and table.stats()['misses'] == 0
+    expected = predictor.fuel_model.predict(predictor.fuel_pipeline.transform_records(
+        [prepare_fuel_features({'aircraft_model': 'E190', 'origin': 'JFK', 'destination': 'LAX',
+                                'payload_weight': 400}, FUEL_BASELINE_WEATHER)]))[0]
+    assert value == pytest.approx(expected)
+
+
+def test_misses_are_memoized(table):
+    table.get('A320', 'ORD', 'ATL', 1500)
+    table.get('A320', 'ORD', 'ATL', 1520)
+    assert table.stats()['misses'] == 1 and table.stats()['hits'] == 1
+
+
+def test_precompute_respects_max_entries():
+    table = BaselineFuelTable(predictor.fuel_model, predictor.fuel_pipeline, FUEL_BASELINE_WEATHER,
+                              max_entries=25)
+    routes = [('JFK', 'LAX'), ('LAX', 'JFK'), ('ORD', 'ATL')]
+    # 12 payload buckets per route: only two routes fit
+    assert table.precompute([None], routes, max_payload_kg=1000) == 24
+    assert len(table) <= 25
+    assert table.precompute([None], [('SFO', 'LHR')], max_payload_kg=1000) == 0
@@ -0,0 +1,68 @@
+import io
+import json
+
+import pytest
+
+import ndjson_stream
+from ndjson_stream import stream_scores
+from predictor import predictor
+
+
+def _run(model_name, lines, **kwargs):
+    body = io.BytesIO(b''.join(line if isinstance(line, bytes) else json.dumps(line).encode() + b'\n'
+                               for line in lines))
+    blocks = list(stream_scores(predictor, model_name, body, **kwargs))
+    return blocks, [json.loads(line) for block in blocks for line in block.splitlines()]
+
+
+def test_bad_lines_get_their_own_error_lines():
+    lines = [
+        {'id': 'a', 'aircraft_model': 'A320', 'flight_hours': 1.0},
+        b'{not json\n',
+        b'\n',
+        {'id': 'c', 'aircraft_model': 'A320'},
+        {'id': 'd', 'aircraft_model': 'A320', 'flight_hours': 'many'},
+        {'tail_number': 'N1', 'aircraft_model': 'B737', 'flight_hours': 2.0, 'sensor_readings': {'egt': 0.3}},
+    ]
+    _, out = _run('rul', lines, chunk_size=2)
+
+    # Blank lines are skipped without consuming an index
+    assert [line['index'] for line in out] == [0, 1, 2, 3, 4]
+    assert out[0]['id'] == 'a' and 'rul_cycles' in out[0] and 'error' not in out[0]
+    assert 'error' in out[1] and 'rul_cycles' not in out[1]
+    assert out[2] == {'index': 2, 'id': 'c', 'error': 'Missing required field: flight_hours'}
+    assert out[3]['id'] == 'd' and out[3]['error'].startswith('Invalid field flight_hours')
+    assert out[4]['tail_number'] == 'N1' and 'rul_cycles' in out[4]
+    assert 'egt' not in out[4]['missing_features']
+    assert 'egt' in out[0]['missing_features']
+
+
+def test_scoring_failure_is_isolated_to_its_record(monkeypatch):
+    def route_weather(origin, destination):
+        if origin == 'BAD':
+            raise RuntimeError('weather lookup failed')
+        return None
+    monkeypatch.setattr(ndjson_stream, 'get_route_weather', route_weather)
+
+    origins = ['JFK', 'BAD', 'SFO', 'ORD', 'BAD', 'JFK']
+    lines = [{'id': i, 'aircraft_model': 'A320', 'origin': origin, 'destination': 'LAX'}
+             for i, origin in enumerate(origins)]
+    _, out = _run('fuel', lines, chunk_size=4)
+
+    assert [line['index'] for line in out] == list(range(len(origins)))
+    for line, origin in zip(out, origins):
+        if origin == 'BAD':
+            assert line['error'] == 'RuntimeError: weather lookup failed'
+            assert 'predicted_fuel' not in line
+        else:
+            assert 'error' not in line
+            assert line['predicted_fuel'] > 0
+
+
+@pytest.mark.parametrize('chunk_size, expected_blocks', [(0, 5), (2, 3), (10 ** 9, 2)])
+def test_chunk_size_is_clamped(monkeypatch, chunk_size, expected_blocks):
+    monkeypatch.setattr(ndjson_stream, 'STREAM_MAX_CHUNK_SIZE', 3)
+    lines = [{'aircraft_model': 'A320', 'flight_hours': float(i)} for i in range(5)]
+    blocks, out = _run('rul', lines, chunk_size=chunk_size)
+    assert len(blocks) == expected_blocks
+    assert [line['index'] for line in out] == list(range(5))
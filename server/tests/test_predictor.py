@@ -0,0 +1,40 @@
+import numpy as np
+
+from predictor import RUL_NO_GO_CYCLES, predictor
+
+
+def test_rul_trajectory_degrades_with_utilization():
+    request = {'aircraft_model': 'A320', 'flight_hours': 0.5, 'sensor_readings': {'egt': 0.2}}
+    trajectory = predictor.predict_rul_trajectory(request, horizon_days=60, cycles_per_day=4.0,
+                                                  start_date='2026-01-01')
+    rul = np.array([point['rulCycles'] for point in trajectory])
+    health = np.array([point['engineHealthPercentage'] for point in trajectory])
+
+    assert len(trajectory) == 61
+    assert trajectory[1]['date'] == '2026-01-02'
+    assert rul[0] == predictor.predict_rul(request, explain=False)['rul_cycles']
+    assert rul[-1] < rul[0]
+    assert np.all(np.diff(rul) <= 0)
+    assert np.all(np.diff(health) <= 0)
+    assert rul.min() >= 0
+    # Once no-go, an engine stays no-go
+    okay = [point['isOkayToFlight'] for point in trajectory]
+    assert okay == sorted(okay, reverse=True)
+    assert all(point['rulCycles'] >= RUL_NO_GO_CYCLES for point in trajectory if point['isOkayToFlight'])
+
+
+def test_rul_trajectory_reaches_no_go():
+    request = {'aircraft_model': 'A320', 'flight_hours': 0.5}
+    trajectory = predictor.predict_rul_trajectory(request, horizon_days=365, cycles_per_day=10.0)
+    assert trajectory[0]['isOkayToFlight']
+    assert not trajectory[-1]['isOkayToFlight']
+    assert trajectory[-1]['rulCycles'] == 0
+
+
+def test_responses_list_missing_features():
+    request = {'aircraft_model': 'A320', 'origin': 'JFK', 'destination': 'LAX'}
+    result = predictor.predict_fuel(request, explain=False)
+    assert result['missing_features'] == ['payload_weight', 'temperature', 'wind_speed', 'wind_direction']
+    weather = {'temperature': 20.0, 'wind_speed': 3.0, 'wind_direction': 90.0}
+    result = predictor.predict_fuel(dict(request, payload_weight=12000), weather, explain=False)
+    assert result['missing_features'] == []
@@ -0,0 +1,84 @@
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from weather_store import NUMERIC_WEATHER_FIELDS, WeatherObservationStore
+
+HOUR = 3600.0
+
+
+def _features(temperature):
+    return {'temperature': temperature, 'humidity': 50.0, 'pressure': 1013.0, 'wind_speed': 3.0,
+            'wind_direction': 180.0, 'weather_code': 800, 'weather_main': 'Clear',
+            'weather_description': 'clear sky', 'is_clear': 1, 'is_cloudy': 0, 'is_rainy': 0,
+            'is_snowy': 0, 'is_stormy': 0}
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = WeatherObservationStore(tmp_path, max_gap=3 * HOUR)
+    # Hourly observations with a gap between 10h and 20h
+    for hour in list(range(0, 11)) + list(range(20, 25)):
+        assert store.append('JFK', hour * HOUR, _features(float(hour)))
+    return store
+
+
+def test_append_ignores_repeated_observations(store):
+    assert not store.append('JFK', 5 * HOUR, _features(-1.0))
+    assert store.nearest('JFK', 5 * HOUR)['temperature'] == 5.0
+    assert store.locations() == ['JFK']
+
+
+@pytest.mark.parametrize('hours, expected', [
+    (0, 0.0), (-1, 0.0), (4.4, 4.0), (4.6, 5.0), (10.5, 10.0), (19.4, 20.0), (26, 24.0),
+])
+def test_nearest_within_max_gap(store, hours, expected):
+    features = store.nearest('jfk', hours * HOUR)
+    assert features['temperature'] == expected
+    assert features['observed_at'] == expected * HOUR
+    assert features['weather_main'] == 'Clear'
+
+
+@pytest.mark.parametrize('hours', [-3.5, 14, 15, 16, 28])
+def test_nearest_beyond_max_gap(store, hours):
+    assert store.nearest('JFK', hours * HOUR) is None
+
+
+def test_nearest_gap_override_and_missing_partition(store):
+    assert store.nearest('JFK', 15 * HOUR, max_gap=5 * HOUR)['temperature'] == 10.0
+    assert store.nearest('JFK', 4.6 * HOUR, max_gap=0) is None
+    assert store.nearest('LAX', 5 * HOUR) is None
+    assert WeatherObservationStore('').nearest('JFK', 0) is None
+    assert store.nearest('JFK', datetime.fromtimestamp(7 * HOUR))['temperature'] == 7.0
+
+
+def test_features_at_matches_nearest(store):
+    timestamps = np.random.default_rng(0).uniform(-5, 30, 300) * HOUR
+    features = store.features_at('JFK', timestamps)
+    for i, timestamp in enumerate(timestamps):
+        expected = store.nearest('JFK', timestamp)
+        if expected is None:
+            assert all(np.isnan(features[name][i]) for name in ('observed_at',) + NUMERIC_WEATHER_FIELDS)
+        else:
+            # Ties between two neighbours resolve to the earlier one in both
+            assert features['observed_at'][i] == expected['observed_at']
+            assert features['temperature'][i] == expected['temperature']
+    assert np.isnan(store.features_at('LAX', timestamps)['temperature']).all()
+
+
+def test_get_weather_answers_past_times_from_the_store(store, monkeypatch):
+    import weather_api
+
+    def no_api(*args, **kwargs):
+        raise AssertionError('past weather must not call the API')
+    monkeypatch.setattr(weather_api, 'weather_store', store)
+    monkeypatch.setattr(weather_api, '_weather_cache', {})
+    monkeypatch.setattr(weather_api.requests, 'get', no_api)
+
+    past = datetime.fromtimestamp(7.2 * HOUR)
+    weather = weather_api.get_weather('JFK', past)
+    assert weather['temperature'] == 7.0
+    assert weather['observed_at'] == 7 * HOUR
+    # Beyond max_gap the default weather is used instead
+    assert 'observed_at' not in weather_api.get_weather('JFK', datetime.fromtimestamp(15 * HOUR))
@@ -0,0 +1,258 @@
+"""
+Training Orchestrator Module for Aircraft Predictive Maintenance System
+
+This module retrains every model concurrently instead of one after another:
+1. Each training job (failure, RUL, fuel) runs in its own worker process
+2. The feature matrices of the jobs that read NGAFID are built in this
+   process first, so NGAFID is parsed once and the workers memory-map the
+   cached matrices instead of each parsing it again
+3. The machine's cores are split between the jobs, so concurrent LightGBM
+   fits do not oversubscribe the CPU
+4. All artifacts are written to a new versioned directory
+   (models/versions/<version>) that is only published, by atomically
+   repointing the models/current symlink, once every job has succeeded
+5. A timing report is printed and saved as training_report.json in the
+   version directory
+
+Usage:
+    python training_orchestrator.py                  # train all models
+    python training_orchestrator.py --jobs failure,rul --cores 8
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timezone
+from pathlib import Path
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+import model_training
+from hyperparameter_search import TUNED_PARAMS_DIR, load_tuned_params
+
+VERSIONS_DIRNAME = 'versions'
+CURRENT_LINK = 'current'
+
+
+class TrainingJob:
+    """A named training function, its keyword arguments and its relative cost.
+
+    ``weight`` is the job's share of the cores relative to the other jobs.
+    Each training function writes fixed ``<model>_*`` artifact names, so a
+    run can include each function only once.
+    """
+    def __init__(self, name, func_name, kwargs=None, weight=1.0):
+        self.name = name
+        self.func_name = func_name
+        self.kwargs = dict(kwargs or {})
+        self.weight = weight
+
+
+DEFAULT_JOBS = {
+    'failure': TrainingJob('failure', 'train_failure_model'),
+    # C-MAPSS with rolling features is by far the largest matrix
+    'rul': TrainingJob('rul', 'train_rul_model', weight=2.0),
+    'fuel': TrainingJob('fuel', 'train_fuel_model'),
+}
+
+
+def allocate_threads(weights, cores):
+    """Split ``cores`` between jobs in proportion to their weights (at least one each).
+
+    Uses largest-remainder rounding so the allocation sums to
+    max(cores, len(weights)).
+    """
+    if not weights:
+        return []
+    cores = max(cores, len(weights))
+    total = float(sum(weights))
+    spare = cores - len(weights)
+    shares = [spare * w / total for w in weights]
+    threads = [1 + int(share) for share in shares]
+    remaining = cores - sum(threads)
+    by_remainder = sorted(range(len(weights)), key=lambda i: shares[i] - int(shares[i]), reverse=True)
+    for i in by_remainder[:remaining]:
+        threads[i] += 1
+    return threads
+
+
+def _run_job(func_name, kwargs, models_dir, n_jobs):
+    """Worker entry point: train one model into ``models_dir`` and time it."""
+    start = time.perf_counter()
+    getattr(model_training, func_name)(save_model=True, models_dir=models_dir, n_jobs=n_jobs, **kwargs)
+    return time.perf_counter() - start
+
+
+def prepare_shared_matrices(jobs):
+    """Build the cached NGAFID feature matrices before the workers start.
+
+    Failure and fuel both read NGAFID; building their matrices here parses it
+    once, and the workers then load the cached matrices. Returns the seconds
+    spent (0 when fewer than two jobs share NGAFID or caching is disabled).
+    """
+    builders = [model_training.NGAFID_TRAINING_MATRICES[job.func_name] for job in jobs
+                if job.func_name in model_training.NGAFID_TRAINING_MATRICES and job.kwargs.get('use_cache', True)]
+    if len(builders) < 2:
+        return 0.0
+    start = time.perf_counter()
+    for build in builders:
+        build()
+    return time.perf_counter() - start
+
+
+def publish_version(models_root, version_dir):
+    """Atomically point <models_root>/current at ``version_dir``."""
+    link = Path(models_root) / CURRENT_LINK
+    tmp_link = link.with_name(f'{CURRENT_LINK}.{os.getpid()}.tmp')
+    if tmp_link.is_symlink() or tmp_link.exists():
+        tmp_link.unlink()
+    os.symlink(os.path.relpath(version_dir, models_root), tmp_link)
+    os.replace(tmp_link, link)
+
+
+def run_training(jobs, models_root=None, cores=None, max_workers=None, version=None, publish=True):
+    """Train ``jobs`` concurrently and write them to a new models version.
+
+    Parameters
+    ----------
+    jobs : list of TrainingJob
+        Jobs to run; names and training functions must be unique
+    models_root : str or Path, optional
+        Directory holding versions/ and the current symlink
+        (defaults to model_training.MODELS_DIR)
+    cores : int, optional
+        Cores to split between jobs (defaults to os.cpu_count())
+    max_workers : int, optional
+        Worker processes (defaults to one per job)
+    version : str, optional
+        Version name (defaults to a UTC timestamp)
+    publish : bool, default=True
+        Repoint the current symlink once every job has succeeded
+
+    Returns
+    -------
+    dict
+        Timing report; ``report['ok']`` is False if any job failed, in
+        which case nothing is published and the partial version is removed
+    """
+    func_names = [job.func_name for job in jobs]
+    if len(set(func_names)) != len(func_names) or len({job.name for job in jobs}) != len(jobs):
+        raise ValueError("Training jobs must have unique names and training functions "
+                         "(each function writes the same artifact names)")
+    models_root = Path(models_root or model_training.MODELS_DIR)
+    cores = cores or os.cpu_count() or 1
+    version = version or datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+    versions_dir = models_root / VERSIONS_DIRNAME
+    version_dir = versions_dir / version
+    if version_dir.exists():
+        raise ValueError(f"Models version {version} already exists")
+    staging_dir = versions_dir / f'.{version}.tmp'
+    staging_dir.mkdir(parents=True, exist_ok=True)
+
+    threads = allocate_threads([job.weight for job in jobs], cores)
+    report = {'version': version, 'cores': cores, 'jobs': {}}
+    print(f"Training {len(jobs)} models on {cores} cores: "
+          + ', '.join(f"{job.name} ({n} threads)" for job, n in zip(jobs, threads)))
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=max_workers or len(jobs)) as pool:
+        futures = {}
+        # Jobs that do not read NGAFID start while its shared matrices are built
+        shared = [job.func_name in model_training.NGAFID_TRAINING_MATRICES for job in jobs]
+        for job, n_jobs, is_shared in zip(jobs, threads, shared):
+            if not is_shared:
+                futures[pool.submit(_run_job, job.func_name, job.kwargs, str(staging_dir), n_jobs)] = (job, n_jobs)
+        try:
+            report['prepare_seconds'] = round(prepare_shared_matrices(jobs), 3)
+        except Exception as e:
+            # Workers build their own matrices (and report the error if it persists)
+            print(f"Warning: Could not prepare shared feature matrices: {type(e).__name__}: {e}")
+        for job, n_jobs, is_shared in zip(jobs, threads, shared):
+            if is_shared:
+                futures[pool.submit(_run_job, job.func_name, job.kwargs, str(staging_dir), n_jobs)] = (job, n_jobs)
+        for future in as_completed(futures):
+            job, n_jobs = futures[future]
+            entry = {'n_jobs': n_jobs}
+            try:
+                entry['seconds'] = round(future.result(), 3)
+                entry['status'] = 'ok'
+                print(f"Finished {job.name} in {entry['seconds']:.2f}s")
+            except Exception as e:
+                entry['status'] = 'failed'
+                entry['error'] = f"{type(e).__name__}: {e}"
+                print(f"Error training {job.name}: {entry['error']}")
+            report['jobs'][job.name] = entry
+
+    report['wall_seconds'] = round(time.perf_counter() - start, 3)
+    job_seconds = [entry['seconds'] for entry in report['jobs'].values() if 'seconds' in entry]
+    report['sum_job_seconds'] = round(sum(job_seconds), 3)
+    report['ok'] = all(entry['status'] == 'ok' for entry in report['jobs'].values())
+
+    if not report['ok']:
+        shutil.rmtree(staging_dir, ignore_errors=True)
+        return report
+
+    (staging_dir / 'training_report.json').write_text(json.dumps(report, indent=2))
+    os.replace(staging_dir, version_dir)
+    report['models_dir'] = str(version_dir)
+    if publish:
+        publish_version(models_root, version_dir)
+        report['published'] = True
+    return report
+
+
+def format_report(report):
+    """Render a timing report as a text table."""
+    lines = [f"{'job':<20} {'status':<8} {'threads':>7} {'seconds':>9}"]
+    for name, entry in sorted(report['jobs'].items()):
+        seconds = f"{entry['seconds']:9.2f}" if 'seconds' in entry else f"{'-':>9}"
+        lines.append(f"{name:<20} {entry['status']:<8} {entry['n_jobs']:>7} {seconds}")
+        if 'error' in entry:
+            lines.append(f"    {entry['error']}")
+    if report.get('prepare_seconds'):
+        lines.append(f"Shared NGAFID matrices prepared in {report['prepare_seconds']:.2f}s")
+    lines.append(f"Wall clock: {report['wall_seconds']:.2f}s "
+                 f"(sequential job time: {report['sum_job_seconds']:.2f}s)")
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Train all models concurrently into a new versioned models directory")
+    parser.add_argument('--jobs', default=','.join(DEFAULT_JOBS),
+                        help="Comma-separated jobs to run (default: all)")
+    parser.add_argument('--models-root', default=None, help="Directory holding versions/ and current")
+    parser.add_argument('--cores', type=int, default=None, help="Cores to split between jobs")
+    parser.add_argument('--max-workers', type=int, default=None, help="Worker processes")
+    parser.add_argument('--version', default=None, help="Version name (default: UTC timestamp)")
+    parser.add_argument('--no-publish', action='store_true', help="Do not repoint the current symlink")
+    parser.add_argument('--tuned-params', default=str(TUNED_PARAMS_DIR),
+                        help="Directory of <job>.json parameters written by hyperparameter_search.py")
+    args = parser.parse_args(argv)
+
+    names = [name.strip() for name in args.jobs.split(',') if name.strip()]
+    unknown = [name for name in names if name not in DEFAULT_JOBS]
+    if unknown:
+        parser.error(f"Unknown jobs: {', '.join(unknown)}")
+
+    jobs = []
+    for name in names:
+        job = DEFAULT_JOBS[name]
+        params = load_tuned_params(name, args.tuned_params)
+        if params is not None:
+            print(f"Using tuned parameters for {name}: {params}")
+            job = TrainingJob(job.name, job.func_name, dict(job.kwargs, params=params), job.weight)
+        jobs.append(job)
+
+    report = run_training(jobs, args.models_root, args.cores,
+                          args.max_workers, args.version, publish=not args.no_publish)
+    print(format_report(report))
+    if report['ok']:
+        print(f"Models written to {report['models_dir']}")
+    return 0 if report['ok'] else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
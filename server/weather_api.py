@@ -3,6 +3,8 @@ Weather API Module for Aircraft Predictive Maintenance System
 
 This module interacts with OpenWeatherMap API to fetch weather data
 for flight origins and destinations to enhance prediction accuracy.
+Every fetched current-weather observation is appended to the local weather
+store (see weather_store), which answers requests for past timestamps.
 """
 
 import os
@@ -11,16 +13,16 @@ import datetime
 import json
 from typing import Dict, Any, Optional, Tuple
 import logging
-import traceback
 
-# Configure logging - increase level to DEBUG for more detailed logs
-logging.basicConfig(level=logging.DEBUG, 
-                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+from weather_store import weather_store
+
+# Logging is configured by the application (see logging_config); use
+# LOG_LEVELS=weather_api=DEBUG for detailed request tracing
 logger = logging.getLogger(__name__)
 
 # Load API key from environment variable
 API_KEY = os.environ.get('OPENWEATHER_API_KEY', '0708a304fb43269df9d27f82c7a612d5')
-BASE_URL = "https://api.openweathermap.org/data/2.5"
+BASE_URL = os.environ.get('OPENWEATHER_BASE_URL', "https://api.openweathermap.org/data/2.5")
 
 # Simple in-memory cache to reduce API calls
 _weather_cache = {}
@@ -53,14 +55,14 @@ def get_airport_coordinates(airport_code: str) -> Tuple[float, float]:
     Raises:
         ValueError: If airport code is not found in the dictionary
     """
-    logger.debug(f"Looking up coordinates for airport code: {airport_code}")
+    logger.debug("Looking up coordinates for airport code: %s", airport_code)
     airport_code = airport_code.upper()
     if airport_code in AIRPORT_COORDS:
         coords = AIRPORT_COORDS[airport_code]
-        logger.debug(f"Found coordinates for {airport_code}: {coords}")
+        logger.debug("Found coordinates for %s: %s", airport_code, coords)
         return coords
     else:
-        logger.warning(f"Airport code {airport_code} not found in database")
+        logger.warning("Airport code %s not found in database", airport_code)
         # In a production environment, this could call a geocoding API
         # to get coordinates for any airport
         raise ValueError(f"Airport code {airport_code} not found in database")
@@ -79,7 +81,7 @@ def get_cache_key(location: str, timestamp: datetime.datetime) -> str:
     # Round timestamp to nearest hour to improve cache hits
     rounded_hour = timestamp.replace(minute=0, second=0, microsecond=0)
     key = f"{location}_{rounded_hour.isoformat()}"
-    logger.debug(f"Generated cache key: {key}")
+    logger.debug("Generated cache key: %s", key)
     return key
 
 def get_weather(location: str, timestamp: Optional[datetime.datetime] = None) -> Dict[str, Any]:
@@ -95,11 +97,11 @@ def get_weather(location: str, timestamp: Optional[datetime.datetime] = None) ->
         dict: Weather data with extracted relevant features
     """
     try:
-        logger.info(f"Fetching weather for location: {location}, time: {timestamp}")
+        logger.debug("Fetching weather for location: %s, time: %s", location, timestamp)
         
         if timestamp is None:
             timestamp = datetime.datetime.now()
-            logger.debug(f"No timestamp provided, using current time: {timestamp}")
+            logger.debug("No timestamp provided, using current time: %s", timestamp)
         
         # Check cache first
         cache_key = get_cache_key(location, timestamp)
@@ -109,88 +111,105 @@ def get_weather(location: str, timestamp: Optional[datetime.datetime] = None) ->
             cached_result, cache_time = _weather_cache[cache_key]
             # Check if cache is still valid (not expired)
             if (current_time - cache_time).total_seconds() < CACHE_EXPIRY:
-                logger.debug(f"Using cached weather data for {cache_key}")
+                logger.debug("Using cached weather data for %s", cache_key)
                 return cached_result
             else:
-                logger.debug(f"Cache expired for {cache_key}")
+                logger.debug("Cache expired for %s", cache_key)
         else:
-            logger.debug(f"No cache entry found for {cache_key}")
+            logger.debug("No cache entry found for %s", cache_key)
         
         # Determine if we need current weather or forecast
         now = datetime.datetime.now()
         time_diff = (timestamp - now).total_seconds()
         
-        logger.debug(f"Time difference from now: {time_diff} seconds")
+        logger.debug("Time difference from now: %s seconds", time_diff)
         
         try:
+            if time_diff <= -3600:  # More than 1 hour in the past
+                # The API has no history; answer from stored observations
+                weather_data = weather_store.nearest(location, timestamp)
+                if weather_data is None:
+                    logger.warning("No stored weather observation for %s near %s", location, timestamp)
+                    return get_default_weather()
+                logger.debug("Using stored weather observation for %s at %s", location, weather_data['observed_at'])
+                _weather_cache[cache_key] = (weather_data, current_time)
+                return weather_data
+            
             # Get coordinates for the location
             location_type = "unknown"
             if location.upper() in AIRPORT_COORDS:
-                logger.debug(f"Looking up coordinates for airport: {location}")
+                logger.debug("Looking up coordinates for airport: %s", location)
                 lat, lon = get_airport_coordinates(location)
                 location_type = "airport"
-                logger.debug(f"Coordinates for {location}: lat={lat}, lon={lon}")
+                logger.debug("Coordinates for %s: lat=%s, lon=%s", location, lat, lon)
             else:
                 # Assume location is a city name
-                logger.debug(f"Treating {location} as a city name")
+                logger.debug("Treating %s as a city name", location)
                 lat, lon = None, None
                 city_name = location
                 location_type = "city"
         
-            logger.info(f"Determined location type: {location_type}")
+            logger.debug("Determined location type: %s", location_type)
             
             if time_diff < 3600 and time_diff > -3600:  # Within 1 hour of current time
                 # Get current weather
                 endpoint = f"{BASE_URL}/weather"
-                logger.debug(f"Using current weather endpoint: {endpoint}")
+                logger.debug("Using current weather endpoint: %s", endpoint)
                 
                 if lat is not None and lon is not None:
                     params = {"lat": lat, "lon": lon, "appid": API_KEY, "units": "metric"}
-                    logger.debug(f"Request params using coordinates: lat={lat}, lon={lon}")
+                    logger.debug("Request params using coordinates: lat=%s, lon=%s", lat, lon)
                 else:
                     params = {"q": city_name, "appid": API_KEY, "units": "metric"}
-                    logger.debug(f"Request params using city name: q={city_name}")
+                    logger.debug("Request params using city name: q=%s", city_name)
                     
-                logger.debug(f"Making API request to: {endpoint}")
+                logger.debug("Making API request to: %s", endpoint)
                 response = requests.get(endpoint, params=params)
-                logger.debug(f"API response status code: {response.status_code}")
+                logger.debug("API response status code: %s", response.status_code)
                 
                 if response.status_code != 200:
-                    logger.error(f"API error: {response.status_code} - {response.text}")
+                    logger.error("API error: %s - %s", response.status_code, response.text)
                     return get_default_weather()
                 
                 raw_data = response.json()
-                logger.debug(f"Received raw weather data: {json.dumps(raw_data, indent=2)}")
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("Received raw weather data: %s", json.dumps(raw_data, separators=(',', ':')))
                 
                 # Process current weather data
                 logger.debug("Extracting features from current weather data")
                 weather_data = extract_weather_features(raw_data, "current")
                 
+                # Keep the observation for historical lookups and training
+                try:
+                    weather_store.append(location, raw_data.get('dt', now.timestamp()), weather_data)
+                except Exception as e:
+                    logger.warning("Could not store weather observation for %s: %s", location, e)
+                
             else:
                 # Get forecast
                 endpoint = f"{BASE_URL}/forecast"
-                logger.debug(f"Using forecast endpoint: {endpoint}")
+                logger.debug("Using forecast endpoint: %s", endpoint)
                 
                 if lat is not None and lon is not None:
                     params = {"lat": lat, "lon": lon, "appid": API_KEY, "units": "metric"}
-                    logger.debug(f"Request params using coordinates: lat={lat}, lon={lon}")
+                    logger.debug("Request params using coordinates: lat=%s, lon=%s", lat, lon)
                 else:
                     params = {"q": city_name, "appid": API_KEY, "units": "metric"}
-                    logger.debug(f"Request params using city name: q={city_name}")
+                    logger.debug("Request params using city name: q=%s", city_name)
                     
-                logger.debug(f"Making API request to: {endpoint}")
+                logger.debug("Making API request to: %s", endpoint)
                 response = requests.get(endpoint, params=params)
-                logger.debug(f"API response status code: {response.status_code}")
+                logger.debug("API response status code: %s", response.status_code)
                 
                 if response.status_code != 200:
-                    logger.error(f"API error: {response.status_code} - {response.text}")
+                    logger.error("API error: %s - %s", response.status_code, response.text)
                     return get_default_weather()
                     
                 raw_data = response.json()
-                logger.debug(f"Received forecast data with {len(raw_data.get('list', []))} entries")
+                logger.debug("Received forecast data with %s entries", len(raw_data.get('list', [])))
                 
                 # Find closest forecast time to requested timestamp
-                logger.debug(f"Finding closest forecast to time: {timestamp}")
+                logger.debug("Finding closest forecast to time: %s", timestamp)
                 closest_forecast = find_closest_forecast(raw_data, timestamp)
                 
                 # Process forecast data
@@ -198,21 +217,19 @@ def get_weather(location: str, timestamp: Optional[datetime.datetime] = None) ->
                 weather_data = extract_weather_features(closest_forecast, "forecast")
             
             # Cache the result
-            logger.debug(f"Caching weather data with key: {cache_key}")
+            logger.debug("Caching weather data with key: %s", cache_key)
             _weather_cache[cache_key] = (weather_data, current_time)
             
-            logger.info(f"Successfully retrieved weather data for {location}")
+            logger.debug("Successfully retrieved weather data for %s", location)
             return weather_data
             
         except Exception as e:
-            logger.error(f"Error in weather data retrieval: {str(e)}")
-            logger.error(f"Stack trace: {traceback.format_exc()}")
+            logger.error("Error in weather data retrieval: %s", e, exc_info=True)
             # Return default weather data in case of error
             return get_default_weather()
     
     except Exception as outer_e:
-        logger.error(f"Outer exception in get_weather: {str(outer_e)}")
-        logger.error(f"Stack trace: {traceback.format_exc()}")
+        logger.error("Outer exception in get_weather: %s", outer_e, exc_info=True)
         return get_default_weather()
 
 def find_closest_forecast(forecast_data: Dict[str, Any], target_time: datetime.datetime) -> Dict[str, Any]:
@@ -226,12 +243,12 @@ def find_closest_forecast(forecast_data: Dict[str, Any], target_time: datetime.d
     Returns:
         dict: The forecast entry closest to target time
     """
-    logger.debug(f"Finding closest forecast to target time: {target_time}")
+    logger.debug("Finding closest forecast to target time: %s", target_time)
     closest_forecast = None
     min_diff = float('inf')
     
     forecast_list = forecast_data.get('list', [])
-    logger.debug(f"Received {len(forecast_list)} forecast entries")
+    logger.debug("Received %s forecast entries", len(forecast_list))
     
     if not forecast_list:
         logger.warning("Empty forecast list received")
@@ -241,18 +258,18 @@ def find_closest_forecast(forecast_data: Dict[str, Any], target_time: datetime.d
         forecast_time = datetime.datetime.fromtimestamp(forecast['dt'])
         time_diff = abs((forecast_time - target_time).total_seconds())
         
-        logger.debug(f"Forecast entry time: {forecast_time}, difference: {time_diff} seconds")
+        logger.debug("Forecast entry time: %s, difference: %s seconds", forecast_time, time_diff)
         
         if time_diff < min_diff:
             min_diff = time_diff
             closest_forecast = forecast
-            logger.debug(f"New closest forecast found at {forecast_time}, diff: {min_diff}")
+            logger.debug("New closest forecast found at %s, diff: %s", forecast_time, min_diff)
     
     if closest_forecast is None:
         logger.warning("No closest forecast found")
         raise ValueError("No forecast data found")
         
-    logger.debug(f"Found closest forecast at time diff: {min_diff} seconds")
+    logger.debug("Found closest forecast at time diff: %s seconds", min_diff)
     return closest_forecast
 
 def extract_weather_features(weather_data: Dict[str, Any], data_type: str) -> Dict[str, Any]:
@@ -266,88 +283,88 @@ def extract_weather_features(weather_data: Dict[str, Any], data_type: str) -> Di
     Returns:
         dict: Extracted weather features
     """
-    logger.debug(f"Extracting weather features from {data_type} data")
+    logger.debug("Extracting weather features from %s data", data_type)
     features = {}
     
     try:
         # Log the structure of the incoming data
-        logger.debug(f"Weather data keys: {list(weather_data.keys())}")
+        logger.debug("Weather data keys: %s", list(weather_data.keys()))
         if 'main' in weather_data:
-            logger.debug(f"Main data keys: {list(weather_data['main'].keys())}")
+            logger.debug("Main data keys: %s", list(weather_data['main'].keys()))
         if 'wind' in weather_data:
-            logger.debug(f"Wind data keys: {list(weather_data['wind'].keys())}")
+            logger.debug("Wind data keys: %s", list(weather_data['wind'].keys()))
         if 'weather' in weather_data:
-            logger.debug(f"Weather array length: {len(weather_data['weather'])}")
+            logger.debug("Weather array length: %s", len(weather_data['weather']))
             if weather_data['weather']:
-                logger.debug(f"First weather item keys: {list(weather_data['weather'][0].keys())}")
+                logger.debug("First weather item keys: %s", list(weather_data['weather'][0].keys()))
         
         if data_type == "current":
             # Temperature in Celsius
             features['temperature'] = weather_data.get('main', {}).get('temp')
-            logger.debug(f"Extracted temperature: {features['temperature']}")
+            logger.debug("Extracted temperature: %s", features['temperature'])
             
             # Humidity in percentage
             features['humidity'] = weather_data.get('main', {}).get('humidity')
-            logger.debug(f"Extracted humidity: {features['humidity']}")
+            logger.debug("Extracted humidity: %s", features['humidity'])
             
             # Pressure in hPa
             features['pressure'] = weather_data.get('main', {}).get('pressure')
-            logger.debug(f"Extracted pressure: {features['pressure']}")
+            logger.debug("Extracted pressure: %s", features['pressure'])
             
             # Wind speed in m/s
             features['wind_speed'] = weather_data.get('wind', {}).get('speed')
-            logger.debug(f"Extracted wind_speed: {features['wind_speed']}")
+            logger.debug("Extracted wind_speed: %s", features['wind_speed'])
             
             # Wind direction in degrees
             features['wind_direction'] = weather_data.get('wind', {}).get('deg')
-            logger.debug(f"Extracted wind_direction: {features['wind_direction']}")
+            logger.debug("Extracted wind_direction: %s", features['wind_direction'])
             
             # Weather condition code
             weather_info = weather_data.get('weather', [{}])[0]
             features['weather_code'] = weather_info.get('id')
-            logger.debug(f"Extracted weather_code: {features['weather_code']}")
+            logger.debug("Extracted weather_code: %s", features['weather_code'])
             
             features['weather_main'] = weather_info.get('main')
-            logger.debug(f"Extracted weather_main: {features['weather_main']}")
+            logger.debug("Extracted weather_main: %s", features['weather_main'])
             
             features['weather_description'] = weather_info.get('description')
-            logger.debug(f"Extracted weather_description: {features['weather_description']}")
+            logger.debug("Extracted weather_description: %s", features['weather_description'])
             
         elif data_type == "forecast":
             # For forecast data, the structure might be slightly different
             features['temperature'] = weather_data.get('main', {}).get('temp')
-            logger.debug(f"Extracted temperature: {features['temperature']}")
+            logger.debug("Extracted temperature: %s", features['temperature'])
             
             features['humidity'] = weather_data.get('main', {}).get('humidity')
-            logger.debug(f"Extracted humidity: {features['humidity']}")
+            logger.debug("Extracted humidity: %s", features['humidity'])
             
             features['pressure'] = weather_data.get('main', {}).get('pressure')
-            logger.debug(f"Extracted pressure: {features['pressure']}")
+            logger.debug("Extracted pressure: %s", features['pressure'])
             
             features['wind_speed'] = weather_data.get('wind', {}).get('speed')
-            logger.debug(f"Extracted wind_speed: {features['wind_speed']}")
+            logger.debug("Extracted wind_speed: %s", features['wind_speed'])
             
             features['wind_direction'] = weather_data.get('wind', {}).get('deg')
-            logger.debug(f"Extracted wind_direction: {features['wind_direction']}")
+            logger.debug("Extracted wind_direction: %s", features['wind_direction'])
             
             weather_info = weather_data.get('weather', [{}])[0]
             features['weather_code'] = weather_info.get('id')
-            logger.debug(f"Extracted weather_code: {features['weather_code']}")
+            logger.debug("Extracted weather_code: %s", features['weather_code'])
             
             features['weather_main'] = weather_info.get('main')
-            logger.debug(f"Extracted weather_main: {features['weather_main']}")
+            logger.debug("Extracted weather_main: %s", features['weather_main'])
             
             features['weather_description'] = weather_info.get('description')
-            logger.debug(f"Extracted weather_description: {features['weather_description']}")
+            logger.debug("Extracted weather_description: %s", features['weather_description'])
             
         # Convert weather conditions to categorical features
         # Weather codes: https://openweathermap.org/weather-conditions
         weather_code = features.get('weather_code', 0)
-        logger.debug(f"Processing weather_code for categorical features: {weather_code}")
+        logger.debug("Processing weather_code for categorical features: %s", weather_code)
         
         # Ensure weather_code is not None before making comparisons
         if weather_code is not None:
-            logger.debug(f"Weather code is not None, determining weather categories")
+            logger.debug("Weather code is not None, determining weather categories")
             features['is_clear'] = 1 if 800 <= weather_code <= 801 else 0
             features['is_cloudy'] = 1 if 802 <= weather_code <= 804 else 0
             features['is_rainy'] = 1 if 500 <= weather_code <= 531 else 0
@@ -364,14 +381,14 @@ def extract_weather_features(weather_data: Dict[str, Any], data_type: str) -> Di
             # Make sure weather_code is set to a default value rather than None
             features['weather_code'] = 0
         
-        logger.debug(f"Final weather categories: clear={features['is_clear']}, cloudy={features['is_cloudy']}, "
-                    f"rainy={features['is_rainy']}, snowy={features['is_snowy']}, stormy={features['is_stormy']}")
+        logger.debug("Final weather categories: clear=%s, cloudy=%s, rainy=%s, snowy=%s, stormy=%s",
+                     features['is_clear'], features['is_cloudy'], features['is_rainy'],
+                     features['is_snowy'], features['is_stormy'])
         
     except Exception as e:
-        logger.error(f"Error extracting weather features: {str(e)}")
-        logger.error(f"Stack trace: {traceback.format_exc()}")
+        logger.error("Error extracting weather features: %s", e, exc_info=True)
         # Log the weather_data that caused the error
-        logger.error(f"Weather data that caused error: {weather_data}")
+        logger.error("Weather data that caused error: %s", weather_data)
     
     # Do a final check for wind speed and direction - if they're None, set to safe defaults
     if features.get('wind_speed') is None:
@@ -400,7 +417,7 @@ def calculate_headwind(wind_speed: float, wind_direction: float,
     """
     try:
         import math
-        logger.debug(f"Calculating headwind: wind_speed={wind_speed}, wind_direction={wind_direction}, flight_direction={flight_direction}")
+        logger.debug("Calculating headwind: wind_speed=%s, wind_direction=%s, flight_direction=%s", wind_speed, wind_direction, flight_direction)
         
         # Check for None values and provide defaults
         if wind_speed is None:
@@ -422,12 +439,11 @@ def calculate_headwind(wind_speed: float, wind_direction: float,
         # Calculate headwind component
         # Headwind = wind_speed * cos(wind_direction - flight_direction)
         headwind = wind_speed * math.cos(wind_rad - flight_rad)
-        logger.debug(f"Calculated headwind component: {headwind}")
+        logger.debug("Calculated headwind component: %s", headwind)
         
         return headwind
     except Exception as e:
-        logger.error(f"Error calculating headwind: {str(e)}")
-        logger.error(f"Stack trace: {traceback.format_exc()}")
+        logger.error("Error calculating headwind: %s", e, exc_info=True)
         return 0.0  # Safe default
 
 def get_enroute_weather(origin: str, destination: str, 
@@ -443,11 +459,11 @@ def get_enroute_weather(origin: str, destination: str,
     Returns:
         dict: Enroute weather features
     """
-    logger.info(f"Getting enroute weather for {origin} to {destination}, departure time: {departure_time}")
+    logger.info("Getting enroute weather for %s to %s, departure time: %s", origin, destination, departure_time)
     
     try:
         # Get weather at origin and destination
-        logger.debug(f"Fetching origin weather for {origin}")
+        logger.debug("Fetching origin weather for %s", origin)
         origin_weather = get_weather(origin, departure_time)
         
         # Estimate arrival time (very rough approximation)
@@ -455,8 +471,8 @@ def get_enroute_weather(origin: str, destination: str,
         est_flight_time = 3  # hours, placeholder
         arrival_time = departure_time + datetime.timedelta(hours=est_flight_time)
         
-        logger.debug(f"Estimated arrival time: {arrival_time}")
-        logger.debug(f"Fetching destination weather for {destination}")
+        logger.debug("Estimated arrival time: %s", arrival_time)
+        logger.debug("Fetching destination weather for %s", destination)
         destination_weather = get_weather(destination, arrival_time)
         
         # Calculate average/enroute conditions (simplified)
@@ -465,10 +481,10 @@ def get_enroute_weather(origin: str, destination: str,
         for key in origin_weather:
             if key in destination_weather and isinstance(origin_weather[key], (int, float)) and isinstance(destination_weather[key], (int, float)):
                 enroute_weather[key] = (origin_weather[key] + destination_weather[key]) / 2
-                logger.debug(f"Averaged {key}: origin={origin_weather[key]}, dest={destination_weather[key]}, avg={enroute_weather[key]}")
+                logger.debug("Averaged %s: origin=%s, dest=%s, avg=%s", key, origin_weather[key], destination_weather[key], enroute_weather[key])
             else:
                 enroute_weather[key] = origin_weather.get(key)
-                logger.debug(f"Using origin value for {key}: {enroute_weather[key]}")
+                logger.debug("Using origin value for %s: %s", key, enroute_weather[key])
         
         # Add route-specific data
         if origin.upper() in AIRPORT_COORDS and destination.upper() in AIRPORT_COORDS:
@@ -485,7 +501,7 @@ def get_enroute_weather(origin: str, destination: str,
             x = (math.cos(origin_lat) * math.sin(dest_lat) - 
                  math.sin(origin_lat) * math.cos(dest_lat) * math.cos(delta_lon))
             flight_direction = (math.degrees(math.atan2(y, x)) + 360) % 360
-            logger.debug(f"Calculated flight direction: {flight_direction}°")
+            logger.debug("Calculated flight direction: %s°", flight_direction)
             
             # Calculate headwind component
             if 'wind_speed' in enroute_weather and 'wind_direction' in enroute_weather:
@@ -494,17 +510,52 @@ def get_enroute_weather(origin: str, destination: str,
                     enroute_weather['wind_direction'],
                     flight_direction
                 )
-                logger.debug(f"Calculated headwind component: {enroute_weather['headwind']}")
+                logger.debug("Calculated headwind component: %s", enroute_weather['headwind'])
         else:
             logger.warning("One or both airports not found in coordinates database, skipping headwind calculation")
             
         return enroute_weather
         
     except Exception as e:
-        logger.error(f"Error getting enroute weather: {str(e)}")
-        logger.error(f"Stack trace: {traceback.format_exc()}")
+        logger.error("Error getting enroute weather: %s", e, exc_info=True)
         return get_default_weather()
 
+def get_route_weather(origin: str, destination: str) -> Optional[Dict[str, Any]]:
+    """
+    Get current weather for a route by combining origin and destination weather.
+    
+    Numerical values are averaged; categorical values are taken from the origin.
+    
+    Args:
+        origin (str): Origin airport code
+        destination (str): Destination airport code
+        
+    Returns:
+        dict: Combined weather features, or None if either side is unavailable
+    """
+    origin_weather = get_weather(origin)
+    dest_weather = get_weather(destination)
+    
+    # Average the weather conditions (simple approach)
+    if not origin_weather or not dest_weather:
+        return None
+    
+    # Create a combined weather data dictionary with averaged values
+    weather_data = {}
+    
+    # Combine numerical values (average them)
+    for key in ['temperature', 'humidity', 'pressure', 'wind_speed', 'wind_direction']:
+        if key in origin_weather and key in dest_weather:
+            weather_data[key] = (origin_weather[key] + dest_weather[key]) / 2
+    
+    # For categorical features, take the origin values
+    for key in ['weather_code', 'weather_main', 'weather_description', 
+               'is_clear', 'is_cloudy', 'is_rainy', 'is_snowy', 'is_stormy']:
+        if key in origin_weather:
+            weather_data[key] = origin_weather[key]
+    
+    return weather_data
+
 def get_default_weather() -> Dict[str, Any]:
     """
     Return default weather data when API fails.
@@ -0,0 +1,220 @@
+"""
+Weather Store Module for Aircraft Predictive Maintenance System
+
+The weather API only serves the present and a 5-day forecast, and fetched
+data used to be kept for an hour at most. This module keeps every observed
+weather report on disk so the past can be answered locally:
+1. Append-only SQLite partitions, one database file per airport (or city)
+   under WEATHER_STORE_DIR, with a unique index on the observation time
+2. Every current-weather response fetched by weather_api is appended
+   (re-fetches of the same observation are ignored)
+3. Historical timestamps are answered with the nearest stored observation,
+   found by an index seek on either side of the timestamp
+4. For training, features_at joins many timestamps to the nearest
+   observations at once by binary search over the partition's time column,
+   without calling the API
+
+Times are stored as Unix epoch seconds. Set WEATHER_STORE_DIR to an empty
+string to disable the store.
+"""
+
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+WEATHER_STORE_DIR = os.environ.get('WEATHER_STORE_DIR', 'weather_history')
+# Largest distance (seconds) between a requested time and the observation answering it
+WEATHER_STORE_MAX_GAP = float(os.environ.get('WEATHER_STORE_MAX_GAP', 3 * 3600))
+
+# Weather features kept per observation (the output of extract_weather_features)
+WEATHER_COLUMNS = (
+    ('temperature', 'REAL'),
+    ('humidity', 'REAL'),
+    ('pressure', 'REAL'),
+    ('wind_speed', 'REAL'),
+    ('wind_direction', 'REAL'),
+    ('weather_code', 'INTEGER'),
+    ('weather_main', 'TEXT'),
+    ('weather_description', 'TEXT'),
+    ('is_clear', 'INTEGER'),
+    ('is_cloudy', 'INTEGER'),
+    ('is_rainy', 'INTEGER'),
+    ('is_snowy', 'INTEGER'),
+    ('is_stormy', 'INTEGER'),
+)
+WEATHER_FIELDS = tuple(name for name, _ in WEATHER_COLUMNS)
+NUMERIC_WEATHER_FIELDS = tuple(name for name, kind in WEATHER_COLUMNS if kind != 'TEXT')
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS observations ("
+    "observed_at REAL NOT NULL, fetched_at REAL NOT NULL, "
+    + ", ".join(f"{name} {kind}" for name, kind in WEATHER_COLUMNS) + ")"
+)
+_INDEX = "CREATE UNIQUE INDEX IF NOT EXISTS observations_time ON observations (observed_at)"
+_INSERT = (
+    f"INSERT OR IGNORE INTO observations (observed_at, fetched_at, {', '.join(WEATHER_FIELDS)}) "
+    f"VALUES ({', '.join('?' * (len(WEATHER_FIELDS) + 2))})"
+)
+_NEAREST = (
+    f"SELECT * FROM (SELECT observed_at, {', '.join(WEATHER_FIELDS)} FROM observations "
+    "WHERE observed_at <= ? ORDER BY observed_at DESC LIMIT 1) "
+    f"UNION ALL SELECT * FROM (SELECT observed_at, {', '.join(WEATHER_FIELDS)} FROM observations "
+    "WHERE observed_at >= ? ORDER BY observed_at ASC LIMIT 1)"
+)
+
+
+def to_epoch(timestamp):
+    """Epoch seconds of a datetime (naive datetimes are local time) or a number."""
+    if isinstance(timestamp, datetime):
+        return timestamp.timestamp()
+    return float(timestamp)
+
+
+def partition_name(location):
+    """File-system safe partition name of an airport code or city name."""
+    return re.sub(r'[^A-Z0-9]+', '_', location.strip().upper()).strip('_') or '_'
+
+
+class WeatherObservationStore:
+    """Append-only weather observations, one SQLite partition per location.
+
+    Parameters
+    ----------
+    root : str or Path, default=WEATHER_STORE_DIR
+        Directory holding the partitions; a falsy value disables the store
+    max_gap : float, default=WEATHER_STORE_MAX_GAP
+        Observations further than this many seconds from a requested time
+        are not used to answer it
+    """
+    def __init__(self, root=WEATHER_STORE_DIR, max_gap=WEATHER_STORE_MAX_GAP):
+        self.root = Path(root) if root else None
+        self.max_gap = max_gap
+        self._initialized = set()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return self.root is not None
+
+    def partition(self, location):
+        return self.root / f"{partition_name(location)}.sqlite"
+
+    def locations(self):
+        """Partition names of the stored locations."""
+        if not self.enabled or not self.root.is_dir():
+            return []
+        return sorted(path.stem for path in self.root.glob('*.sqlite'))
+
+    def _connect(self, location, create=False):
+        """Connection to a location's partition, or None if it does not exist and create is False."""
+        path = self.partition(location)
+        if not create and not path.exists():
+            return None
+        if path not in self._initialized:
+            with self._lock:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                with sqlite3.connect(path, timeout=30) as conn:
+                    conn.execute("PRAGMA journal_mode=WAL")
+                    conn.execute(_SCHEMA)
+                    conn.execute(_INDEX)
+                self._initialized.add(path)
+        return sqlite3.connect(path, timeout=30)
+
+    def append(self, location, observed_at, features, fetched_at=None):
+        """Append one observation; returns False if it was already stored or the store is disabled."""
+        if not self.enabled:
+            return False
+        row = (to_epoch(observed_at), time.time() if fetched_at is None else to_epoch(fetched_at))
+        row += tuple(features.get(name) for name in WEATHER_FIELDS)
+        conn = self._connect(location, create=True)
+        try:
+            with conn:
+                inserted = conn.execute(_INSERT, row).rowcount > 0
+        finally:
+            conn.close()
+        if inserted:
+            logger.debug("Stored weather observation for %s at %s", location, row[0])
+        return inserted
+
+    def nearest(self, location, timestamp, max_gap=None):
+        """Weather features of the observation closest to ``timestamp``.
+
+        Returns the features with ``observed_at`` (epoch seconds), or None if
+        there is no observation within ``max_gap`` seconds.
+        """
+        if not self.enabled:
+            return None
+        conn = self._connect(location)
+        if conn is None:
+            return None
+        target = to_epoch(timestamp)
+        try:
+            rows = conn.execute(_NEAREST, (target, target)).fetchall()
+        finally:
+            conn.close()
+        if not rows:
+            return None
+        row = min(rows, key=lambda r: abs(r[0] - target))
+        if abs(row[0] - target) > (self.max_gap if max_gap is None else max_gap):
+            return None
+        features = dict(zip(WEATHER_FIELDS, row[1:]))
+        features['observed_at'] = row[0]
+        return features
+
+    def features_at(self, location, timestamps, fields=NUMERIC_WEATHER_FIELDS, max_gap=None):
+        """Nearest stored observation for many timestamps at once (for training features).
+
+        Parameters
+        ----------
+        location : str
+            Airport code or city name
+        timestamps : sequence of datetime or float
+            Times to look up (naive datetimes are local time, numbers are
+            epoch seconds)
+        fields : sequence of str, default=NUMERIC_WEATHER_FIELDS
+            Numeric weather fields to return
+        max_gap : float, optional
+            Defaults to the store's ``max_gap``
+
+        Returns
+        -------
+        dict of str -> ndarray
+            One float array per field, plus ``observed_at``; NaN where no
+            observation is within ``max_gap``
+        """
+        targets = np.array([to_epoch(t) for t in timestamps], dtype=np.float64)
+        result = {name: np.full(len(targets), np.nan) for name in ('observed_at',) + tuple(fields)}
+        conn = self._connect(location) if self.enabled else None
+        if conn is None or not len(targets):
+            return result
+        try:
+            # The unique time index returns the partition already sorted
+            rows = conn.execute(
+                f"SELECT observed_at, {', '.join(fields)} FROM observations ORDER BY observed_at").fetchall()
+        finally:
+            conn.close()
+        if not rows:
+            return result
+        table = np.array(rows, dtype=np.float64)
+        times = table[:, 0]
+        # Binary search for the neighbours on either side of each target
+        right = np.searchsorted(times, targets).clip(0, len(times) - 1)
+        left = np.maximum(right - 1, 0)
+        nearest = np.where(np.abs(times[left] - targets) <= np.abs(times[right] - targets), left, right)
+        found = np.abs(times[nearest] - targets) <= (self.max_gap if max_gap is None else max_gap)
+        for j, name in enumerate(('observed_at',) + tuple(fields)):
+            result[name][found] = table[nearest[found], j]
+        return result
+
+
+# Process-wide store written by weather_api
+weather_store = WeatherObservationStore()